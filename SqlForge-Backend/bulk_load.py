@@ -0,0 +1,314 @@
+import io
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from sqlalchemy import text
+
+# --- BULK LOADING ---
+#
+# Batches of rows used to go through text() executemany for every dialect,
+# i.e. one INSERT round trip (or one driver-side loop) per row. Each engine
+# has a much faster native loader; insert_rows() picks it by dialect and
+# falls back to executemany when the fast path isn't available. Used by
+# database.import_data, pro/transfer.py and pro/generator.py.
+#
+# Callers are responsible for validating table/column names
+# (database.validate_identifier) - they're interpolated into the statements
+# below exactly like the INSERTs they replace.
+
+
+class BulkLoadUnavailable(Exception):
+    """Raised by a fast path before it has written anything, when it can't be
+    used on this connection. insert_rows() then falls back to executemany.
+    Errors raised after a fast path started writing are never retried."""
+
+
+def _dbapi_connection(conn):
+    return conn.connection.dbapi_connection
+
+
+def _escape_text_value(value, null: str) -> str:
+    """Renders a value for the tab-separated text format shared by Postgres
+    COPY and MySQL LOAD DATA (backslash escapes, `null` for NULL)."""
+    if value is None:
+        return null
+    if isinstance(value, (dict, list)):
+        s = json.dumps(value, default=str)
+    elif hasattr(value, 'isoformat'):
+        s = value.isoformat()
+    else:
+        s = str(value)
+    return s.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _copy_postgres(conn, table_name: str, columns: list[str], rows: list[tuple]) -> int:
+    cursor = _dbapi_connection(conn).cursor()
+    if not hasattr(cursor, "copy_expert"):
+        raise BulkLoadUnavailable("driver has no COPY support")
+
+    buf = io.StringIO()
+    for row in rows:
+        values = []
+        for value in row:
+            if isinstance(value, bool):
+                values.append("t" if value else "f")
+            elif isinstance(value, (bytes, bytearray, memoryview)):
+                # bytea hex input (\x...), with the backslash itself escaped for COPY
+                values.append("\\\\x" + bytes(value).hex())
+            else:
+                values.append(_escape_text_value(value, "\\N"))
+        buf.write("\t".join(values))
+        buf.write("\n")
+    buf.seek(0)
+
+    cursor.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN", buf)
+    return len(rows)
+
+
+# MySQL error codes meaning LOAD DATA LOCAL is disabled on the server side.
+_MYSQL_LOCAL_INFILE_DISABLED = {1148, 2068, 3948}
+
+
+def _load_data_mysql(conn, table_name: str, columns: list[str], rows: list[tuple]) -> int:
+    dbapi_conn = _dbapi_connection(conn)
+    # pymysql refuses LOCAL INFILE unless the connection was opened with
+    # local_infile=True (see database.bulk_load_engine).
+    if not getattr(dbapi_conn, "_local_infile", False):
+        raise BulkLoadUnavailable("connection opened without local_infile")
+    if any(isinstance(v, (bytes, bytearray, memoryview)) for row in rows for v in row):
+        raise BulkLoadUnavailable("binary values need parameter binding")
+
+    # The server asks the client for the file by name, so the batch is
+    # buffered to a temp file rather than held in a string.
+    fd, path = tempfile.mkstemp(suffix=".tsv")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            for row in rows:
+                values = [
+                    ("1" if v else "0") if isinstance(v, bool) else _escape_text_value(v, "\\N")
+                    for v in row
+                ]
+                f.write("\t".join(values))
+                f.write("\n")
+
+        sql = (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table_name} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+            f"({', '.join(columns)})"
+        )
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute(sql, (path,))
+        except Exception as e:
+            code = e.args[0] if e.args else None
+            if code in _MYSQL_LOCAL_INFILE_DISABLED:
+                raise BulkLoadUnavailable(str(e))
+            raise
+        return len(rows)
+    finally:
+        os.remove(path)
+
+
+def _bulk_copy_mssql(conn, table_name: str, columns: list[str], rows: list[tuple]) -> int:
+    dbapi_conn = _dbapi_connection(conn)
+    if not hasattr(dbapi_conn, "bulk_copy"):
+        raise BulkLoadUnavailable("pymssql without bulk_copy support")
+
+    # bulk_copy addresses target columns by ordinal position.
+    ordinals = {
+        row[0].lower(): row[1]
+        for row in conn.execute(
+            text("SELECT name, column_id FROM sys.columns WHERE object_id = OBJECT_ID(:t)"),
+            {"t": table_name},
+        )
+    }
+    try:
+        column_ids = [ordinals[c.lower()] for c in columns]
+    except KeyError as e:
+        raise BulkLoadUnavailable(f"unknown column {e}")
+
+    dbapi_conn.bulk_copy(table_name, rows, column_ids=column_ids, batch_size=len(rows))
+    return len(rows)
+
+
+def _executemany_sqlite(conn, table_name: str, columns: list[str], rows: list[tuple]) -> int:
+    # Straight to the driver with positional parameters - skips SQLAlchemy's
+    # per-row bind processing for named parameters.
+    placeholders = ", ".join("?" for _ in columns)
+    conn.exec_driver_sql(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+    return len(rows)
+
+
+_FAST_PATHS = {
+    "postgresql": _copy_postgres,
+    "mysql": _load_data_mysql,
+    "mssql": _bulk_copy_mssql,
+    "sqlite": _executemany_sqlite,
+}
+
+
+def _executemany(conn, table_name: str, columns: list[str], rows: list[tuple]) -> int:
+    placeholders = ", ".join([f":{col}" for col in columns])
+    stmt = text(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})")
+    conn.execute(stmt, [dict(zip(columns, row)) for row in rows])
+    return len(rows)
+
+
+def insert_rows(conn, table_name: str, columns: list[str], rows: list[tuple]) -> int:
+    """Inserts `rows` (tuples positional to `columns`) into `table_name` on an
+    open SQLAlchemy connection, inside whatever transaction the caller holds.
+    Returns the number of rows written."""
+    if not rows:
+        return 0
+    fast_path = _FAST_PATHS.get(conn.dialect.name)
+    if fast_path is not None and not conn.connection.info.get("bulk_load_unavailable"):
+        try:
+            return fast_path(conn, table_name, columns, rows)
+        except BulkLoadUnavailable as e:
+            # Remember it for this pooled DBAPI connection so later batches
+            # don't pay for the failed attempt again.
+            conn.connection.info["bulk_load_unavailable"] = True
+            print(f"Bulk load fast path unavailable ({conn.dialect.name}): {e}. Falling back to executemany.")
+    return _executemany(conn, table_name, columns, rows)
+
+
+# --- UPSERT ---
+#
+# mode='upsert' imports update rows whose primary key already exists and
+# insert the rest, so reloading a refreshed extract doesn't need a full
+# truncate-and-reload. Postgres stages each batch in a temp table via COPY
+# and merges it with one INSERT ... SELECT ... ON CONFLICT; the other
+# engines use their native conflict clause (or MERGE) per batch.
+
+def _upsert_assignments(columns: list[str], key_columns: list[str], template: str) -> str:
+    return ", ".join(template.format(col=col) for col in columns if col not in key_columns)
+
+
+def _upsert_postgres(conn, table_name: str, columns: list[str], rows: list[tuple], key_columns: list[str]) -> int:
+    stage = "_sqlforge_upsert_stage"
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+    conn.exec_driver_sql(f"TRUNCATE {stage}")
+    _copy_postgres(conn, stage, columns, rows)
+
+    cols = ", ".join(columns)
+    keys = ", ".join(key_columns)
+    updates = _upsert_assignments(columns, key_columns, "{col} = EXCLUDED.{col}")
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    # A key repeated inside the batch would make ON CONFLICT touch the same
+    # row twice (an error), so only its last occurrence is merged.
+    conn.exec_driver_sql(
+        f"INSERT INTO {table_name} ({cols}) "
+        f"SELECT DISTINCT ON ({keys}) {cols} FROM {stage} ORDER BY {keys}, ctid DESC "
+        f"ON CONFLICT ({keys}) {action}"
+    )
+    return len(rows)
+
+
+def _upsert_statement(dialect: str, table_name: str, columns: list[str], key_columns: list[str],
+                      placeholders: list[str]) -> str:
+    cols = ", ".join(columns)
+    values = ", ".join(placeholders)
+    insert = f"INSERT INTO {table_name} ({cols}) VALUES ({values})"
+    if dialect in ("postgresql", "sqlite"):
+        updates = _upsert_assignments(columns, key_columns, "{col} = excluded.{col}")
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        return f"{insert} ON CONFLICT ({', '.join(key_columns)}) {action}"
+    if dialect == "mysql":
+        # pymysql folds executemany of this form into multi-row INSERTs
+        updates = _upsert_assignments(columns, key_columns, "{col} = VALUES({col})")
+        if not updates:
+            return f"INSERT IGNORE INTO {table_name} ({cols}) VALUES ({values})"
+        return f"{insert} ON DUPLICATE KEY UPDATE {updates}"
+    if dialect == "oracle":
+        source = ", ".join(f"{p} AS {col}" for p, col in zip(placeholders, columns))
+        on = " AND ".join(f"t.{k} = s.{k}" for k in key_columns)
+        updates = _upsert_assignments(columns, key_columns, "t.{col} = s.{col}")
+        matched = f" WHEN MATCHED THEN UPDATE SET {updates}" if updates else ""
+        return (
+            f"MERGE INTO {table_name} t USING (SELECT {source} FROM dual) s ON ({on}){matched} "
+            f"WHEN NOT MATCHED THEN INSERT ({cols}) VALUES ({', '.join(f's.{c}' for c in columns)})"
+        )
+    raise ValueError(f"Upsert is not supported for {dialect}")
+
+
+# SQL Server caps a statement at 2100 parameters
+_MSSQL_MAX_PARAMS = 2000
+
+
+def _upsert_mssql(conn, table_name: str, columns: list[str], rows: list[tuple], key_columns: list[str]) -> int:
+    cols = ", ".join(columns)
+    on = " AND ".join(f"t.{k} = s.{k}" for k in key_columns)
+    updates = _upsert_assignments(columns, key_columns, "t.{col} = s.{col}")
+    matched = f" WHEN MATCHED THEN UPDATE SET {updates}" if updates else ""
+    # MERGE fails when two source rows match the same target row, so
+    # duplicate keys are collapsed first, the last occurrence winning (as on
+    # the row-by-row dialects).
+    positions = [columns.index(k) for k in key_columns]
+    unique = list({tuple(row[p] for p in positions): row for row in rows}.values())
+    per_statement = max(1, _MSSQL_MAX_PARAMS // len(columns))
+    for start in range(0, len(unique), per_statement):
+        chunk = unique[start:start + per_statement]
+        values = ", ".join(
+            "(" + ", ".join(f":p{i}_{j}" for j in range(len(columns))) + ")" for i in range(len(chunk))
+        )
+        params = {f"p{i}_{j}": value for i, row in enumerate(chunk) for j, value in enumerate(row)}
+        conn.execute(text(
+            f"MERGE INTO {table_name} AS t USING (VALUES {values}) AS s ({cols}) ON {on}{matched} "
+            f"WHEN NOT MATCHED THEN INSERT ({cols}) VALUES ({', '.join(f's.{c}' for c in columns)});"
+        ), params)
+    return len(rows)
+
+
+def upsert_rows(conn, table_name: str, columns: list[str], rows: list[tuple], key_columns: list[str]) -> int:
+    """Like insert_rows, but rows whose `key_columns` (the table's primary
+    key, all of which must be among `columns`) already exist are updated
+    instead of inserted."""
+    if not rows:
+        return 0
+    missing = [k for k in key_columns if k not in columns]
+    if missing:
+        raise ValueError(f"Upsert needs the key column(s) {', '.join(missing)} in the imported data")
+    dialect = conn.dialect.name
+    if dialect == "postgresql" and hasattr(_dbapi_connection(conn).cursor(), "copy_expert"):
+        return _upsert_postgres(conn, table_name, columns, rows, key_columns)
+    if dialect == "mssql":
+        return _upsert_mssql(conn, table_name, columns, rows, key_columns)
+    if dialect == "sqlite":
+        # Positional parameters straight to the driver, as in insert_rows
+        stmt = _upsert_statement(dialect, table_name, columns, key_columns, ["?"] * len(columns))
+        conn.exec_driver_sql(stmt, rows)
+    else:
+        stmt = _upsert_statement(dialect, table_name, columns, key_columns, [f":{col}" for col in columns])
+        conn.execute(text(stmt), [dict(zip(columns, row)) for row in rows])
+    return len(rows)
+
+
+# SQLite session settings for large loads: a 64 MiB page cache and in-memory
+# temp storage. `synchronous` is left alone - it can't be changed inside a
+# transaction, and a load committed in one (or a few) transactions only
+# syncs at those commits anyway.
+_SQLITE_BULK_PRAGMAS = {"cache_size": "-65536", "temp_store": "MEMORY"}
+
+
+@contextmanager
+def tuned_for_bulk_load(conn):
+    """Applies dialect-specific session tuning for the duration of a load and
+    restores the previous settings afterwards. A no-op except on SQLite."""
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+
+    previous = {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in _SQLITE_BULK_PRAGMAS}
+    for name, value in _SQLITE_BULK_PRAGMAS.items():
+        conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            try:
+                conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+            except Exception:
+                pass
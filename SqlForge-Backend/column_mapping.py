@@ -0,0 +1,286 @@
+import datetime
+import numpy as np
+import pandas as pd
+from models import ColumnMappingRule
+
+# --- IMPORT TYPE INFERENCE & COLUMN MAPPING ---
+#
+# CSV (and XML) imports used to hand every value to the database as a raw
+# string and let it coerce them row by row, so a bad value in row 900k only
+# surfaced after 900k inserts. An ImportPlan is built from a sample taken
+# off the head of the stream before anything is written: it types each
+# column (from the reflected target column where there is one, else inferred
+# from the sample), applies the caller's mapping (rename / skip / cast), and
+# is validated against the sample. Each batch is then converted column by
+# column with pandas and handed to the bulk loader as tuples. A value that
+# doesn't fit a cast the caller or the target column asked for fails the
+# import; one that only breaks a guess made from the sample widens that
+# column's type instead (int -> float -> passed through as parsed).
+
+IMPORT_TYPE_SAMPLE_ROWS = 1000
+
+CAST_TYPES = ('int', 'float', 'bool', 'date', 'datetime', 'str')
+
+# Inferred casts widen to these when a later value doesn't fit; past the
+# end of the chain the column is passed through as parsed.
+_WIDER_CAST = {'int': 'float'}
+
+_TRUE_VALUES = {'true', 't', 'yes', 'y', '1'}
+_FALSE_VALUES = {'false', 'f', 'no', 'n', '0'}
+
+_INT_RE = r'[+-]?\d+'
+_LEADING_ZERO_RE = r'[+-]?0\d+'
+_DATE_RE = r'\d{4}-\d{2}-\d{2}'
+_DATETIME_RE = r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?'
+
+
+def infer_column_type(values: pd.Series) -> str | None:
+    """Infers a cast type from sampled values. Only columns that arrive as
+    text are inferred; returns None (pass through) for already-typed or
+    all-NULL columns. Identifier-like numbers with leading zeros (zip codes,
+    account numbers) stay strings."""
+    values = values.dropna()
+    if values.empty or not all(isinstance(v, str) for v in values):
+        return None
+    text = values.astype(str).str.strip()
+
+    if text.str.fullmatch(_INT_RE).all():
+        if text.str.fullmatch(_LEADING_ZERO_RE).any():
+            return 'str'
+        return 'int'
+    if pd.to_numeric(text, errors='coerce').notna().all():
+        return 'float'
+    if text.str.lower().isin(('true', 'false')).all():
+        return 'bool'
+    if text.str.fullmatch(_DATE_RE).all() and pd.to_datetime(text, errors='coerce', format='%Y-%m-%d').notna().all():
+        return 'date'
+    if text.str.fullmatch(_DATETIME_RE).all() and pd.to_datetime(text, errors='coerce', format='ISO8601').notna().all():
+        return 'datetime'
+    return 'str'
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    key = str(value).strip().lower()
+    if key in _TRUE_VALUES:
+        return True
+    if key in _FALSE_VALUES:
+        return False
+    return None
+
+
+def convert_column(values: pd.Series, cast: str | None) -> pd.Series:
+    """Converts a whole column to `cast`. Values that were present but can't
+    be converted come back as NULL; check_conversion reports them."""
+    if cast is None:
+        # numpy scalars (e.g. from pandas-read Excel/XML) aren't adaptable by
+        # the DB drivers
+        return values.map(lambda v: v.item() if isinstance(v, np.generic) else v, na_action='ignore')
+    if cast == 'int':
+        numbers = pd.to_numeric(values, errors='coerce', dtype_backend='numpy_nullable')
+        if str(numbers.dtype) != 'Int64':
+            # "3.0" is an int, "3.5" isn't
+            numbers = numbers.where(numbers.isna() | (numbers % 1 == 0))
+            numbers = numbers.astype('Int64')
+        return numbers.astype(object)
+    if cast == 'float':
+        return pd.to_numeric(values, errors='coerce', dtype_backend='numpy_nullable').astype('Float64').astype(object)
+    if cast == 'bool':
+        return values.map(_to_bool, na_action='ignore').astype(object)
+    if cast in ('date', 'datetime'):
+        stamps = pd.to_datetime(values, errors='coerce', format='ISO8601')
+        converted = stamps.dt.date if cast == 'date' else pd.Series(stamps.dt.to_pydatetime(), index=values.index)
+        return converted.astype(object).where(stamps.notna())
+    if cast == 'str':
+        return values.map(str, na_action='ignore').astype(object)
+    raise ValueError(f"Unsupported cast '{cast}'. Expected one of: {', '.join(CAST_TYPES)}")
+
+
+def check_conversion(name: str, cast: str, original: pd.Series, converted: pd.Series, first_row: int) -> None:
+    failed = original.notna() & converted.isna()
+    if failed.any():
+        pos = int(failed.to_numpy().argmax())
+        raise ValueError(
+            f"Column '{name}': cannot convert {original.iloc[pos]!r} to {cast} (row {first_row + pos})"
+        )
+
+
+def _column(rows: list[dict], name: str) -> pd.Series:
+    # object dtype keeps pass-through values exactly as parsed (an int
+    # column with gaps would otherwise come back as floats)
+    return pd.Series([row.get(name) for row in rows], dtype=object)
+
+
+def cast_for_sql_type(sql_type) -> str | None:
+    """The cast matching a reflected column type, or None when there's no
+    exact one (NUMERIC, JSON, vendor types): those columns are inferred."""
+    try:
+        python_type = sql_type.python_type
+    except NotImplementedError:
+        return None
+    return {int: 'int', float: 'float', bool: 'bool', datetime.date: 'date',
+            datetime.datetime: 'datetime', str: 'str'}.get(python_type)
+
+
+class ImportPlan:
+    """Which source columns go to which target columns, and as what type."""
+
+    def __init__(self, sources: list[str], targets: list[str], casts: list[str | None],
+                 strict: list[bool] | None = None, skipped: list[str] | None = None):
+        self.sources = sources
+        self.columns = targets
+        self.casts = casts
+        # False for casts only inferred from the sample, which may widen
+        self.strict = strict if strict is not None else [True] * len(casts)
+        self._known = set(sources) | set(skipped or ())
+
+    @classmethod
+    def from_sample(cls, sample: list[dict], mapping: dict[str, ColumnMappingRule] | None = None,
+                    target_types: dict | None = None) -> "ImportPlan":
+        """Builds a plan from sampled rows. `target_types` maps target column
+        names to their reflected SQLAlchemy types, which decide the cast of
+        columns that arrive as text: text columns keep their values as
+        strings unless the mapping casts them explicitly, so inference never
+        turns a VARCHAR zip code into a number."""
+        mapping = mapping or {}
+        target_types = {k.lower(): v for k, v in (target_types or {}).items()}
+
+        sources = []
+        for row in sample:
+            for key in row:
+                if key not in sources:
+                    sources.append(key)
+        unknown = [name for name in mapping if name not in sources]
+        if unknown:
+            raise ValueError(f"Column mapping refers to unknown column(s): {', '.join(unknown)}")
+
+        kept, targets, casts, strict, skipped = [], [], [], [], []
+        for name in sources:
+            rule = mapping.get(name) or ColumnMappingRule()
+            if rule.skip:
+                skipped.append(name)
+                continue
+            target = rule.rename or name
+            if rule.cast is not None and rule.cast not in CAST_TYPES:
+                raise ValueError(f"Unsupported cast '{rule.cast}' for column '{name}'. Expected one of: {', '.join(CAST_TYPES)}")
+            cast, is_strict = rule.cast, True
+            if cast is None:
+                cast = infer_column_type(_column(sample, name))
+                target_type = target_types.get(target.lower())
+                target_cast = cast_for_sql_type(target_type) if target_type is not None else None
+                if cast is not None and target_cast is not None:
+                    # Text targets keep the values as parsed
+                    cast = None if target_cast == 'str' else target_cast
+                else:
+                    is_strict = False
+            kept.append(name)
+            targets.append(target)
+            casts.append(cast)
+            strict.append(is_strict)
+
+        if sources and not kept:
+            raise ValueError("Column mapping skips every column")
+
+        plan = cls(kept, targets, casts, strict, skipped)
+        if sample:
+            plan.convert(sample)
+        return plan
+
+    def _check_for_unseen_columns(self, batch: list[dict], first_row: int) -> None:
+        # The bulk loader's column list is fixed by the plan, so a key that
+        # only shows up after the sample would otherwise be dropped silently.
+        unseen = set().union(*batch) - self._known
+        unseen.discard(None)  # csv.DictReader's key for extra fields on a ragged line
+        if unseen:
+            pos = next(i for i, row in enumerate(batch) if not unseen.isdisjoint(row))
+            names = ", ".join(sorted(unseen))
+            raise ValueError(
+                f"Column(s) {names} first appear at row {first_row + pos}, after the rows sampled to plan the "
+                f"import; make sure they appear in the first {IMPORT_TYPE_SAMPLE_ROWS} rows"
+            )
+
+    def convert(self, batch: list[dict], first_row: int = 1) -> list[tuple]:
+        """Converts a batch of parsed rows into tuples positional to
+        self.columns, one vectorized pass per column. Raises ValueError on
+        the first value that doesn't convert to a strict cast, or on a column
+        the plan doesn't know."""
+        self._check_for_unseen_columns(batch, first_row)
+        converted = []
+        for i, name in enumerate(self.sources):
+            original = _column(batch, name)
+            while True:
+                cast = self.casts[i]
+                values = convert_column(original, cast)
+                if cast is None:
+                    break
+                try:
+                    check_conversion(name, cast, original, values, first_row)
+                    break
+                except ValueError:
+                    if self.strict[i]:
+                        raise
+                    # Earlier batches keep the narrower type; the database
+                    # coerces those the same way as before.
+                    self.casts[i] = _WIDER_CAST.get(cast)
+            converted.append(values.where(values.notna(), None).tolist())
+        return list(zip(*converted))
+
+
+def _arrow_cast_types():
+    import pyarrow as pa
+    return {
+        'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_(),
+        'date': pa.date32(), 'datetime': pa.timestamp('us'), 'str': pa.string(),
+    }
+
+
+class ArrowImportPlan:
+    """ImportPlan for typed columnar sources (Parquet / Arrow IPC). Types come
+    from the file's schema, so nothing is inferred; the mapping's casts are
+    applied as Arrow casts on whole columns."""
+
+    def __init__(self, sources: list[str], targets: list[str], casts: list):
+        self.sources = sources
+        self.columns = targets
+        self.casts = casts
+
+    @classmethod
+    def from_schema(cls, schema, mapping: dict[str, ColumnMappingRule] | None = None) -> "ArrowImportPlan":
+        mapping = mapping or {}
+        names = list(schema.names)
+        unknown = [name for name in mapping if name not in names]
+        if unknown:
+            raise ValueError(f"Column mapping refers to unknown column(s): {', '.join(unknown)}")
+
+        arrow_types = _arrow_cast_types()
+        kept, targets, casts = [], [], []
+        for name in names:
+            rule = mapping.get(name) or ColumnMappingRule()
+            if rule.skip:
+                continue
+            if rule.cast is not None and rule.cast not in arrow_types:
+                raise ValueError(f"Unsupported cast '{rule.cast}' for column '{name}'. Expected one of: {', '.join(CAST_TYPES)}")
+            kept.append(name)
+            targets.append(rule.rename or name)
+            casts.append(arrow_types[rule.cast] if rule.cast else None)
+        if names and not kept:
+            raise ValueError("Column mapping skips every column")
+        return cls(kept, targets, casts)
+
+    def convert(self, record_batch) -> list[tuple]:
+        """Turns a record batch into row tuples positional to self.columns,
+        converting column by column (no per-row dicts)."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        converted = []
+        for name, cast in zip(self.sources, self.casts):
+            column = record_batch.column(name)
+            if cast is not None and column.type != cast:
+                try:
+                    column = pc.cast(column, cast)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                    raise ValueError(f"Column '{name}': cannot convert to {cast}: {e}")
+            converted.append(column.to_pylist())
+        return list(zip(*converted))
@@ -1,20 +1,33 @@
 from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.engine import Engine
-from models import ConnectionConfig, TableInfo, ColumnInfo, ForeignKeyInfo, TableSchema, AlterTableRequest, ColumnDefinition, IndexInfo
+from models import ConnectionConfig, TableInfo, ColumnInfo, ForeignKeyInfo, TableSchema, AlterTableRequest, ColumnDefinition, IndexInfo, ColumnMappingRule, MongoExportOptions
 import os
 import re
 import redis
-from pymongo import MongoClient
+from pymongo import InsertOne, MongoClient, ReplaceOne
+from pymongo.errors import BulkWriteError
 import csv
 import json
 import io
+import queue
+import codecs
+import datetime
+import decimal
+import math
+import tempfile
+import itertools
 import shlex
 from sshtunnel import SSHTunnelForwarder
 import time
 import threading
 import hashlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
 from typing import Any, Dict, Set
 from pro import masking
+import bulk_load
+import column_mapping
+import internal_db
 
 # --- IDENTIFIER VALIDATION ---
 #
@@ -270,6 +283,7 @@ def get_engine(config: ConnectionConfig, **kwargs) -> Engine:
             connect_args = {"connect_timeout": 5}
         elif config.type == 'mysql':
             connect_args = {"connect_timeout": 5}
+        connect_args.update(kwargs.pop("connect_args", {}))
         return create_engine(url, connect_args=connect_args, pool_pre_ping=True, **kwargs)
 
     cache_key = _engine_cache_key(config, local_port)
@@ -302,6 +316,27 @@ def get_engine(config: ConnectionConfig, **kwargs) -> Engine:
     return engine
 
 
+@contextmanager
+def bulk_load_engine(config: ConnectionConfig):
+    """Yields an engine suitable for bulk_load.insert_rows. MySQL only allows
+    LOAD DATA LOCAL on connections opened with local_infile, so it gets a
+    dedicated engine (disposed afterwards); everything else uses the shared
+    cached engine.
+
+    local_infile is opt-in per connection (allow_local_infile): on such a
+    connection the server decides which file the client sends, so a
+    malicious or compromised MySQL server could read any file the backend
+    process can. Without it MySQL imports use batched INSERTs."""
+    if config.type != 'mysql' or not config.allow_local_infile:
+        yield get_engine(config)
+        return
+    engine = get_engine(config, connect_args={"local_infile": True})
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
 def dispose_engine(conn_id: str) -> None:
     """Disposes and drops any cached engine(s) associated with a connection
     id. Call this whenever a connection's config is edited or deleted so a
@@ -317,6 +352,7 @@ def dispose_engine(conn_id: str) -> None:
                 engine.dispose()
             except Exception:
                 pass
+    invalidate_metadata_cache(conn_id)
 
 
 def dispose_all_engines() -> None:
@@ -324,12 +360,289 @@ def dispose_all_engines() -> None:
         engines = list(_engine_cache.values())
         _engine_cache.clear()
         _engine_cache_keys_by_conn_id.clear()
+    invalidate_metadata_cache()
     for engine in engines:
         try:
             engine.dispose()
         except Exception:
             pass
 
+# --- REDIS KEYSPACE DISCOVERY ---
+#
+# Redis metadata used to be gathered with one client + DBSIZE per logical
+# database (16+ round trips just to draw the sidebar) and `KEYS *` for the AI
+# schema context, which blocks the whole server while it walks every key.
+# INFO keyspace reports the key count of every non-empty database in a single
+# command, and a bounded SCAN gives a representative sample to summarize into
+# key-prefix patterns without ever touching the full keyspace.
+REDIS_SCAN_SAMPLE_BUDGET = 1000
+REDIS_SCAN_PAGE_SIZE = 250
+REDIS_MAX_KEY_PATTERNS = 20
+
+_ID_LIKE_SEGMENT_RE = re.compile(r'^(\d+|[0-9a-fA-F]{8,}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$')
+
+
+def get_redis_keyspace(r) -> Dict[int, int]:
+    """Maps db index -> key count for every non-empty database, from a single
+    INFO keyspace call (empty databases aren't listed by Redis at all)."""
+    keyspace = {}
+    for name, stats in (r.info("keyspace") or {}).items():
+        if name.startswith("db") and name[2:].isdigit():
+            keys = stats.get("keys", 0) if isinstance(stats, dict) else 0
+            keyspace[int(name[2:])] = int(keys)
+    return keyspace
+
+
+def redis_key_pattern(key: str) -> str:
+    """Collapses a key to the pattern it most likely belongs to, e.g.
+    `user:42:profile` -> `user:*:profile` and `session:abc` -> `session:*`.
+    Keys without a `:` separator are returned unchanged."""
+    segments = key.split(":")
+    if len(segments) == 1:
+        return key
+    collapsed = ["*" if _ID_LIKE_SEGMENT_RE.match(s) else s for s in segments]
+    if collapsed == segments:
+        collapsed[-1] = "*"
+    return ":".join(collapsed)
+
+
+def summarize_redis_keys(r, total_keys: int, sample_budget: int = REDIS_SCAN_SAMPLE_BUDGET) -> list[dict]:
+    """SCANs at most `sample_budget` keys, groups them by redis_key_pattern()
+    and extrapolates each pattern's share of the sample to `total_keys`.
+    Key types are fetched with one non-transactional pipeline for the whole
+    sample rather than a TYPE round trip per key."""
+    sample = []
+    cursor = 0
+    while len(sample) < sample_budget:
+        cursor, keys = r.scan(cursor=cursor, count=REDIS_SCAN_PAGE_SIZE)
+        sample.extend(keys)
+        if not cursor:
+            break
+    sample = sample[:sample_budget]
+    if not sample:
+        return []
+
+    pipe = r.pipeline(transaction=False)
+    for k in sample:
+        pipe.type(k)
+    types = pipe.execute()
+
+    groups: Dict[str, Dict[str, Any]] = {}
+    for key, key_type in zip(sample, types):
+        if isinstance(key, bytes):
+            key = key.decode("utf-8", errors="replace")
+        if isinstance(key_type, bytes):
+            key_type = key_type.decode("utf-8", errors="replace")
+        group = groups.setdefault(redis_key_pattern(key), {"sampled": 0, "types": {}})
+        group["sampled"] += 1
+        group["types"][key_type] = group["types"].get(key_type, 0) + 1
+
+    scale = max(total_keys, len(sample)) / len(sample)
+    summary = []
+    for pattern, group in groups.items():
+        summary.append({
+            "pattern": pattern,
+            "estimated_keys": int(round(group["sampled"] * scale)),
+            "sampled": group["sampled"],
+            "types": sorted(group["types"], key=lambda t: -group["types"][t]),
+        })
+    summary.sort(key=lambda g: -g["sampled"])
+    return summary[:REDIS_MAX_KEY_PATTERNS]
+
+# --- METADATA CACHE ---
+#
+# Schema inference that has to sample data (MongoDB below) is far more
+# expensive than a catalog lookup, and the sidebar, ER diagram and AI
+# context all ask for it. Results are cached per connection for a short TTL
+# and dropped by dispose_engine()/dispose_all_engines(), i.e. whenever the
+# connection is edited or deleted.
+METADATA_CACHE_TTL_SECONDS = 300
+
+_metadata_cache_lock = threading.Lock()
+_metadata_cache: Dict[str, Dict[str, Any]] = {}
+
+
+def _metadata_cache_key(config: ConnectionConfig, kind: str) -> str | None:
+    if not config.id:
+        return None
+    return f"{config.id}|{config.database or ''}|{kind}"
+
+
+def get_cached_metadata(config: ConnectionConfig, kind: str):
+    key = _metadata_cache_key(config, kind)
+    if key is None:
+        return None
+    with _metadata_cache_lock:
+        entry = _metadata_cache.get(key)
+        if entry is None or entry["expires_at"] < time.time():
+            _metadata_cache.pop(key, None)
+            return None
+        return entry["value"]
+
+
+def set_cached_metadata(config: ConnectionConfig, kind: str, value) -> None:
+    key = _metadata_cache_key(config, kind)
+    if key is None:
+        return
+    with _metadata_cache_lock:
+        _metadata_cache[key] = {"value": value, "expires_at": time.time() + METADATA_CACHE_TTL_SECONDS}
+
+
+def invalidate_metadata_cache(conn_id: str = None) -> None:
+    """Drops cached metadata for one connection, or for all of them when
+    conn_id is omitted."""
+    with _metadata_cache_lock:
+        if conn_id is None:
+            _metadata_cache.clear()
+            return
+        for key in [k for k in _metadata_cache if k.startswith(f"{conn_id}|")]:
+            del _metadata_cache[key]
+
+# --- MONGODB SCHEMA INFERENCE ---
+#
+# A single find_one() per collection only ever sees one document's fields,
+# which is wrong for any collection whose documents differ, and walking the
+# collections one after another makes a database with hundreds of them take
+# minutes. Each collection is now sampled with $sample, field paths (nested
+# documents flattened with dots) are merged across the sample with per-type
+# counts and a presence ratio, and collections are sampled concurrently under
+# a shared time budget. Collections that don't finish in time come back with
+# no fields rather than holding up the rest.
+MONGO_SCHEMA_SAMPLE_SIZE = 100
+MONGO_SCHEMA_MAX_WORKERS = 8
+MONGO_SCHEMA_TIME_BUDGET_SECONDS = 10
+MONGO_SCHEMA_MAX_DEPTH = 3
+
+
+def _collect_mongo_fields(doc: dict, prefix: str, depth: int, seen: Dict[str, str]) -> None:
+    for key, value in doc.items():
+        path = f"{prefix}{key}"
+        seen[path] = type(value).__name__
+        if isinstance(value, dict) and depth < MONGO_SCHEMA_MAX_DEPTH:
+            _collect_mongo_fields(value, f"{path}.", depth + 1, seen)
+
+
+def infer_mongo_collection_schema(collection, sample_size: int = MONGO_SCHEMA_SAMPLE_SIZE, max_time_ms: int = None) -> list[dict]:
+    """Returns one entry per field path seen in a $sample of the collection:
+    {"name", "types": {type_name: count}, "presence": ratio of sampled
+    documents containing the field}. `_id` comes first, then fields by
+    descending presence."""
+    options = {"maxTimeMS": max_time_ms} if max_time_ms else {}
+    docs = list(collection.aggregate([{"$sample": {"size": sample_size}}], **options))
+    if not docs:
+        return []
+
+    stats: Dict[str, Dict[str, int]] = {}
+    for doc in docs:
+        seen: Dict[str, str] = {}
+        _collect_mongo_fields(doc, "", 1, seen)
+        for path, type_name in seen.items():
+            types = stats.setdefault(path, {})
+            types[type_name] = types.get(type_name, 0) + 1
+
+    fields = []
+    for path, types in stats.items():
+        fields.append({
+            "name": path,
+            "types": dict(sorted(types.items(), key=lambda t: -t[1])),
+            "presence": round(sum(types.values()) / len(docs), 4),
+        })
+    fields.sort(key=lambda f: (f["name"] != "_id", -f["presence"], f["name"]))
+    return fields
+
+
+def infer_mongo_schemas(db, collection_names: list[str], sample_size: int = MONGO_SCHEMA_SAMPLE_SIZE,
+                        time_budget: float = MONGO_SCHEMA_TIME_BUDGET_SECONDS) -> tuple[Dict[str, list[dict]], bool]:
+    """Samples every collection concurrently. Returns ({collection: fields},
+    complete) where `complete` is False if the time budget ran out before
+    every collection was sampled."""
+    if not collection_names:
+        return {}, True
+
+    max_time_ms = int(time_budget * 1000)
+    pool = ThreadPoolExecutor(max_workers=min(MONGO_SCHEMA_MAX_WORKERS, len(collection_names)))
+    futures = {
+        pool.submit(infer_mongo_collection_schema, db[name], sample_size, max_time_ms): name
+        for name in collection_names
+    }
+    done, not_done = wait(futures, timeout=time_budget)
+    # Don't wait on stragglers - maxTimeMS makes the server give up on them
+    # shortly anyway, and their threads just exit when it does.
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    results = {name: [] for name in collection_names}
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except Exception as e:
+            print(f"Error sampling MongoDB collection {futures[future]}: {e}")
+    return results, not not_done
+
+
+def get_mongo_schema(config: ConnectionConfig, client) -> Dict[str, list[dict]]:
+    """Cached wrapper around infer_mongo_schemas() for config.database.
+    Partial results (time budget exhausted) are returned but not cached, so
+    the next call gets another chance at the slow collections."""
+    cached = get_cached_metadata(config, "mongo_schema")
+    if cached is not None:
+        return cached
+    db = client[config.database]
+    schema, complete = infer_mongo_schemas(db, db.list_collection_names())
+    if complete:
+        set_cached_metadata(config, "mongo_schema", schema)
+    return schema
+
+
+def _mongo_field_type(field: dict) -> str:
+    return "|".join(field["types"].keys())
+
+# --- MULTI-SCHEMA REFLECTION ---
+#
+# Reflection used to cover only the connection's default schema (or a
+# hardcoded 'public'), one table after another. ConnectionConfig.schemas (or
+# a per-request override) can now name several schemas, or "*" for every
+# non-system one. Each schema is reflected on its own pooled connection, at
+# most MAX_REFLECTION_WORKERS at a time - below the default pool size of 5 so
+# interactive queries still get a connection - so total latency tracks the
+# slowest schema rather than the sum of all of them.
+MAX_REFLECTION_WORKERS = 4
+
+_SYSTEM_SCHEMAS = {
+    "information_schema", "pg_catalog", "pg_toast", "mysql", "performance_schema", "sys",
+    "guest", "db_owner", "db_accessadmin", "db_securityadmin", "db_ddladmin", "db_backupoperator",
+    "db_datareader", "db_datawriter", "db_denydatareader", "db_denydatawriter",
+    "system", "outln", "xdb", "dbsnmp", "appqossys", "audsys", "gsmadmin_internal", "ojvmsys",
+}
+
+
+def resolve_schemas(inspector, requested: list[str] = None) -> list[str | None]:
+    """Turns a requested schema list into the schemas to reflect. None/empty
+    means the default schema only (represented as [None], which is what
+    SQLAlchemy's inspector expects); "*" expands to every non-system schema."""
+    if not requested:
+        return [None]
+    if "*" in requested:
+        return [
+            s for s in inspector.get_schema_names()
+            if s.lower() not in _SYSTEM_SCHEMAS and not s.lower().startswith("pg_")
+        ]
+    return list(dict.fromkeys(requested))
+
+
+def reflect_schemas_in_parallel(engine, inspector, schema_names: list[str | None], reflect_one) -> list:
+    """Calls reflect_one(inspector, schema) for every schema and returns the
+    results in schema order. A single schema reuses `inspector`; several are
+    fanned out, each worker with an inspector bound to its own connection."""
+    if len(schema_names) == 1:
+        return [reflect_one(inspector, schema_names[0])]
+
+    def run(schema):
+        with engine.connect() as conn:
+            return reflect_one(inspect(conn), schema)
+
+    with ThreadPoolExecutor(max_workers=min(MAX_REFLECTION_WORKERS, len(schema_names))) as pool:
+        return list(pool.map(run, schema_names))
+
 def get_schema_context(config: ConnectionConfig) -> str:
     if config.type == 'redis':
         try:
@@ -341,10 +654,10 @@ def get_schema_context(config: ConnectionConfig) -> str:
                 port = tunnel.local_bind_port
 
             r = redis.Redis(host=host, port=port, password=config.password or None, db=0, decode_responses=True)
-            keys = r.keys("*")[:20] # Sample 20 keys
-            context = ["Redis Database", f"Total Keys: {len(r.keys('*'))}", "Sample Keys:"]
-            for k in keys:
-                context.append(f"- {k} ({r.type(k)})")
+            total_keys = get_redis_keyspace(r).get(0, 0)
+            context = ["Redis Database", f"Total Keys: {total_keys}", "Key Patterns:"]
+            for group in summarize_redis_keys(r, total_keys):
+                context.append(f"- {group['pattern']} (~{group['estimated_keys']} keys, {'/'.join(group['types'])})")
             return "\n".join(context)
         except:
             return "Redis Database (Metadata unavailable)"
@@ -359,13 +672,13 @@ def get_schema_context(config: ConnectionConfig) -> str:
                 port = tunnel.local_bind_port
 
             client = MongoClient(f"mongodb://{config.username}:{config.password}@{host}:{port}/" if config.username else f"mongodb://{host}:{port}/", serverSelectionTimeoutMS=2000)
-            db = client[config.database]
-            collections = db.list_collection_names()
             context = ["MongoDB Database", f"Database: {config.database}", "Collections:"]
-            for col in collections:
-                sample = db[col].find_one()
-                fields = list(sample.keys()) if sample else []
-                context.append(f"- {col} (Fields: {', '.join(fields)})")
+            for col, fields in get_mongo_schema(config, client).items():
+                described = []
+                for field in fields:
+                    presence = "" if field["presence"] >= 1 else f", {field['presence']:.0%}"
+                    described.append(f"{field['name']} ({_mongo_field_type(field)}{presence})")
+                context.append(f"- {col} (Fields: {', '.join(described)})")
             return "\n".join(context)
         except:
             return "MongoDB Database (Metadata unavailable)"
@@ -417,9 +730,8 @@ def test_connection(config: ConnectionConfig):
     except Exception as e:
         return False, str(e)
 
-def get_tables(config: ConnectionConfig) -> list[TableInfo]:
+def get_tables(config: ConnectionConfig, schemas: list[str] = None) -> list[TableInfo]:
     if config.type == 'redis':
-        # ... (Keep existing Redis implementation)
         try:
             host = config.host
             port = config.port
@@ -429,17 +741,10 @@ def get_tables(config: ConnectionConfig) -> list[TableInfo]:
                 port = tunnel.local_bind_port
 
             r = redis.Redis(host=host, port=port, password=config.password or None, db=0)
-            try:
-                dbs_count = int(r.config_get("databases")["databases"])
-            except:
-                dbs_count = 16 
-            
-            items = []
-            for i in range(dbs_count):
-                r_db = redis.Redis(host=host, port=port, password=config.password or None, db=i)
-                if i == 0 or r_db.dbsize() > 0:
-                    items.append(TableInfo(name=f"DB{i}", type="kv"))
-            return items
+            # DB0 is always listed so an empty server still has something to
+            # open; every other database only shows up once it has keys.
+            db_ids = sorted(set(get_redis_keyspace(r)) | {0})
+            return [TableInfo(name=f"DB{i}", type="kv") for i in db_ids]
         except:
             return [TableInfo(name="DB0", type="kv")]
     
@@ -469,11 +774,17 @@ def get_tables(config: ConnectionConfig) -> list[TableInfo]:
     inspector = inspect(engine)
     items = []
     try:
+        schema_names = resolve_schemas(inspector, schemas if schemas is not None else config.schemas)
+        multi_schema = schema_names != [None]
+
         # Standard SQLAlchemy support
-        for table_name in inspector.get_table_names():
-            items.append(TableInfo(name=table_name, type="table"))
-        for view_name in inspector.get_view_names():
-            items.append(TableInfo(name=view_name, type="view"))
+        def list_schema(schema_inspector, schema):
+            found = [TableInfo(name=t, type="table", db_schema=schema) for t in schema_inspector.get_table_names(schema=schema)]
+            found += [TableInfo(name=v, type="view", db_schema=schema) for v in schema_inspector.get_view_names(schema=schema)]
+            return found
+
+        for found in reflect_schemas_in_parallel(engine, inspector, schema_names, list_schema):
+            items.extend(found)
         
         # Dialect specific (Triggers, Functions, Procedures)
         with engine.connect() as conn:
@@ -491,26 +802,30 @@ def get_tables(config: ConnectionConfig) -> list[TableInfo]:
                 
                 # Postgres Functions & Procedures
                 # prokind: 'f' for function, 'p' for procedure
-                res = conn.execute(text("""
-                    SELECT proname, prokind 
+                schema_filter = "n.nspname = ANY(:schemas)" if multi_schema else "n.nspname = 'public'"
+                res = conn.execute(text(f"""
+                    SELECT proname, prokind, n.nspname
                     FROM pg_proc p 
                     JOIN pg_namespace n ON p.pronamespace = n.oid 
-                    WHERE n.nspname = 'public'
-                """))
+                    WHERE {schema_filter}
+                """), {"schemas": schema_names} if multi_schema else {})
                 for row in res:
                     item_type = "procedure" if row[1] == 'p' else "function"
-                    items.append(TableInfo(name=row[0], type=item_type))
+                    items.append(TableInfo(name=row[0], type=item_type, db_schema=row[2] if multi_schema else None))
 
             elif config.type == 'mysql':
-                # MySQL Procedures
-                res = conn.execute(text("SHOW PROCEDURE STATUS WHERE Db = :db"), {"db": config.database})
-                for row in res:
-                    items.append(TableInfo(name=row[1], type="procedure"))
-                
-                # MySQL Functions
-                res = conn.execute(text("SHOW FUNCTION STATUS WHERE Db = :db"), {"db": config.database})
-                for row in res:
-                    items.append(TableInfo(name=row[1], type="function"))
+                # In MySQL a schema is a database, so each one is listed separately.
+                for db_name in (schema_names if multi_schema else [config.database]):
+                    db_schema = db_name if multi_schema else None
+                    # MySQL Procedures
+                    res = conn.execute(text("SHOW PROCEDURE STATUS WHERE Db = :db"), {"db": db_name})
+                    for row in res:
+                        items.append(TableInfo(name=row[1], type="procedure", db_schema=db_schema))
+
+                    # MySQL Functions
+                    res = conn.execute(text("SHOW FUNCTION STATUS WHERE Db = :db"), {"db": db_name})
+                    for row in res:
+                        items.append(TableInfo(name=row[1], type="function", db_schema=db_schema))
 
             elif config.type == 'mssql':
                 # MSSQL Procedures
@@ -528,50 +843,56 @@ def get_tables(config: ConnectionConfig) -> list[TableInfo]:
     
     return items
 
-def get_schema_details(config: ConnectionConfig) -> list[TableSchema]:
+def get_schema_details(config: ConnectionConfig, schemas: list[str] = None) -> list[TableSchema]:
     if config.type == 'redis':
         return []
 
     if config.type == 'mongodb':
         try:
-            client = MongoClient(f"mongodb://{config.username}:{config.password}@{config.host}:{config.port}/" if config.username else f"mongodb://{config.host}:{config.port}/", serverSelectionTimeoutMS=2000)
-            db = client[config.database]
-            schemas = []
-            for col_name in db.list_collection_names():
-                # Sample a document to infer "columns"
-                sample = db[col_name].find_one()
-                columns = []
-                if sample:
-                    for key, val in sample.items():
-                        columns.append(ColumnInfo(
-                            name=key,
-                            type=type(val).__name__,
-                            nullable=True,
-                            primary_key=(key == "_id")
-                        ))
-                schemas.append(TableSchema(
+            host = config.host
+            port = config.port
+            if config.ssh and config.ssh.enabled:
+                tunnel = tunnel_manager.get_tunnel(config)
+                host = "127.0.0.1"
+                port = tunnel.local_bind_port
+
+            client = MongoClient(f"mongodb://{config.username}:{config.password}@{host}:{port}/" if config.username else f"mongodb://{host}:{port}/", serverSelectionTimeoutMS=2000)
+            results = []
+            for col_name, fields in get_mongo_schema(config, client).items():
+                columns = [
+                    ColumnInfo(
+                        name=field["name"],
+                        type=_mongo_field_type(field),
+                        nullable=field["presence"] < 1 or "NoneType" in field["types"],
+                        primary_key=(field["name"] == "_id"),
+                        presence=field["presence"],
+                    )
+                    for field in fields
+                ]
+                results.append(TableSchema(
                     name=col_name,
                     columns=columns,
                     foreign_keys=[]
                 ))
-            return schemas
+            return results
         except Exception as e:
             print(f"Error inspecting MongoDB schema: {e}")
             return []
 
     engine = get_engine(config)
     inspector = inspect(engine)
-    schemas = []
+    results = []
 
-    try:
-        for table_name in inspector.get_table_names():
+    def reflect_tables(schema_inspector, schema):
+        reflected = []
+        for table_name in schema_inspector.get_table_names(schema=schema):
             # Get Columns
             columns = []
             try:
                 # Get PKs
-                pks = inspector.get_pk_constraint(table_name).get('constrained_columns', [])
+                pks = schema_inspector.get_pk_constraint(table_name, schema=schema).get('constrained_columns', [])
                 
-                for col in inspector.get_columns(table_name):
+                for col in schema_inspector.get_columns(table_name, schema=schema):
                     columns.append(ColumnInfo(
                         name=col['name'],
                         type=str(col['type']),
@@ -585,7 +906,7 @@ def get_schema_details(config: ConnectionConfig) -> list[TableSchema]:
             # Get FKs
             fks = []
             try:
-                for fk in inspector.get_foreign_keys(table_name):
+                for fk in schema_inspector.get_foreign_keys(table_name, schema=schema):
                     # SQLAlchemy returns constrained_columns as a list, usually one for simple FKs
                     # We'll take the first one for simplicity in this visualization or iterate
                     if fk['constrained_columns'] and fk['referred_columns']:
@@ -600,7 +921,7 @@ def get_schema_details(config: ConnectionConfig) -> list[TableSchema]:
             # Get Indexes
             indexes = []
             try:
-                for idx in inspector.get_indexes(table_name):
+                for idx in schema_inspector.get_indexes(table_name, schema=schema):
                     indexes.append(IndexInfo(
                         name=idx['name'],
                         columns=idx['column_names'],
@@ -609,17 +930,23 @@ def get_schema_details(config: ConnectionConfig) -> list[TableSchema]:
             except Exception as e:
                 print(f"Error reading indexes for {table_name}: {e}")
 
-            schemas.append(TableSchema(
+            reflected.append(TableSchema(
                 name=table_name,
+                db_schema=schema,
                 columns=columns,
                 foreign_keys=fks,
                 indexes=indexes
             ))
-            
+        return reflected
+
+    try:
+        schema_names = resolve_schemas(inspector, schemas if schemas is not None else config.schemas)
+        for reflected in reflect_schemas_in_parallel(engine, inspector, schema_names, reflect_tables):
+            results.extend(reflected)
     except Exception as e:
         print(f"Error inspecting schema: {e}")
         
-    return schemas
+    return results
 
 def drop_object(config: ConnectionConfig, object_name: str, object_type: str):
     if read_only_block(config):
@@ -1034,47 +1361,627 @@ def execute_query(config: ConnectionConfig, query_str: str, max_rows: int = None
         except Exception:
             pass
 
-def import_data(config: ConnectionConfig, table_name: str, file_contents: bytes, file_format: str, mode: str = 'append'):
-    if read_only_block(config):
-        return {"success": False, "error": READ_ONLY_ERROR}
+# --- STREAMING IMPORT ---
+#
+# Imports used to take the whole upload as one bytes object, decode it into
+# a second full-size string and only then parse it, so a 2 GB CSV needed
+# several GB of RAM. The readers below consume a binary stream (the upload's
+# spooled temp file, see main.py) incrementally: CSV line by line, JSON one
+# array element / document at a time, and rows are inserted in batches as
+# they're parsed, so memory is bounded by IMPORT_BATCH_SIZE rather than by
+# the file size. Raw bytes are still accepted for in-process callers.
+IMPORT_BATCH_SIZE = 1000
+IMPORT_READ_CHUNK_SIZE = 64 * 1024
+# Longest single JSON value (array element / document) the reader buffers
+# before giving up: past this the file is taken as malformed rather than
+# read into memory to the end.
+IMPORT_JSON_MAX_VALUE_CHARS = 64 * 1024 * 1024
+
+_JSON_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+
+
+def _open_import_source(file_contents):
+    if isinstance(file_contents, (bytes, bytearray)):
+        return io.BytesIO(file_contents)
+    return file_contents
+
+
+class _DecodedLines:
+    """Iterates a binary stream's lines decoded as UTF-8 (a leading BOM
+    dropped), keeping track of the byte offset just past the last line
+    handed out. Binary lines split on b"\n", which never occurs inside a
+    multi-byte UTF-8 sequence, so every line decodes on its own."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.offset = stream.tell() if hasattr(stream, "tell") else 0
+        self.first = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        raw = self.stream.readline()
+        if not raw:
+            raise StopIteration
+        self.offset += len(raw)
+        line = raw.decode("utf-8")
+        if self.first:
+            line = line.lstrip("\ufeff")
+            self.first = False
+        return line
+
+    def seek(self, offset: int):
+        self.stream.seek(offset)
+        self.offset = offset
+
+
+def iter_csv_rows(stream, start_offset: int = 0):
+    """Yields (row dict, byte offset just past the row) for a CSV stream. The
+    header is always read from the top; with a `start_offset` (a previously
+    yielded offset) reading then jumps straight there. The csv module pulls
+    lines lazily, one record at a time, so the offset after each row is
+    exact even for quoted multi-line fields."""
+    lines = _DecodedLines(stream)
+    reader = csv.DictReader(lines)
+    # Reading the header now, before any seek, keeps it from being skipped
+    if reader.fieldnames is None:
+        return
+    if start_offset > lines.offset:
+        lines.seek(start_offset)
+    for row in reader:
+        yield {k: (None if v == '' else v) for k, v in row.items()}, lines.offset
+
+
+def _iter_json_documents(stream):
+    """Streams top-level JSON values: the elements of a top-level array, or
+    consecutive values (JSON lines / concatenated objects). Only the current
+    element plus one read chunk is ever held in memory, and never more than
+    IMPORT_JSON_MAX_VALUE_CHARS of it."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+    in_array = False
+
+    def fill(size=None):
+        nonlocal buf, pos, eof
+        chunk = stream.read(size or IMPORT_READ_CHUNK_SIZE)
+        buf = buf[pos:] + utf8.decode(chunk or b"", final=not chunk)
+        pos = 0
+        eof = not chunk
 
-    def get_rows():
-        if file_format == 'csv' or file_format == 'txt':
-            content_str = file_contents.decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(content_str))
-            for row in csv_reader:
-                yield {k: (None if v == '' else v) for k, v in row.items()}
-        elif file_format == 'json':
-            content_str = file_contents.decode('utf-8')
-            data = json.loads(content_str)
-            if isinstance(data, list):
-                for row in data:
-                    yield row
-            else:
-                yield data
-        elif file_format == 'xml':
-            import pandas as pd
-            df = pd.read_xml(io.BytesIO(file_contents))
-            for _, row in df.iterrows():
-                yield row.to_dict()
-        elif file_format in ['excel', 'xlsx', 'xls']:
-            import pandas as pd
-            df = pd.read_excel(io.BytesIO(file_contents))
-            for _, row in df.iterrows():
-                yield {k: (None if pd.isna(v) else v) for k, v in row.to_dict().items()}
-        elif file_format == 'dbf':
-            from dbfread import DBF
-            # dbfread needs a file path or a file-like object that supports seek
-            # We'll write it to a temp file first if needed, but io.BytesIO might work
-            with io.BytesIO(file_contents) as f:
-                dbf = DBF('', filedata=f)
-                for record in dbf:
-                    yield dict(record)
-        elif file_format == 'access':
-             # MS Access requires pyodbc and a driver (e.g. MDBTools or ACE)
-             # This is highly environment dependent.
-             raise Exception("Direct MS Access import requires server-side ODBC drivers.")
+    while True:
+        pos = _JSON_WHITESPACE_RE.match(buf, pos).end()
+        if pos >= len(buf):
+            if eof:
+                return
+            fill()
+            continue
+        if not started:
+            started = True
+            if buf[pos] == "[":
+                in_array = True
+                pos += 1
+                continue
+        if in_array:
+            if buf[pos] == ",":
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            pending = len(buf) - pos
+            if pending > IMPORT_JSON_MAX_VALUE_CHARS:
+                raise ValueError(
+                    f"Invalid JSON: a value runs past {IMPORT_JSON_MAX_VALUE_CHARS} characters without completing"
+                )
+            # Read as much again as is pending, so a value spanning many
+            # chunks is re-decoded a logarithmic number of times, not once
+            # per chunk.
+            fill(max(IMPORT_READ_CHUNK_SIZE, pending))
+            continue
+        # A bare number/literal that runs to the end of the buffer may be cut
+        # off mid-token ("12" of "123"), so read on before trusting it.
+        if end == len(buf) and not eof and not isinstance(value, (dict, list, str)):
+            fill()
+            continue
+        pos = end
+        yield value
+
+
+# --- COLUMNAR IMPORT ---
+#
+# Parquet and Arrow IPC files are already typed and columnar, so SQL imports
+# don't go through per-row dicts or type inference for them: row groups /
+# record batches are read one at a time (sliced to IMPORT_BATCH_SIZE), the
+# column mapping is applied with Arrow casts, and each batch is turned
+# straight into row tuples for the bulk loader (see
+# column_mapping.ArrowImportPlan).
+COLUMNAR_IMPORT_FORMATS = ('parquet', 'arrow', 'feather', 'ipc')
+
+
+def open_columnar_import(file_contents, file_format: str):
+    """Returns (arrow schema, iterator of record batches) for a Parquet or
+    Arrow IPC (file or stream format) upload."""
+    import pyarrow as pa
+
+    stream = _open_import_source(file_contents)
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(stream)
+        return parquet_file.schema_arrow, parquet_file.iter_batches(batch_size=IMPORT_BATCH_SIZE)
+
+    start = stream.tell()
+    try:
+        reader = pa.ipc.open_file(stream)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        # Not the random-access file format - try the streaming format
+        stream.seek(start)
+        reader = pa.ipc.open_stream(stream)
+        batches = iter(reader)
+
+    def sliced():
+        for record_batch in batches:
+            for offset in range(0, record_batch.num_rows, IMPORT_BATCH_SIZE):
+                yield record_batch.slice(offset, IMPORT_BATCH_SIZE)
+
+    return reader.schema, sliced()
+
+
+def _iter_excel_rows(stream):
+    """Streams the first worksheet of an .xlsx workbook row by row with
+    openpyxl's read-only mode, which parses the sheet XML lazily instead of
+    building the whole workbook (and a DataFrame) in memory. The first row
+    is the header; fully empty rows (often just leftover formatting) are
+    skipped."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) if name is not None else f"column_{i + 1}" for i, name in enumerate(header)]
+        width = len(columns)
+        for values in rows:
+            if all(v is None for v in values):
+                continue
+            values = tuple(values[:width]) + (None,) * (width - len(values))
+            yield {col: (None if v == '' else v) for col, v in zip(columns, values)}
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(file_contents, file_format: str):
+    """Yields one dict per record of an uploaded file, reading it
+    incrementally wherever the format allows."""
+    stream = _open_import_source(file_contents)
+    if file_format in ('csv', 'txt'):
+        for row, _ in iter_csv_rows(stream):
+            yield row
+    elif file_format in ('json', 'jsonl', 'ndjson'):
+        for doc in _iter_json_documents(stream):
+            yield doc
+    elif file_format == 'xml':
+        import pandas as pd
+        df = pd.read_xml(stream)
+        for _, row in df.iterrows():
+            yield row.to_dict()
+    elif file_format in ['excel', 'xlsx']:
+        yield from _iter_excel_rows(stream)
+    elif file_format == 'xls':
+        # Legacy binary workbooks aren't readable by openpyxl
+        import pandas as pd
+        df = pd.read_excel(stream)
+        for _, row in df.iterrows():
+            yield {k: (None if pd.isna(v) else v) for k, v in row.to_dict().items()}
+    elif file_format in COLUMNAR_IMPORT_FORMATS:
+        _, record_batches = open_columnar_import(file_contents, file_format)
+        for record_batch in record_batches:
+            yield from record_batch.to_pylist()
+    elif file_format == 'dbf':
+        import shutil
+        from dbfread import DBF
+        # dbfread only reads from a path, so the upload is spooled to a temp
+        # file in chunks; records are then read lazily from disk.
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "import.dbf")
+            with open(path, "wb") as f:
+                shutil.copyfileobj(stream, f, IMPORT_READ_CHUNK_SIZE)
+            for record in DBF(path):
+                yield dict(record)
+    elif file_format == 'access':
+        # MS Access requires pyodbc and a driver (e.g. MDBTools or ACE)
+        # This is highly environment dependent.
+        raise Exception("Direct MS Access import requires server-side ODBC drivers.")
+    else:
+        raise Exception(f"Unsupported import format: {file_format}")
+
+
+# --- PARALLEL IMPORT ---
+#
+# A single-connection import keeps one backend busy while the server has
+# cores (and the pool has connections) to spare. With parallelism > 1 the
+# parsed stream is cut into IMPORT_BATCH_SIZE chunks that are loaded
+# concurrently, each in its own transaction on its own pooled connection.
+# At most 2 * parallelism chunks are in flight, so memory stays bounded just
+# like the sequential path. The trade-off is atomicity: a failed chunk leaves
+# the chunks already committed in place, which the consistency report makes
+# explicit. SQLite has a single writer, so it always loads sequentially.
+MAX_IMPORT_PARALLELISM = 8
+
+
+def _secondary_indexes(inspector, table_name: str) -> list:
+    """Non-unique indexes of a table - the candidates for dropping during a
+    load and rebuilding afterwards. Unique indexes stay, since they enforce
+    constraints the load relies on."""
+    return [idx for idx in inspector.get_indexes(table_name) if not idx.get('unique') and idx.get('name')]
+
+
+def _index_ddl(conn, dialect: str, table_name: str, idx: dict) -> str | None:
+    """The statement that recreates `idx` exactly as it is, or None when it
+    can't be rebuilt faithfully (such an index is left in place). Postgres
+    and SQLite hand back the original DDL, keeping partial (WHERE), method
+    (USING), DESC, INCLUDE and expression definitions. Elsewhere only
+    indexes with nothing but plain ascending columns are rebuilt from
+    reflection."""
+    if dialect == 'postgresql':
+        return conn.execute(text("SELECT pg_get_indexdef(to_regclass(quote_ident(:name))::oid)"),
+                            {"name": idx['name']}).scalar()
+    if dialect == 'sqlite':
+        return conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = :name"),
+                            {"name": idx['name']}).scalar()
+    columns = idx.get('column_names') or []
+    if not columns or not all(columns) or idx.get('expressions') or idx.get('column_sorting') \
+            or idx.get('include_columns') or idx.get('dialect_options'):
+        return None
+    return f"CREATE INDEX {idx['name']} ON {table_name} ({', '.join(columns)})"
+
+
+def _drop_index_sql(dialect: str, table_name: str, index_name: str) -> str:
+    if dialect in ('mysql', 'mssql'):
+        return f"DROP INDEX {index_name} ON {table_name}"
+    return f"DROP INDEX {index_name}"
+
+
+@contextmanager
+def deferred_secondary_indexes(engine, table_name: str):
+    """Drops a table's secondary indexes for the duration of a load and
+    rebuilds them afterwards (also when the load fails) from their captured
+    DDL, so each index is built once in bulk instead of being maintained row
+    by row. Yields the names of the deferred indexes."""
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        indexes = [(idx['name'], _index_ddl(conn, dialect, table_name, idx))
+                   for idx in _secondary_indexes(inspect(conn), table_name)]
+    dropped = []
+    try:
+        for name, ddl in indexes:
+            if not ddl:
+                continue
+            with engine.begin() as conn:
+                conn.execute(text(_drop_index_sql(dialect, table_name, name)))
+            dropped.append((name, ddl))
+        yield [name for name, _ in dropped]
+    finally:
+        for _, ddl in dropped:
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
+
+
+def _count_rows(engine, table_name: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar()
+
+
+def _upsert_keys(engine, table_name: str, columns: list) -> list:
+    """Primary key columns an upsert import matches rows on."""
+    keys = inspect(engine).get_pk_constraint(table_name).get('constrained_columns') or []
+    if not keys:
+        raise Exception(f"Upsert mode needs a primary key, and {table_name} has none")
+    missing = [k for k in keys if k not in columns]
+    if missing:
+        raise Exception(f"Upsert mode needs the primary key column(s) {', '.join(missing)} in the imported data")
+    return keys
+
+
+def _write_rows(conn, table_name: str, columns: list, rows: list, upsert_keys: list = None) -> int:
+    if upsert_keys:
+        return bulk_load.upsert_rows(conn, table_name, columns, rows, upsert_keys)
+    return bulk_load.insert_rows(conn, table_name, columns, rows)
+
+
+def _load_chunk(engine, table_name: str, columns: list, rows: list, upsert_keys: list = None) -> int:
+    with engine.begin() as conn:
+        return _write_rows(conn, table_name, columns, rows, upsert_keys)
+
+
+def _import_chunks_in_parallel(engine, table_name: str, columns: list, chunks, parallelism: int, progress=None,
+                               upsert_keys: list = None) -> dict:
+    """Loads `chunks` (lists of row tuples positional to `columns`) over
+    `parallelism` pooled connections. Chunks are parsed and converted on the
+    calling thread, so a bad value stops the import before its chunk is
+    submitted. Stops submitting new chunks at the first failure and waits
+    for the ones in flight. Returns per-chunk bookkeeping for the
+    consistency report."""
+    stats = {"chunks": 0, "chunks_failed": 0, "rows_parsed": 0, "rows_loaded": 0, "errors": []}
+    in_flight = {}
+
+    def collect(done):
+        for future in done:
+            size = in_flight.pop(future)
+            try:
+                stats["rows_loaded"] += future.result()
+            except Exception as e:
+                stats["chunks_failed"] += 1
+                stats["errors"].append(str(e))
+                print(f"Import chunk of {size} rows failed: {e}")
+        if progress and done:
+            try:
+                progress(stats["rows_loaded"])
+            except Exception as e:
+                stats["errors"].append(str(e))
+
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        while not stats["errors"]:
+            try:
+                rows = next(chunks, None)
+            except Exception as e:
+                stats["errors"].append(str(e))
+                break
+            if rows is None:
+                break
+            stats["chunks"] += 1
+            stats["rows_parsed"] += len(rows)
+            in_flight[executor.submit(_load_chunk, engine, table_name, columns, rows, upsert_keys)] = len(rows)
+            if len(in_flight) >= parallelism * 2:
+                done, _ = wait(in_flight, return_when="FIRST_COMPLETED")
+                collect(done)
+        done, _ = wait(in_flight)
+        collect(done)
+    return stats
+
+
+def _converted_chunks(plan, row_gen, batch_size: int):
+    """Cuts parsed rows into batches and converts each one with `plan`."""
+    first_row = 1
+    while True:
+        batch = list(itertools.islice(row_gen, batch_size))
+        if not batch:
+            return
+        yield plan.convert(batch, first_row=first_row)
+        first_row += len(batch)
+
+
+# --- RESUMABLE IMPORT ---
+#
+# A plain import runs in one transaction, so a failure at row 40M of 50M
+# rolls everything back. A resumable import commits every `commit_every`
+# rows and records a checkpoint after each commit (internal_db
+# import_checkpoints): the file's SHA-256, the byte offset just past the
+# last committed row, and the rows committed. Retrying with the same file
+# continues from there. CSV resumes by seeking straight to the byte offset;
+# the other formats have no row-aligned offsets, so they are re-parsed and
+# the committed rows skipped without being inserted again.
+#
+# The checkpoint lives in the metadata store, not in the target database,
+# so a crash between a chunk's commit and its checkpoint write replays that
+# one chunk on retry (at-least-once).
+IMPORT_CHECKPOINT_ROWS = 100000
+
+
+def check_resumable_import_options(resumable: bool, parallelism: int = None, defer_indexes: bool = False) -> None:
+    """A resumable SQL import loads sequentially with its indexes in place
+    (each checkpoint covers a committed prefix of the file), so asking for
+    parallelism or deferred indexes as well is refused rather than ignored."""
+    if resumable and (int(parallelism or 1) > 1 or defer_indexes):
+        raise ValueError("Resumable imports load sequentially; they can't be combined with parallelism or defer_indexes")
+
+
+def _hash_import_source(stream) -> str:
+    start = stream.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(IMPORT_READ_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    stream.seek(start)
+    return digest.hexdigest()
+
+
+def _target_column_types(engine, table_name: str) -> dict:
+    try:
+        return {col['name']: col['type'] for col in inspect(engine).get_columns(table_name)}
+    except Exception:
+        return {}
+
+
+def _skip_record_batch_rows(record_batches, skip: int):
+    for record_batch in record_batches:
+        if skip >= record_batch.num_rows:
+            skip -= record_batch.num_rows
+            continue
+        yield record_batch.slice(skip) if skip else record_batch
+        skip = 0
+
+
+def _import_resumable(engine, config: ConnectionConfig, table_name: str, file_contents, file_format: str,
+                      mode: str, mapping: dict, commit_every: int, progress=None) -> dict:
+    stream = _open_import_source(file_contents)
+    file_hash = _hash_import_source(stream)
+    conn_id = config.id or config.name
+    checkpoint = internal_db.get_import_checkpoint(conn_id, table_name, file_hash)
+    resumed_from = checkpoint["rows_committed"] if checkpoint else 0
+    byte_offset = checkpoint["byte_offset"] if checkpoint else None
+    batch_size = min(IMPORT_BATCH_SIZE, commit_every)
+
+    # Chunks of (converted rows, byte offset past the chunk's last row)
+    if file_format in COLUMNAR_IMPORT_FORMATS:
+        schema, record_batches = open_columnar_import(stream, file_format)
+        plan = column_mapping.ArrowImportPlan.from_schema(schema, mapping)
+        chunks = ((plan.convert(b), None) for b in _skip_record_batch_rows(record_batches, resumed_from))
+    else:
+        if file_format in ('csv', 'txt'):
+            pairs = iter_csv_rows(stream, byte_offset or 0)
+        else:
+            pairs = ((row, None) for row in itertools.islice(iter_import_rows(stream, file_format), resumed_from, None))
+        sample = list(itertools.islice(pairs, column_mapping.IMPORT_TYPE_SAMPLE_ROWS))
+        for row, _ in sample:
+            if not isinstance(row, dict):
+                raise Exception("Invalid JSON format. Expected list of objects.")
+        plan = column_mapping.ImportPlan.from_sample([row for row, _ in sample], mapping, _target_column_types(engine, table_name))
+        pairs = itertools.chain(sample, pairs)
+
+        def converted():
+            first_row = resumed_from + 1
+            while True:
+                batch = list(itertools.islice(pairs, batch_size))
+                if not batch:
+                    return
+                yield plan.convert([row for row, _ in batch], first_row=first_row), batch[-1][1]
+                first_row += len(batch)
 
+        chunks = converted()
+    for col in plan.columns:
+        validate_identifier(col, "column name")
+    upsert_keys = _upsert_keys(engine, table_name, plan.columns) if mode == 'upsert' else None
+
+    if mode == 'truncate' and not checkpoint:
+        with engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {table_name}"))
+
+    committed = resumed_from
+    try:
+        while True:
+            in_chunk = 0
+            last_offset = None
+            with engine.begin() as conn, bulk_load.tuned_for_bulk_load(conn):
+                for rows, last_offset in chunks:
+                    in_chunk += _write_rows(conn, table_name, plan.columns, rows, upsert_keys)
+                    if progress:
+                        progress(committed + in_chunk)
+                    if in_chunk >= commit_every:
+                        break
+            if not in_chunk:
+                break
+            committed += in_chunk
+            internal_db.save_import_checkpoint(conn_id, table_name, file_hash, file_format, last_offset, committed)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Database error: {str(e)} ({committed} rows are committed; retry the same file to resume)",
+            "checkpoint": {"rows_committed": committed, "file_hash": file_hash},
+        }
+
+    internal_db.delete_import_checkpoint(conn_id, table_name, file_hash)
+    message = f"Successfully imported {committed - resumed_from} rows into {table_name}"
+    if resumed_from:
+        message += f" (resumed after {resumed_from} previously committed rows)"
+    return {"success": True, "message": message, "resumed_from": resumed_from}
+
+
+# --- NOSQL IMPORT ---
+#
+# Mongo imports used to make one ordered insert_many at a time and Redis
+# imports one SET per row, so the Python loop, not the server, was the
+# bottleneck. Batches (batch_size documents/keys) are now written by
+# `parallelism` workers (NOSQL_IMPORT_WORKERS by default) as unordered
+# insert_many calls / one MSET per batch (plus HSETs in the same pipeline
+# for hash rows). Batches may land in any order, so with duplicate keys in
+# a file the surviving value isn't guaranteed to be the last one.
+NOSQL_IMPORT_BATCH_SIZE = 1000
+NOSQL_IMPORT_WORKERS = 4
+
+
+def _batched(items, size: int):
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _redis_field_value(value):
+    # redis-py only encodes str/bytes/int/float (and rejects bool)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if isinstance(value, (str, bytes, int, float)) and not isinstance(value, bool):
+        return value
+    return str(value)
+
+
+def _write_batches_concurrently(batches, write, workers: int, progress=None):
+    """Runs write(batch) -> items written for every batch on `workers`
+    threads, with at most 2 * workers batches in flight (parsing stays
+    ahead of the writers without reading the whole file). Stops pulling
+    batches at the first exception. Returns (items written, errors)."""
+    written = 0
+    errors = []
+    in_flight = set()
+
+    def collect(done):
+        nonlocal written
+        for future in done:
+            in_flight.discard(future)
+            try:
+                written += future.result()
+            except Exception as e:
+                errors.append(str(e))
+        if progress and done and not errors:
+            try:
+                progress(written)
+            except Exception as e:
+                errors.append(str(e))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while not errors:
+            try:
+                batch = next(batches, None)
+            except Exception as e:
+                errors.append(str(e))
+                break
+            if batch is None:
+                break
+            in_flight.add(executor.submit(write, batch))
+            if len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when="FIRST_COMPLETED")
+                collect(done)
+        done, _ = wait(in_flight)
+        collect(done)
+    return written, errors
+
+
+def import_data(config: ConnectionConfig, table_name: str, file_contents, file_format: str, mode: str = 'append',
+                parallelism: int = None, defer_indexes: bool = False, mapping: dict = None,
+                resumable: bool = False, commit_every: int = IMPORT_CHECKPOINT_ROWS, progress=None,
+                batch_size: int = None, redis_hashes: bool = False):
+    """Imports an uploaded file into a table/collection/keyspace.
+    `file_contents` is either raw bytes or a binary file-like object, which
+    is read incrementally (see iter_import_rows). For SQL targets, values
+    are typed and renamed/skipped/cast per `mapping` ({source column:
+    ColumnMappingRule}, see column_mapping.py), `parallelism` > 1 loads
+    chunks concurrently (see PARALLEL IMPORT), `defer_indexes` rebuilds
+    secondary indexes once after the load, and `resumable` commits every
+    `commit_every` rows with a checkpoint a retry resumes from (see
+    RESUMABLE IMPORT). mode='upsert' updates rows whose primary key already
+    exists instead of failing on them (see UPSERT in bulk_load.py); for
+    Mongo it replaces documents by _id, and Redis keys are always
+    overwritten. For Mongo/Redis targets, `batch_size` documents or
+    keys are written per call by `parallelism` concurrent workers, and
+    `redis_hashes` stores multi-field rows as Redis hashes instead of JSON
+    strings (see NOSQL IMPORT). `progress(rows)`, if given, is called
+    between batches; raising from it (e.g. jobs.JobCancelled) stops the
+    import."""
+    if read_only_block(config):
+        return {"success": False, "error": READ_ONLY_ERROR}
 
     if config.type == 'redis':
         try:
@@ -1088,17 +1995,38 @@ def import_data(config: ConnectionConfig, table_name: str, file_contents: bytes,
             r = redis.Redis(host=host, port=port, password=config.password or None, db=0)
             if mode == 'truncate':
                 r.flushdb()
-            
-            pipe = r.pipeline()
-            total = 0
-            for row in get_rows():
-                key = row.get('key') or row.get('id') or f"imported:{total}"
-                pipe.set(key, json.dumps(row) if len(row) > 2 or 'value' not in row else row.get('value', ''))
-                total += 1
-                if total % 1000 == 0:
-                    pipe.execute()
-                    pipe = r.pipeline()
-            pipe.execute()
+
+            def redis_entries():
+                for index, row in enumerate(iter_import_rows(file_contents, file_format)):
+                    key = row.get('key') or row.get('id') or f"imported:{index}"
+                    simple = len(row) <= 2 and 'value' in row
+                    if redis_hashes and not simple:
+                        fields = {k: _redis_field_value(v) for k, v in row.items() if v is not None and k != 'key'}
+                        yield key, fields, True
+                    else:
+                        value = row.get('value') if simple else json.dumps(row, default=str)
+                        yield key, ('' if value is None else value), False
+
+            def write(batch):
+                strings = {key: value for key, value, is_hash in batch if not is_hash}
+                hashes = [(key, fields) for key, fields, is_hash in batch if is_hash and fields]
+                if not hashes:
+                    r.mset(strings)
+                    return len(batch)
+                pipe = r.pipeline(transaction=False)
+                if strings:
+                    pipe.mset(strings)
+                for key, fields in hashes:
+                    pipe.hset(key, mapping=fields)
+                pipe.execute()
+                return len(batch)
+
+            total, errors = _write_batches_concurrently(
+                _batched(redis_entries(), batch_size or NOSQL_IMPORT_BATCH_SIZE), write,
+                parallelism or NOSQL_IMPORT_WORKERS, progress
+            )
+            if errors:
+                return {"success": False, "error": f"{errors[0]} ({total} keys were written before the failure)"}
             return {"success": True, "message": f"Imported {total} keys into Redis"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -1113,80 +2041,810 @@ def import_data(config: ConnectionConfig, table_name: str, file_contents: bytes,
                 port = tunnel.local_bind_port
 
             client = MongoClient(f"mongodb://{config.username}:{config.password}@{host}:{port}/" if config.username else f"mongodb://{host}:{port}/")
-            db = client[config.database]
+            collection = client[config.database][table_name]
             if mode == 'truncate':
-                db[table_name].delete_many({})
-            
-            batch = []
-            total = 0
-            for row in get_rows():
-                batch.append(row)
-                if len(batch) >= 1000:
-                    db[table_name].insert_many(batch)
-                    total += len(batch)
-                    batch = []
-            if batch:
-                db[table_name].insert_many(batch)
-                total += len(batch)
+                collection.delete_many({})
+
+            write_errors = []
+            errors_lock = threading.Lock()
+
+            def write(batch):
+                # Unordered: the server may apply the batch in any order and
+                # keeps going past a bad document (e.g. a duplicate _id),
+                # reporting it instead of aborting the rest of the batch.
+                try:
+                    if mode == 'upsert':
+                        collection.bulk_write([
+                            ReplaceOne({'_id': doc['_id']}, doc, upsert=True) if '_id' in doc else InsertOne(doc)
+                            for doc in batch
+                        ], ordered=False)
+                    else:
+                        collection.insert_many(batch, ordered=False)
+                    return len(batch)
+                except BulkWriteError as e:
+                    with errors_lock:
+                        write_errors.extend(e.details.get('writeErrors', []))
+                    return (e.details.get('nInserted', 0) + e.details.get('nUpserted', 0)
+                            + e.details.get('nMatched', 0))
+
+            total, errors = _write_batches_concurrently(
+                _batched(iter_import_rows(file_contents, file_format), batch_size or NOSQL_IMPORT_BATCH_SIZE), write,
+                parallelism or NOSQL_IMPORT_WORKERS, progress
+            )
+            if errors:
+                return {"success": False, "error": f"{errors[0]} ({total} documents were inserted before the failure)"}
+            if write_errors:
+                return {
+                    "success": False,
+                    "error": f"Imported {total} documents into {table_name}; {len(write_errors)} were rejected "
+                             f"(first: {write_errors[0].get('errmsg')})",
+                }
             return {"success": True, "message": f"Imported {total} documents into {table_name}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    engine = get_engine(config)
-    batch_size = 1000
+    batch_size = IMPORT_BATCH_SIZE
     
     try:
+        check_resumable_import_options(resumable, parallelism, defer_indexes)
+
         # 1. Prepare Data Generator
         def get_rows():
-            if file_format == 'csv':
-                content_str = file_contents.decode('utf-8')
-                csv_reader = csv.DictReader(io.StringIO(content_str))
-                for row in csv_reader:
-                    yield {k: (None if v == '' else v) for k, v in row.items()}
-            elif file_format == 'json':
-                content_str = file_contents.decode('utf-8')
-                data = json.loads(content_str)
-                if isinstance(data, list):
-                    for row in data:
-                        yield row
-                else:
+            for row in iter_import_rows(file_contents, file_format):
+                if not isinstance(row, dict):
                     raise Exception("Invalid JSON format. Expected list of objects.")
+                yield row
 
-        # 2. Execute in Batches
-        row_gen = get_rows()
         total_imported = 0
         
         table_name = validate_identifier(table_name, "table name")
+        mapping = {
+            name: rule if isinstance(rule, ColumnMappingRule) else ColumnMappingRule(**rule)
+            for name, rule in (mapping or {}).items()
+        }
+
+        parallelism = max(1, min(int(parallelism or 1), MAX_IMPORT_PARALLELISM))
+        if config.type == 'sqlite':
+            parallelism = 1
+
+        with bulk_load_engine(config) as engine:
+            if resumable:
+                return _import_resumable(engine, config, table_name, file_contents, file_format, mode, mapping,
+                                         max(1, int(commit_every or IMPORT_CHECKPOINT_ROWS)), progress)
+
+            # 2. Plan types/mapping before anything is written (a bad mapping
+            # or value fails here, not after a truncate). Columnar files carry
+            # their own schema; everything else is sampled from the head of
+            # the stream.
+            if file_format in COLUMNAR_IMPORT_FORMATS:
+                schema, record_batches = open_columnar_import(file_contents, file_format)
+                plan = column_mapping.ArrowImportPlan.from_schema(schema, mapping)
+                chunks = (plan.convert(record_batch) for record_batch in record_batches)
+            else:
+                row_gen = get_rows()
+                sample = list(itertools.islice(row_gen, column_mapping.IMPORT_TYPE_SAMPLE_ROWS))
+                plan = column_mapping.ImportPlan.from_sample(sample, mapping, _target_column_types(engine, table_name))
+                chunks = _converted_chunks(plan, itertools.chain(sample, row_gen), batch_size)
+            for col in plan.columns:
+                validate_identifier(col, "column name")
+            upsert_keys = _upsert_keys(engine, table_name, plan.columns) if mode == 'upsert' else None
+
+            # 3. Execute in Batches
+            if parallelism == 1 and not defer_indexes:
+                with engine.begin() as conn, bulk_load.tuned_for_bulk_load(conn):
+                    if mode == 'truncate':
+                        conn.execute(text(f"DELETE FROM {table_name}"))
+
+                    for rows in chunks:
+                        total_imported += _write_rows(conn, table_name, plan.columns, rows, upsert_keys)
+                        if progress:
+                            progress(total_imported)
+
+                return {"success": True, "message": f"Successfully imported {total_imported} rows into {table_name}"}
 
-        with engine.begin() as conn:
             if mode == 'truncate':
-                conn.execute(text(f"DELETE FROM {table_name}"))
+                with engine.begin() as conn:
+                    conn.execute(text(f"DELETE FROM {table_name}"))
+            rows_before = _count_rows(engine, table_name)
+
+            with deferred_secondary_indexes(engine, table_name) if defer_indexes else nullcontext([]) as deferred:
+                stats = _import_chunks_in_parallel(engine, table_name, plan.columns, chunks, parallelism, progress, upsert_keys)
+
+            rows_after = _count_rows(engine, table_name)
+
+        report = {
+            "parallelism": parallelism,
+            "chunks": stats["chunks"],
+            "chunks_failed": stats["chunks_failed"],
+            "rows_parsed": stats["rows_parsed"],
+            "rows_loaded": stats["rows_loaded"],
+            "rows_before": rows_before,
+            "rows_after": rows_after,
+            "deferred_indexes": deferred,
+            # Other writers touching the table during the load would also
+            # show up here, so this is a check, not a guarantee.
+            # An upsert only adds the rows whose key was new.
+            "consistent": not stats["errors"] and (
+                rows_after - rows_before <= stats["rows_loaded"] if upsert_keys
+                else rows_after - rows_before == stats["rows_loaded"]
+            ),
+        }
+        if stats["errors"]:
+            return {
+                "success": False,
+                "error": f"Database error: {stats['errors'][0]} ({stats['rows_loaded']} rows were committed before the failure)",
+                "report": report,
+            }
+        return {"success": True, "message": f"Successfully imported {stats['rows_loaded']} rows into {table_name}", "report": report}
+            
+    except Exception as e:
+        return {"success": False, "error": f"Database error: {str(e)}"}
 
-            while True:
-                batch = []
-                try:
-                    for _ in range(batch_size):
-                        batch.append(next(row_gen))
-                except StopIteration:
-                    pass
+EXPORT_PROGRESS_EVERY = 1000
 
-                if not batch:
-                    break
 
-                columns = list(batch[0].keys())
-                for col in columns:
-                    validate_identifier(col, "column name")
-                placeholders = ", ".join([f":{col}" for col in columns])
-                stmt = text(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})")
-                conn.execute(stmt, batch)
-                total_imported += len(batch)
-                
-        return {"success": True, "message": f"Successfully imported {total_imported} rows into {table_name}"}
-            
+def _with_progress(items, progress, every: int = EXPORT_PROGRESS_EVERY):
+    """Passes `items` through, calling progress(count) every `every` items
+    and once at the end. Raising from progress stops the export."""
+    if progress is None:
+        return items
+
+    def counted():
+        count = 0
+        for item in items:
+            yield item
+            count += 1
+            if count % every == 0:
+                progress(count)
+        progress(count)
+    return counted()
+
+
+def estimate_row_count(config: ConnectionConfig, table_name: str) -> int | None:
+    """Cheap row-count estimate for progress/ETA reporting: catalog
+    statistics where the engine keeps them (no full scan), COUNT(*)
+    otherwise. None if it can't be determined."""
+    try:
+        if config.type == 'redis':
+            host, port = config.host, config.port
+            if config.ssh and config.ssh.enabled:
+                tunnel = tunnel_manager.get_tunnel(config)
+                host, port = "127.0.0.1", tunnel.local_bind_port
+            return redis.Redis(host=host, port=port, password=config.password or None, db=0).dbsize()
+        if config.type == 'mongodb':
+            host, port = config.host, config.port
+            if config.ssh and config.ssh.enabled:
+                tunnel = tunnel_manager.get_tunnel(config)
+                host, port = "127.0.0.1", tunnel.local_bind_port
+            client = MongoClient(f"mongodb://{config.username}:{config.password}@{host}:{port}/" if config.username else f"mongodb://{host}:{port}/")
+            return client[config.database][table_name].estimated_document_count()
+
+        table_name = validate_identifier(table_name, "table name")
+        with get_engine(config).connect() as conn:
+            if config.type == 'postgresql':
+                estimate = conn.execute(text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table_name}).scalar()
+                if estimate is not None and estimate >= 0:
+                    return int(estimate)
+            elif config.type == 'mysql':
+                estimate = conn.execute(text("SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t"), {"t": table_name}).scalar()
+                if estimate is not None:
+                    return int(estimate)
+            elif config.type == 'mssql':
+                estimate = conn.execute(text("SELECT SUM(row_count) FROM sys.dm_db_partition_stats WHERE object_id = OBJECT_ID(:t) AND index_id IN (0, 1)"), {"t": table_name}).scalar()
+                if estimate is not None:
+                    return int(estimate)
+            return conn.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar()
     except Exception as e:
-        return {"success": False, "error": f"Database error: {str(e)}"}
+        print(f"Row count estimate failed for {table_name}: {e}")
+        return None
+
+
+def _json_export_value(value):
+    """json.dumps fallback: dates as ISO strings (as before), Decimal/UUID/
+    bytes and anything else as str."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+# --- REDIS EXPORT ---
+#
+# Keys from SCAN are handled REDIS_EXPORT_BATCH_SIZE at a time with two
+# pipelined round trips per batch, one for every key's TYPE and one for the
+# values: a single MGET for the strings plus HGETALL/LRANGE/SMEMBERS/
+# ZRANGE/XRANGE for the rest. Export speed is then bounded by bandwidth
+# rather than by one round trip per key, and non-string keys are exported
+# as their contents instead of null.
+REDIS_EXPORT_BATCH_SIZE = 1000
+_REDIS_EXPORT_FETCH = {
+    'hash': lambda pipe, key: pipe.hgetall(key),
+    'list': lambda pipe, key: pipe.lrange(key, 0, -1),
+    'set': lambda pipe, key: pipe.smembers(key),
+    'zset': lambda pipe, key: pipe.zrange(key, 0, -1, withscores=True),
+    'stream': lambda pipe, key: pipe.xrange(key),
+}
+
+
+def _redis_export_batches(r, keys):
+    """Yields non-empty lists of (key, type, value) for the scanned `keys`.
+    Keys that expire between SCAN and TYPE are skipped."""
+    for batch in _batched(keys, REDIS_EXPORT_BATCH_SIZE):
+        pipe = r.pipeline(transaction=False)
+        for key in batch:
+            pipe.type(key)
+        types = pipe.execute()
+
+        strings = [key for key, key_type in zip(batch, types) if key_type == 'string']
+        others = [(key, key_type) for key, key_type in zip(batch, types) if key_type in _REDIS_EXPORT_FETCH]
+        pipe = r.pipeline(transaction=False)
+        if strings:
+            pipe.mget(strings)
+        for key, key_type in others:
+            _REDIS_EXPORT_FETCH[key_type](pipe, key)
+        replies = pipe.execute() if strings or others else []
+
+        values = {}
+        if strings:
+            values.update(zip(strings, replies[0]))
+            replies = replies[1:]
+        for (key, key_type), reply in zip(others, replies):
+            if key_type == 'set':
+                reply = sorted(reply)
+            elif key_type == 'zset':
+                reply = [[member, score] for member, score in reply]
+            elif key_type == 'stream':
+                reply = [{"id": entry_id, "fields": fields} for entry_id, fields in reply]
+            values[key] = reply
+
+        # Module types (e.g. ReJSON) are listed with a null value
+        rows = [(key, key_type, values.get(key)) for key, key_type in zip(batch, types) if key_type != 'none']
+        if rows:  # a batch whose keys all expired would break the JSON separators
+            yield rows
+
+
+def _redis_export_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+# --- MONGO EXPORT ---
+#
+# Documents are read with the caller's filter/projection/sort in
+# batch_size batches and serialized a batch at a time with orjson when it's
+# installed (ObjectId, datetime, Decimal128 etc. handled by
+# _mongo_json_default). The CSV header is the union of the fields of a
+# $sample of MONGO_EXPORT_SAMPLE_SIZE matching documents, in first-seen
+# order with _id first, instead of just the first document's fields.
+MONGO_EXPORT_BATCH_SIZE = 1000
+MONGO_EXPORT_SAMPLE_SIZE = 1000
+
+
+def _mongo_json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).hex()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)  # ObjectId, Decimal128, Decimal, UUID, Regex...
+
+
+def _mongo_json_encoder():
+    """Returns dumps(doc) -> str, using orjson when available."""
+    try:
+        import orjson
+    except ImportError:
+        return lambda doc: json.dumps(doc, default=_mongo_json_default)
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    return lambda doc: orjson.dumps(doc, default=_mongo_json_default, option=options).decode("utf-8")
+
 
-def stream_export_data(config: ConnectionConfig, table_name: str, file_format: str, mask_pii: bool = False, where_clause: str = None):
+def _mongo_csv_value(value, dumps):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return dumps(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value if isinstance(value, (str, int, float)) else str(value)
+
+
+def _mongo_sample_fields(collection, mongo_query: dict, projection: dict = None) -> list:
+    """Top-level field names across a $sample of the matching documents."""
+    pipeline = []
+    if mongo_query:
+        pipeline.append({"$match": mongo_query})
+    pipeline.append({"$sample": {"size": MONGO_EXPORT_SAMPLE_SIZE}})
+    if projection:
+        pipeline.append({"$project": projection})
+    fields = {}
+    for doc in collection.aggregate(pipeline):
+        for key in doc:
+            fields.setdefault(key, None)
+    columns = list(fields)
+    if "_id" in fields:
+        columns.remove("_id")
+        columns.insert(0, "_id")
+    return columns
+
+
+def _mask_documents(batch: list, maskers: dict):
+    """Masks the top-level PII fields of a batch of documents in place, one
+    field (column) at a time. `maskers` caches the rule per field name."""
+    present = {}
+    for doc in batch:
+        for key in doc:
+            if key not in maskers:
+                maskers[key] = masking.column_masker(key) if masking.is_pii_column(key) else None
+            if maskers[key]:
+                present.setdefault(key, []).append(doc)
+    for key, docs in present.items():
+        for doc, value in zip(docs, maskers[key]([doc[key] for doc in docs])):
+            doc[key] = value
+
+
+# --- BINARY EXPORT FORMATS ---
+#
+# Formats that can't be produced a line at a time (xlsx is a zip archive)
+# are written from the cursor in EXPORT_BATCH_SIZE-row batches into a
+# spooled temp file, which stays in memory up to EXPORT_SPOOL_MAX_MEMORY and
+# moves to disk beyond that, and then streamed out in EXPORT_CHUNK_SIZE
+# chunks. Memory no longer grows with the table; only the first byte waits
+# for the file to be complete.
+EXPORT_BATCH_SIZE = 5000
+EXPORT_CHUNK_SIZE = 1024 * 1024
+EXPORT_SPOOL_MAX_MEMORY = 16 * 1024 * 1024
+
+
+def _stream_spooled(write):
+    """Calls write(file) on a spooled temp file, then yields its contents
+    in chunks."""
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_MEMORY) as spool:
+        write(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _excel_cell(value):
+    """Coerces a database value into something openpyxl can store."""
+    if value is None or isinstance(value, (bool, int, float, decimal.Decimal, datetime.date, datetime.time)):
+        if isinstance(value, (datetime.datetime, datetime.time)) and value.tzinfo is not None:
+            # Excel has no time zones; keep the wall-clock time in UTC
+            if isinstance(value, datetime.datetime):
+                return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            return value.replace(tzinfo=None)
+        return value
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value).hex()
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    return ILLEGAL_CHARACTERS_RE.sub("", str(value))
+
+
+def _excel_export(columns: list, batches):
+    """Streams an xlsx file built with a write-only workbook (rows go
+    straight to the worksheet's own temp file, not to an in-memory tree)."""
+    from openpyxl import Workbook
+
+    def write(spool):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        ws.append(columns)
+        for batch in batches:
+            for row in batch:
+                ws.append([_excel_cell(v) for v in row])
+        wb.save(spool)
+    return _stream_spooled(write)
+
+
+# XML: written a batch of <row> elements at a time, in the layout
+# DataFrame.to_xml produced (<data><row><col>value</col>...</row></data>),
+# without holding the table in memory.
+_XML_ILLEGAL_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xml_tag(name: str) -> str:
+    tag = re.sub(r"[^\w.-]", "_", str(name))
+    return tag if re.match(r"[A-Za-z_]", tag) else f"_{tag}"
+
+
+def _xml_text(value) -> str:
+    from xml.sax.saxutils import escape
+
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value).hex()
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return escape(_XML_ILLEGAL_CHARS_RE.sub("", str(value)))
+
+
+def _xml_export(columns: list, batches):
+    tags = [_xml_tag(c) for c in columns]
+    yield "<?xml version='1.0' encoding='utf-8'?>\n<data>\n"
+    for batch in batches:
+        parts = []
+        for row in batch:
+            parts.append("  <row>\n")
+            for tag, value in zip(tags, row):
+                if value is None:
+                    parts.append(f"    <{tag}/>\n")
+                else:
+                    parts.append(f"    <{tag}>{_xml_text(value)}</{tag}>\n")
+            parts.append("  </row>\n")
+        yield "".join(parts)
+    yield "</data>"
+
+
+# Parquet: each cursor batch of `row_group_size` rows becomes one row
+# group, typed from the reflected column types where they map cleanly (the
+# values of the first batch otherwise), so ints stay ints, timestamps stay
+# timestamps and DECIMAL(p,s) stays decimal.
+PARQUET_EXPORT_ROW_GROUP_SIZE = 100000
+PARQUET_EXPORT_CODECS = ('snappy', 'zstd', 'gzip', 'brotli', 'lz4', 'none')
+
+
+def _arrow_type_for(sql_type):
+    import pyarrow as pa
+    from sqlalchemy import types as sqltypes
+
+    if isinstance(sql_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, sqltypes.Integer):
+        return pa.int64()
+    if isinstance(sql_type, sqltypes.Float):
+        return pa.float64()
+    if isinstance(sql_type, sqltypes.Numeric):
+        if sql_type.precision and sql_type.scale is not None and sql_type.precision <= 38:
+            return pa.decimal128(sql_type.precision, sql_type.scale)
+        return None
+    if isinstance(sql_type, sqltypes.DateTime):
+        return pa.timestamp('us', tz='UTC' if sql_type.timezone else None)
+    if isinstance(sql_type, sqltypes.Date):
+        return pa.date32()
+    if isinstance(sql_type, sqltypes.Time):
+        return pa.time64('us')
+    if isinstance(sql_type, sqltypes._Binary):
+        return pa.binary()
+    if isinstance(sql_type, (sqltypes.String, sqltypes.JSON)):
+        return pa.string()
+    return None
+
+
+def _arrow_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _arrow_record_batch(columns: list, rows: list, schema):
+    import pyarrow as pa
+
+    arrays = []
+    for index, (name, values) in enumerate(zip(columns, zip(*rows))):
+        field = schema.field(index)
+        if pa.types.is_string(field.type):
+            values = [_arrow_text(v) for v in values]
+        try:
+            arrays.append(pa.array(values, type=field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # e.g. SQLite hands back timestamps as text; let Arrow parse them
+            try:
+                arrays.append(pa.array([_arrow_text(v) for v in values], pa.string()).cast(field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+                raise ValueError(f"Column '{name}': cannot store its values as {field.type} ({e})")
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _arrow_schema(columns: list, sql_types: dict, first_batch: list, text_columns=()):
+    import pyarrow as pa
+
+    fields = []
+    for name, values in zip(columns, zip(*first_batch) if first_batch else [()] * len(columns)):
+        arrow_type = pa.string() if name in text_columns else _arrow_type_for(sql_types.get(name))
+        if arrow_type is None:
+            try:
+                arrow_type = pa.array(list(values)).type
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                arrow_type = pa.string()
+            if pa.types.is_null(arrow_type) or pa.types.is_nested(arrow_type):
+                arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _parquet_export(columns: list, batches, sql_types: dict = None, codec: str = 'snappy', text_columns=()):
+    """Streams a Parquet file with one row group per batch."""
+    import pyarrow.parquet as pq
+
+    def write(spool):
+        batch_iter = iter(batches)
+        first = next(batch_iter, [])
+        schema = _arrow_schema(columns, sql_types or {}, first, text_columns)
+        writer = pq.ParquetWriter(spool, schema, compression=codec)
+        try:
+            for batch in itertools.chain([first], batch_iter):
+                if batch:
+                    writer.write_batch(_arrow_record_batch(columns, batch, schema))
+        finally:
+            writer.close()
+    return _stream_spooled(write)
+
+
+# DBF (dBase III with UTF-8 text): field specs come from the reflected
+# column types (the first batch's values for query exports), records are
+# appended batch by batch to a temp file - the dbf library only writes to a
+# path - and the finished file is streamed out in chunks. Timestamps, which
+# dBase III has no type for, are stored as ISO text; text longer than its
+# field is cut at the field width. A number that doesn't fit its N field
+# (too many digits, a fraction in an integer field) turns that column into
+# text, rewriting the records written so far, rather than failing the export.
+DBF_TEXT_WIDTH = 254
+DBF_NUMBER_WIDTH = 20
+DBF_NUMBER_TEXT_WIDTH = 40  # width of a numeric column moved to text
+# The dbf library formats N values through float, so exact ints/decimals
+# with more significant digits than this would come out altered.
+_DBF_EXACT_DIGITS = 15
+
+
+class _DbfNumberDoesNotFit(ValueError):
+    pass
+
+
+def _dbf_field_names(columns: list) -> list:
+    """Unique field names of at most 10 characters, starting with a letter."""
+    names = []
+    for col in columns:
+        name = re.sub(r"\W", "_", str(col)).upper()
+        if not re.match(r"[A-Z]", name):
+            name = "F" + name
+        name = name[:10]
+        suffix = 1
+        while name in names:
+            tag = f"_{suffix}"
+            name = name[:10 - len(tag)] + tag
+            suffix += 1
+        names.append(name)
+    return names
+
+
+def _dbf_field_spec(sql_type, values) -> tuple:
+    """(type letter, width, decimals) for a column."""
+    from sqlalchemy import types as sqltypes
+
+    if sql_type is not None:
+        if isinstance(sql_type, sqltypes.Boolean):
+            return ('L', 1, 0)
+        if isinstance(sql_type, sqltypes.SmallInteger):
+            return ('N', 6, 0)
+        if isinstance(sql_type, sqltypes.Integer):
+            return ('N', DBF_NUMBER_WIDTH, 0)
+        if isinstance(sql_type, sqltypes.Numeric) and not isinstance(sql_type, sqltypes.Float) \
+                and sql_type.precision and sql_type.scale is not None:
+            # Clamped to the field width, decimals give way to integer digits
+            width = min(sql_type.precision + 2, DBF_NUMBER_WIDTH)
+            integer_digits = sql_type.precision - sql_type.scale
+            return ('N', width, max(0, min(sql_type.scale, width - 2 - integer_digits)))
+        if isinstance(sql_type, sqltypes.Numeric):
+            return ('N', DBF_NUMBER_WIDTH, 6)
+        if isinstance(sql_type, sqltypes.DateTime):
+            return ('C', 32, 0)
+        if isinstance(sql_type, sqltypes.Date):
+            return ('D', 8, 0)
+        if isinstance(sql_type, sqltypes.String) and getattr(sql_type, 'length', None):
+            return ('C', max(1, min(sql_type.length, DBF_TEXT_WIDTH)), 0)
+        return ('C', DBF_TEXT_WIDTH, 0)
+
+    sample = next((v for v in values if v is not None), None)
+    if isinstance(sample, bool):
+        return ('L', 1, 0)
+    if isinstance(sample, (int, float, decimal.Decimal)):
+        numbers = [v for v in values if v is not None]
+        if all(isinstance(v, int) for v in numbers):
+            return ('N', DBF_NUMBER_WIDTH, 0)
+        # As many decimals (up to 6) as the first batch's largest value leaves
+        digits = max((len(str(abs(int(v)))) for v in numbers if _is_finite_number(v)), default=1)
+        return ('N', DBF_NUMBER_WIDTH, max(0, min(6, DBF_NUMBER_WIDTH - 2 - digits)))
+    if isinstance(sample, datetime.datetime):
+        return ('C', 32, 0)
+    if isinstance(sample, datetime.date):
+        return ('D', 8, 0)
+    return ('C', DBF_TEXT_WIDTH, 0)
+
+
+def _is_finite_number(value) -> bool:
+    try:
+        return math.isfinite(value)
+    except (TypeError, ValueError):
+        return False
+
+
+def _dbf_value(value, spec: tuple, name: str):
+    """`value` as stored in a field of `spec`. Raises _DbfNumberDoesNotFit
+    for a number the N field can't hold exactly enough."""
+    kind, width, decimals = spec
+    if value is None:
+        return None
+    try:
+        if kind == 'L':
+            return bool(value)
+        if kind == 'N':
+            number = value if isinstance(value, (int, decimal.Decimal)) and not isinstance(value, bool) \
+                else float(value)
+            if not _is_finite_number(number):
+                raise _DbfNumberDoesNotFit(name)
+            if decimals:
+                number = round(number, decimals)
+            elif number % 1:
+                raise _DbfNumberDoesNotFit(name)  # never truncate a fraction silently
+            integer_width = width - (decimals + 1 if decimals else 0)
+            if len(str(abs(int(number)))) + (number < 0) > integer_width:
+                raise _DbfNumberDoesNotFit(name)
+            if isinstance(number, int) and abs(number) >= 10 ** _DBF_EXACT_DIGITS \
+                    or isinstance(number, decimal.Decimal) \
+                    and len(number.normalize().as_tuple().digits) > _DBF_EXACT_DIGITS:
+                raise _DbfNumberDoesNotFit(name)
+            return number if decimals else int(number)
+        if kind == 'D':
+            if isinstance(value, datetime.datetime):
+                return value.date()
+            if isinstance(value, datetime.date):
+                return value
+            return datetime.date.fromisoformat(str(value)[:10])
+    except _DbfNumberDoesNotFit:
+        raise
+    except (TypeError, ValueError):
+        raise ValueError(f"Column '{name}': cannot store {value!r} in a DBF {kind} field")
+    # Text: cut at the field width in bytes, never inside a character
+    return _arrow_text(value.isoformat() if hasattr(value, 'isoformat') else value) \
+        .encode("utf-8")[:width].decode("utf-8", "ignore")
+
+
+def _dbf_open(path: str, names: list, specs: list):
+    import dbf
+
+    field_specs = "; ".join(
+        f"{name} {kind}" if kind in ('L', 'D') else
+        f"{name} {kind}({width},{decimals})" if kind == 'N' else f"{name} {kind}({width})"
+        for name, (kind, width, decimals) in zip(names, specs)
+    )
+    table = dbf.Table(path, field_specs, codepage='utf8')
+    table.open(dbf.READ_WRITE)
+    return table
+
+
+def _dbf_retype_as_text(table, path: str, names: list, specs: list, index: int, columns: list):
+    """Closes `table`, moves column `index` to a text field and rewrites the
+    records written so far into a new table at `path`, which is returned."""
+    import dbf
+
+    table.close()
+    specs[index] = ('C', DBF_NUMBER_TEXT_WIDTH, 0)
+    old_path = path + ".old"
+    os.replace(path, old_path)
+    retyped = _dbf_open(path, names, specs)
+    old = dbf.Table(old_path)
+    old.open(dbf.READ_ONLY)
+    try:
+        for record in old:
+            values = [v.rstrip() if isinstance(v, str) else v for v in record]
+            values[index] = _dbf_value(values[index], specs[index], columns[index])
+            retyped.append(tuple(values))
+    finally:
+        old.close()
+        os.remove(old_path)
+    return retyped
+
+
+def _dbf_export(columns: list, batches, sql_types: dict = None, text_columns=()):
+    def generate():
+        with tempfile.TemporaryDirectory(prefix="sqlforge-dbf-") as tmp_dir:
+            path = os.path.join(tmp_dir, "export.dbf")
+            batch_iter = iter(batches)
+            first = next(batch_iter, [])
+            sample_columns = list(zip(*first)) if first else [()] * len(columns)
+            specs = [
+                ('C', DBF_TEXT_WIDTH, 0) if col in text_columns
+                else _dbf_field_spec((sql_types or {}).get(col), values)
+                for col, values in zip(columns, sample_columns)
+            ]
+            names = _dbf_field_names(columns)
+            table = _dbf_open(path, names, specs)
+            try:
+                for batch in itertools.chain([first], batch_iter):
+                    for row in batch:
+                        values = []
+                        for i, value in enumerate(row):
+                            try:
+                                values.append(_dbf_value(value, specs[i], columns[i]))
+                            except _DbfNumberDoesNotFit:
+                                table = _dbf_retype_as_text(table, path, names, specs, i, columns)
+                                values.append(_dbf_value(value, specs[i], columns[i]))
+                        table.append(tuple(values))
+            finally:
+                table.close()
+
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(EXPORT_CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+    return generate()
+
+
+# --- COMPRESSED EXPORT ---
+#
+# Over VPNs and SSH tunnels the transfer, not the query, is the slow part of
+# a big text export. With compression='gzip' or 'zstd' the export chunks are
+# run through a streaming compressor as they are produced, so the output
+# never sits in memory and the client gets a .gz/.zst file.
+EXPORT_COMPRESSIONS = {
+    # name: (file suffix, media type)
+    'gzip': ('gz', 'application/gzip'),
+    'zstd': ('zst', 'application/zstd'),
+}
+GZIP_EXPORT_LEVEL = 6
+ZSTD_EXPORT_LEVEL = 3
+
+
+def _export_compressor(compression: str):
+    if compression == 'gzip':
+        import zlib
+        # wbits=31: gzip header and trailer rather than a bare zlib stream
+        return zlib.compressobj(GZIP_EXPORT_LEVEL, zlib.DEFLATED, 31)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the zstandard package")
+        return zstandard.ZstdCompressor(level=ZSTD_EXPORT_LEVEL).compressobj()
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def compress_export_stream(chunks, compression: str):
+    """Compresses a stream of export chunks (str or bytes) on the fly."""
+    compressor = _export_compressor(compression)
+
+    def generate():
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    return generate()
+
+
+def stream_export_data(config: ConnectionConfig, table_name: str, file_format: str, mask_pii: bool = False, where_clause: str = None,
+                       progress=None, parquet_codec: str = 'snappy', row_group_size: int = None, compression: str = None,
+                       mongo_options: MongoExportOptions = None):
+    """Returns a generator of export output chunks. `progress(rows)`, if
+    given, is called every EXPORT_PROGRESS_EVERY rows; raising from it (e.g.
+    jobs.JobCancelled) stops the export. Parquet output uses `parquet_codec`
+    and `row_group_size` rows per row group. `compression` ('gzip'/'zstd')
+    compresses the output as it streams (see COMPRESSED EXPORT).
+    `mongo_options` sets filter/projection/sort/batch size for MongoDB
+    collections (see MONGO EXPORT)."""
+    if file_format == 'parquet' and parquet_codec not in PARQUET_EXPORT_CODECS:
+        raise ValueError(f"Unsupported Parquet codec: {parquet_codec}")
+    if compression:
+        _export_compressor(compression)  # unknown/unavailable codecs fail before streaming starts
+        return compress_export_stream(
+            stream_export_data(config, table_name, file_format, mask_pii, where_clause, progress,
+                               parquet_codec, row_group_size, mongo_options=mongo_options),
+            compression,
+        )
     if config.type == 'redis':
         def generate_redis():
             host = config.host
@@ -1197,30 +2855,49 @@ def stream_export_data(config: ConnectionConfig, table_name: str, file_format: s
                 port = tunnel.local_bind_port
             
             r = redis.Redis(host=host, port=port, password=config.password or None, db=0, decode_responses=True)
-            keys = r.scan_iter("*")
+            keys = _with_progress(r.scan_iter("*", count=REDIS_EXPORT_BATCH_SIZE), progress)
+            # Keys and values are always masked, whatever their names
+            policy = masking.compile_masking_policy(['key', 'value'], mask_all=True) if mask_pii else None
+
             if file_format == 'csv':
-                yield "key,value\n"
-                for k in keys:
-                    v = r.get(k)
-                    if mask_pii:
-                        k = masking.mask_value(k, 'key')
-                        v = masking.mask_value(v, 'value')
-                    yield f'"{k}","{str(v).replace(chr(34), chr(34)+chr(34))}"\n'
+                buf = io.StringIO()
+                writer = csv.writer(buf, lineterminator="\n", quoting=csv.QUOTE_NONNUMERIC)
+                yield "key,type,value\n"
+                for batch in _redis_export_batches(r, keys):
+                    rows = [(k, _redis_export_text(v)) for k, _, v in batch]
+                    if policy:
+                        rows = policy.apply(rows)
+                    writer.writerows((k, t, v) for (k, v), (_, t, _) in zip(rows, batch))
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
             else: # JSON
                 yield "[\n"
                 first = True
-                for k in keys:
-                    if not first: yield ",\n"
-                    v = r.get(k)
-                    if mask_pii:
-                        k = masking.mask_value(k, 'key')
-                        v = masking.mask_value(v, 'value')
-                    yield json.dumps({"key": k, "value": v})
+                for batch in _redis_export_batches(r, keys):
+                    if policy:
+                        masked = policy.apply([(k, _redis_export_text(v)) for k, _, v in batch])
+                        batch = [(k, t, v) for (k, v), (_, t, _) in zip(masked, batch)]
+                    if not first:
+                        yield ",\n"
+                    yield ",\n".join(json.dumps({"key": k, "type": t, "value": v}) for k, t, v in batch)
                     first = False
                 yield "\n]"
         return generate_redis()
 
     if config.type == 'mongodb':
+        options = mongo_options or MongoExportOptions()
+        mongo_query = options.filter
+        if mongo_query is None:
+            mongo_query = {}
+            if where_clause:
+                # Basic heuristic: if it looks like JSON, parse it
+                try:
+                    mongo_query = json.loads(where_clause)
+                except:
+                    pass
+        batch_size = max(1, options.batch_size or MONGO_EXPORT_BATCH_SIZE)
+
         def generate_mongo():
             host = config.host
             port = config.port
@@ -1230,51 +2907,43 @@ def stream_export_data(config: ConnectionConfig, table_name: str, file_format: s
                 port = tunnel.local_bind_port
 
             client = MongoClient(f"mongodb://{config.username}:{config.password}@{host}:{port}/" if config.username else f"mongodb://{host}:{port}/")
-            db = client[config.database]
-            
-            # Simple query for mongo
-            mongo_query = {}
-            if where_clause:
-                # Basic heuristic: if it looks like JSON, parse it
-                try:
-                    mongo_query = json.loads(where_clause)
-                except:
-                    pass
+            collection = client[config.database][table_name]
 
-            cursor = db[table_name].find(mongo_query)
-            
-            # ...
-            
-            # Pre-detect PII if masking is on
-            mask_map = {}
-            first_doc = db[table_name].find_one()
-            if mask_pii and first_doc:
-                mask_map = masking.get_masking_map(list(first_doc.keys()))
+            columns = None
+            if file_format == 'csv':
+                columns = _mongo_sample_fields(collection, mongo_query, options.projection)
+                if not columns:
+                    return
+
+            find_kwargs = {"batch_size": batch_size}
+            if options.sort:
+                find_kwargs["sort"] = list(options.sort.items())
+            cursor = _with_progress(collection.find(mongo_query, options.projection, **find_kwargs), progress)
+            maskers = {}
+            dumps = _mongo_json_encoder()
 
             if file_format == 'csv':
-                if not first_doc: return
-                columns = list(first_doc.keys())
-                yield ",".join(columns) + "\n"
-                for doc in cursor:
-                    doc['_id'] = str(doc['_id'])
-                    row_values = []
-                    for c in columns:
-                        val = doc.get(c, "")
-                        if mask_pii and mask_map.get(c):
-                            val = masking.mask_value(val, c)
-                        row_values.append(f'"{str(val).replace(chr(34), chr(34)+chr(34))}"')
-                    yield ",".join(row_values) + "\n"
+                policy = masking.compile_masking_policy(columns) if mask_pii else None
+                buf = io.StringIO()
+                writer = csv.writer(buf, lineterminator="\n")
+                writer.writerow(columns)
+                for batch in _batched(cursor, batch_size):
+                    rows = [[_mongo_csv_value(doc.get(c), dumps) for c in columns] for doc in batch]
+                    writer.writerows(policy.apply(rows) if policy else rows)
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+                if buf.tell():
+                    yield buf.getvalue()
             else: # JSON
                 yield "[\n"
                 first = True
-                for doc in cursor:
-                    if not first: yield ",\n"
-                    doc['_id'] = str(doc['_id'])
+                for batch in _batched(cursor, batch_size):
                     if mask_pii:
-                        for c, should_mask in mask_map.items():
-                            if should_mask and c in doc:
-                                doc[c] = masking.mask_value(doc[c], c)
-                    yield json.dumps(doc)
+                        _mask_documents(batch, maskers)
+                    if not first:
+                        yield ",\n"
+                    yield ",\n".join(dumps(doc) for doc in batch)
                     first = False
                 yield "\n]"
         return generate_mongo()
@@ -1283,100 +2952,443 @@ def stream_export_data(config: ConnectionConfig, table_name: str, file_format: s
     # name fails fast with a clean error instead of surfacing mid-stream
     # after the StreamingResponse has already started sending bytes.
     table_name = validate_identifier(table_name, "table name")
+    query = f"SELECT * FROM {table_name}"
+    if where_clause:
+        # NOTE: where_clause is an arbitrary caller-supplied SQL
+        # predicate fragment by design (row filtering for export),
+        # not an identifier, so validate_identifier doesn't apply
+        # here. It is a separate, pre-existing risk surface;
+        # narrowing it would require parsing it as a boolean
+        # expression and is out of scope for identifier validation.
+        query += f" WHERE {where_clause}"
+    return _stream_sql_export(config, query, file_format, mask_pii, progress, parquet_codec, row_group_size,
+                              table_name=table_name)
+
+
+def stream_query_export(config: ConnectionConfig, sql: str, file_format: str, mask_pii: bool = False, progress=None,
+                        parquet_codec: str = 'snappy', row_group_size: int = None, compression: str = None):
+    """Like stream_export_data, for the result of an arbitrary read-only
+    query (a join, an aggregate...) instead of a whole table. The result is
+    streamed from a server-side cursor, so it isn't subject to /query's
+    max_rows cap. Raises ValueError for anything but a single read-only
+    statement on a SQL connection."""
+    if config.type in ('redis', 'mongodb'):
+        raise ValueError("Query export is only available for SQL connections")
+    query = (sql or "").strip().rstrip(";").strip()
+    if not query:
+        raise ValueError("No query to export")
+    if is_mutating_sql(query):
+        raise ValueError("Only read-only queries can be exported")
+    if ";" in query:
+        # Refuses `SELECT 1; DROP TABLE t` (and, conservatively, a literal ';')
+        raise ValueError("Export a single statement")
+    if file_format == 'parquet' and parquet_codec not in PARQUET_EXPORT_CODECS:
+        raise ValueError(f"Unsupported Parquet codec: {parquet_codec}")
+    if compression:
+        _export_compressor(compression)
+        return compress_export_stream(
+            stream_query_export(config, query, file_format, mask_pii, progress, parquet_codec, row_group_size),
+            compression,
+        )
+    return _stream_sql_export(config, query, file_format, mask_pii, progress, parquet_codec, row_group_size,
+                              read_only=True)
+
+
+def _stream_sql_export(config: ConnectionConfig, query: str, file_format: str, mask_pii: bool = False, progress=None,
+                       parquet_codec: str = 'snappy', row_group_size: int = None, table_name: str = None,
+                       read_only: bool = False):
+    """Streams the rows of `query` in `file_format` from a server-side
+    cursor. `table_name`, when the query reads a whole table, lets Parquet/DBF
+    take its column types from the reflected table. `read_only` runs
+    Postgres queries in a READ ONLY transaction."""
     engine = get_engine(config)
+    read_only = read_only and config.type == 'postgresql'
 
     def generate():
+        # A caller's query only goes into COPY once re-rendered from a parse
+        # (see _copyable_query); table exports build their own
+        copy_query = _copyable_query(query) if read_only else query
+        if config.type == 'postgresql' and file_format in ('csv', 'txt') and not mask_pii and copy_query:
+            copied = _pg_copy_csv_export(engine, copy_query, progress, read_only)
+            if copied is not None:
+                yield from copied
+                return
+
         with engine.connect() as conn:
-            # For massive tables, we should use stream_results=True if supported by dialect
-            query = f"SELECT * FROM {table_name}"
-            if where_clause:
-                # NOTE: where_clause is an arbitrary caller-supplied SQL
-                # predicate fragment by design (row filtering for export),
-                # not an identifier, so validate_identifier doesn't apply
-                # here. It is a separate, pre-existing risk surface;
-                # narrowing it would require parsing it as a boolean
-                # expression and is out of scope for identifier validation.
-                query += f" WHERE {where_clause}"
+            if read_only:
+                conn.execute(text("SET TRANSACTION READ ONLY"))
+
+            # Reflected before the streaming cursor is open (MySQL can't run
+            # another statement while an unbuffered result is pending)
+            sql_types = {}
+            if file_format in ('parquet', 'dbf') and table_name:
+                sql_types = {col['name']: col['type'] for col in inspect(conn).get_columns(table_name)}
             
             result = conn.execution_options(stream_results=True).execute(text(query))
             columns = list(result.keys())
+            rows = _with_progress(result, progress)
             
-            mask_map = {}
-            if mask_pii:
-                mask_map = masking.get_masking_map(columns)
+            # Masking rules are picked once per column, then applied to
+            # whole columns of each batch
+            policy = masking.compile_masking_policy(columns) if mask_pii else None
+
+            def masked_batches(size=EXPORT_BATCH_SIZE):
+                for batch in _batched(rows, size):
+                    yield policy.apply(batch) if policy else batch
             
             if file_format == 'csv' or file_format == 'txt':
-                # Header
-                yield ",".join(columns) + "\n"
-                for row in result:
-                    # Very basic CSV quoting
-                    values = []
-                    for i, val in enumerate(row):
-                        col_name = columns[i]
-                        if mask_pii and mask_map.get(col_name):
-                            val = masking.mask_value(val, col_name)
-                        
-                        s = str(val) if val is not None else ""
-                        if "," in s or '"' in s or "\n" in s:
-                            s = '"' + s.replace('"', '""') + '"'
-                        values.append(s)
-                    yield ",".join(values) + "\n"
+                # One chunk per batch, formatted by the csv module (None
+                # becomes an empty field, quoting only where needed)
+                buf = io.StringIO()
+                writer = csv.writer(buf, lineterminator="\n")
+                writer.writerow(columns)
+                for batch in masked_batches():
+                    writer.writerows(batch)
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+                if buf.tell():
+                    yield buf.getvalue()  # header of an empty result
             
             elif file_format == 'json':
                 yield "[\n"
                 first = True
-                for row in result:
+                for batch in masked_batches():
                     if not first:
                         yield ",\n"
-                    # Create dict for JSON
-                    row_dict = dict(row._mapping)
-                    # Convert non-serializable objects (dates, etc)
-                    for k, v in row_dict.items():
-                        if mask_pii and mask_map.get(k):
-                            v = masking.mask_value(v, k)
-                            row_dict[k] = v
-                        
-                        if hasattr(v, 'isoformat'):
-                            row_dict[k] = v.isoformat()
-                    
-                    yield json.dumps(row_dict)
+                    yield ",\n".join(json.dumps(dict(zip(columns, row)), default=_json_export_value) for row in batch)
                     first = False
                 yield "\n]"
             
             elif file_format == 'xml':
-                import pandas as pd
-                df = pd.DataFrame([dict(r._mapping) for r in result])
-                if mask_pii:
-                    for col in columns:
-                        if mask_map.get(col):
-                            df[col] = df[col].apply(lambda x: masking.mask_value(x, col))
-                yield df.to_xml(index=False)
+                yield from _xml_export(columns, masked_batches())
 
             elif file_format in ['excel', 'xlsx']:
-                import pandas as pd
-                df = pd.DataFrame([dict(r._mapping) for r in result])
-                if mask_pii:
-                    for col in columns:
-                        if mask_map.get(col):
-                            df[col] = df[col].apply(lambda x: masking.mask_value(x, col))
-                
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False)
-                yield output.getvalue()
+                yield from _excel_export(columns, masked_batches())
+
+            elif file_format == 'parquet':
+                yield from _parquet_export(
+                    columns, masked_batches(row_group_size or PARQUET_EXPORT_ROW_GROUP_SIZE), sql_types,
+                    parquet_codec, text_columns=policy.masked_columns if policy else ()
+                )
 
             elif file_format == 'dbf':
-                import pandas as pd
-                import dbf
-                # DBF is restrictive about column names (max 10 chars)
-                df = pd.DataFrame([dict(r._mapping) for r in result])
-                # ... very complex to do in memory with 'dbf' library without temp file
-                # for now, placeholder or partial implementation
-                yield b"DBF export not yet fully implemented for streaming."
+                yield from _dbf_export(columns, masked_batches(), sql_types,
+                                       text_columns=policy.masked_columns if policy else ())
 
 
     return generate()
 
+
+# --- POSTGRES COPY EXPORT ---
+#
+# For unmasked CSV exports from Postgres, COPY (SELECT ...) TO STDOUT WITH
+# CSV HEADER lets the server produce the CSV, instead of fetching every row
+# into Python and formatting each cell. psycopg2's copy_expert writes into a
+# file object and only returns at the end, so it runs on a helper thread
+# writing into a bounded queue that the export generator drains; a slow
+# client therefore stalls COPY instead of buffering the table in memory.
+# Differences from the Python path are Postgres's own text forms (t/f for
+# booleans, its timestamp format).
+COPY_EXPORT_QUEUE_CHUNKS = 16
+COPY_EXPORT_CHUNK_SIZE = 256 * 1024
+
+
+def _copyable_query(query: str) -> str | None:
+    """`query` re-rendered by sqlglot if it is exactly one SELECT (or
+    WITH ... SELECT, UNION ...), else None. Pasted into COPY (...) as typed,
+    a trailing -- comment would swallow the closing parenthesis, and a stray
+    ')' could turn the statement into COPY ... TO PROGRAM, which a READ ONLY
+    transaction doesn't stop. Queries that don't qualify take the cursor
+    path."""
+    import sqlglot
+    from sqlglot import exp
+
+    try:
+        statements = [s for s in sqlglot.parse(query, read='postgres') if s is not None]
+    except sqlglot.errors.SqlglotError:
+        return None
+    if len(statements) != 1 or not isinstance(statements[0], exp.Query):
+        return None
+    return statements[0].sql(dialect='postgres')
+
+
+class _CopyExportClosed(Exception):
+    pass
+
+
+class _QueueWriter:
+    """File-like target for copy_expert. psycopg2 writes once per row, so
+    rows are gathered into COPY_EXPORT_CHUNK_SIZE chunks before they are
+    handed to the queue."""
+
+    def __init__(self, chunks: "queue.Queue", closed: threading.Event):
+        self.chunks = chunks
+        self.closed = closed
+        self.pending = []
+        self.pending_size = 0
+
+    def write(self, data):
+        data = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        self.pending.append(data)
+        self.pending_size += len(data)
+        if self.pending_size >= COPY_EXPORT_CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunk = b"".join(self.pending)
+        self.pending, self.pending_size = [], 0
+        while True:
+            if self.closed.is_set():
+                # Aborts the COPY once the consumer went away
+                raise _CopyExportClosed("Export stream was closed")
+            try:
+                self.chunks.put(chunk, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+def _pg_copy_csv_export(engine, query: str, progress=None, read_only: bool = False):
+    """Generator of CSV bytes from COPY TO STDOUT, or None when the driver
+    has no copy_expert (e.g. psycopg 3) and the Python path must be used."""
+    raw = engine.raw_connection()
+    cursor = raw.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        cursor.close()
+        raw.close()
+        return None
+
+    chunks = queue.Queue(maxsize=COPY_EXPORT_QUEUE_CHUNKS)
+    closed = threading.Event()
+    done = object()
+    failure = []
+
+    def run_copy():
+        try:
+            writer = _QueueWriter(chunks, closed)
+            if read_only:
+                cursor.execute("SET TRANSACTION READ ONLY")
+            cursor.copy_expert(f"COPY (\n{query}\n) TO STDOUT WITH CSV HEADER", writer)
+            writer.flush()
+        except Exception as e:
+            failure.append(e)
+        finally:
+            # A dropped connection makes these fail too; the sentinel below
+            # must be queued regardless, or the reader would wait forever.
+            for cleanup in (cursor.close, raw.rollback, raw.close):
+                try:
+                    cleanup()
+                except Exception as e:
+                    print(f"COPY export cleanup failed: {e}")
+            while not closed.is_set():
+                try:
+                    chunks.put(done, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    def generate():
+        thread = threading.Thread(target=run_copy, name="sqlforge-copy-export", daemon=True)
+        thread.start()
+        lines = 0
+        try:
+            while True:
+                try:
+                    chunk = chunks.get(timeout=0.5)
+                except queue.Empty:
+                    if not thread.is_alive() and chunks.empty():
+                        break  # the COPY thread died without its sentinel
+                    continue
+                if chunk is done:
+                    break
+                if progress:
+                    # Line count (minus the header) as the row count; only
+                    # off when values themselves contain newlines
+                    lines += chunk.count(b"\n")
+                    progress(max(lines - 1, 0))
+                yield chunk
+        finally:
+            closed.set()
+            thread.join()
+        if failure:
+            raise failure[0]
+    return generate()
+
+
+# --- PARTITIONED EXPORT ---
+#
+# A single SELECT * is one backend process feeding one Python loop. A
+# partitioned export splits the table into `parallelism` ranges of its
+# integer primary key (Postgres: ctid page ranges, SQLite: rowid ranges,
+# when there is no such key) and exports each range concurrently over its
+# own pooled connection with stream_export_data. The parts are either
+# zipped into one archive (one file per partition, any format) or stitched
+# back into a single stream in partition order (csv/txt/json). Tables with
+# nothing to split on are exported as a single partition.
+MAX_EXPORT_PARALLELISM = 8
+MERGEABLE_EXPORT_FORMATS = ('csv', 'txt', 'json')
+
+
+def _range_predicates(column: str, low: int, high: int, parts: int, literal=str) -> list:
+    step = -(-(high - low + 1) // parts)
+    bounds = [literal(b) for b in range(low + step, high + 1, step)][:parts - 1]
+    if not bounds:
+        return [None]
+    # The outer ranges are open-ended so rows written meanwhile aren't lost
+    predicates = [f"{column} < {bounds[0]}"]
+    predicates += [f"{column} >= {lo} AND {column} < {hi}" for lo, hi in zip(bounds, bounds[1:])]
+    predicates.append(f"{column} >= {bounds[-1]}")
+    return predicates
+
+
+def export_partitions(engine, config: ConnectionConfig, table_name: str, parallelism: int) -> list:
+    """WHERE predicates splitting `table_name` into at most `parallelism`
+    disjoint partitions covering every row ([None] = the whole table)."""
+    from sqlalchemy import types as sqltypes
+
+    if parallelism <= 1:
+        return [None]
+    pk = inspect(engine).get_pk_constraint(table_name).get('constrained_columns') or []
+    int_pk = None
+    if len(pk) == 1:
+        columns = {col['name']: col['type'] for col in inspect(engine).get_columns(table_name)}
+        if isinstance(columns.get(pk[0]), sqltypes.Integer):
+            int_pk = validate_identifier(pk[0], "column name")
+
+    with engine.connect() as conn:
+        if int_pk:
+            low, high = conn.execute(text(f"SELECT MIN({int_pk}), MAX({int_pk}) FROM {table_name}")).one()
+            if low is None:
+                return [None]
+            return _range_predicates(int_pk, int(low), int(high), parallelism)
+        if config.type == 'postgresql':
+            pages = conn.execute(text("SELECT relpages FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table_name}).scalar()
+            if not pages or pages <= 0:
+                return [None]
+            # Page ranges as tid bounds (TID range scans, Postgres 14+)
+            return _range_predicates("ctid", 0, int(pages) - 1, parallelism, literal=lambda page: f"'({page},0)'::tid")
+        if config.type == 'sqlite':
+            try:
+                low, high = conn.execute(text(f"SELECT MIN(rowid), MAX(rowid) FROM {table_name}")).one()
+            except Exception:
+                return [None]  # WITHOUT ROWID table
+            if low is None:
+                return [None]
+            return _range_predicates("rowid", int(low), int(high), parallelism)
+    return [None]
+
+
+def _json_part_items(part):
+    """Yields the items of one partition's JSON export ("[\n" + items joined
+    by ",\n" + "\n]") in EXPORT_CHUNK_SIZE chunks, without the brackets."""
+    part.read(len(b"[\n"))
+    held = b""  # the tail of what was read, which may be the closing "\n]"
+    while True:
+        chunk = part.read(EXPORT_CHUNK_SIZE)
+        if not chunk:
+            return
+        data = held + chunk
+        cut = len(data) - len(b"\n]")
+        held = data[max(cut, 0):]
+        if cut > 0:
+            yield data[:cut]
+
+
+def _merge_partition_files(paths_in_order, file_format: str):
+    """Stitches per-partition exports into one csv/txt/json stream: the
+    header of every part but the first is dropped, JSON arrays are joined.
+    Parts are copied in EXPORT_CHUNK_SIZE chunks, never read whole."""
+    first_item = True
+    if file_format == 'json':
+        yield b"[\n"
+    for index, path in paths_in_order:
+        with open(path, "rb") as part:
+            if file_format == 'json':
+                for i, chunk in enumerate(_json_part_items(part)):
+                    if i == 0 and not first_item:
+                        yield b",\n"
+                    first_item = False
+                    yield chunk
+                continue
+            if index > 0:
+                part.readline()
+            while True:
+                chunk = part.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    if file_format == 'json':
+        yield b"\n]"
+
+
+def stream_partitioned_export(config: ConnectionConfig, table_name: str, file_format: str, parallelism: int = 4,
+                              output: str = 'archive', mask_pii: bool = False, progress=None,
+                              parquet_codec: str = 'snappy', row_group_size: int = None):
+    """Exports `table_name` in concurrently read partitions (see PARTITIONED
+    EXPORT). output='archive' yields a zip with one file per partition,
+    output='stream' the parts merged in order as one csv/txt/json file."""
+    if config.type in ('redis', 'mongodb'):
+        raise ValueError("Partitioned export is only available for SQL connections")
+    if output not in ('archive', 'stream'):
+        raise ValueError(f"Unknown partitioned export output: {output}")
+    if output == 'stream' and file_format not in MERGEABLE_EXPORT_FORMATS:
+        raise ValueError(f"{file_format} partitions can't be merged into one stream; use output='archive'")
+    table_name = validate_identifier(table_name, "table name")
+    parallelism = max(1, min(int(parallelism or 1), MAX_EXPORT_PARALLELISM))
+    predicates = export_partitions(get_engine(config), config, table_name, parallelism)
+
+    def generate():
+        stop = threading.Event()
+        counts = [0] * len(predicates)
+        counts_lock = threading.Lock()
+
+        def export_partition(index, predicate, path):
+            def partition_progress(rows):
+                if stop.is_set():
+                    raise Exception("Export stopped")
+                with counts_lock:
+                    counts[index] = rows
+                    total = sum(counts)
+                if progress:
+                    progress(total)
+
+            with open(path, "wb") as out:
+                for chunk in stream_export_data(config, table_name, file_format, mask_pii, predicate,
+                                                partition_progress, parquet_codec, row_group_size):
+                    out.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            return path
+
+        with tempfile.TemporaryDirectory(prefix="sqlforge-partitions-") as tmp_dir, \
+                ThreadPoolExecutor(max_workers=min(parallelism, len(predicates))) as executor:
+            futures = [
+                executor.submit(export_partition, i, p, os.path.join(tmp_dir, f"part{i:03d}.{file_format}"))
+                for i, p in enumerate(predicates)
+            ]
+            try:
+                if output == 'stream':
+                    # Parts are emitted in order as soon as each is complete
+                    yield from _merge_partition_files(((i, f.result()) for i, f in enumerate(futures)), file_format)
+                    return
+
+                import zipfile
+                method = zipfile.ZIP_STORED if file_format in ('parquet', 'excel', 'xlsx') else zipfile.ZIP_DEFLATED
+
+                def write(spool):
+                    with zipfile.ZipFile(spool, "w", compression=method) as archive:
+                        for i, future in enumerate(futures):
+                            archive.write(future.result(), f"{table_name}_part{i + 1:03d}.{file_format}")
+                yield from _stream_spooled(write)
+            finally:
+                stop.set()
+                for future in futures:
+                    future.cancel()
+
+    return generate()
+
 def alter_table(config: ConnectionConfig, request: AlterTableRequest):
     if read_only_block(config):
         return {"success": False, "error": READ_ONLY_ERROR}
@@ -1,5 +1,7 @@
 import sqlite3
 import json
+import hashlib
+import zlib
 import os
 import sys
 from models import ConnectionConfig
@@ -46,6 +48,16 @@ def init_db():
     # Favorites table
     c.execute('''CREATE TABLE IF NOT EXISTS favorites
                  (id TEXT PRIMARY KEY, type TEXT, name TEXT, connection_id TEXT, target TEXT, timestamp DATETIME)''')
+
+    # Schema Snapshots table (zlib-compressed JSON list of TableSchema dicts)
+    c.execute('''CREATE TABLE IF NOT EXISTS schema_snapshots
+                 (connection_id TEXT, version INTEGER, format INTEGER, fingerprint TEXT, payload BLOB, timestamp DATETIME,
+                  PRIMARY KEY (connection_id, version))''')
+
+    # Import Checkpoints table (progress of resumable imports, see database.import_data)
+    c.execute('''CREATE TABLE IF NOT EXISTS import_checkpoints
+                 (connection_id TEXT, table_name TEXT, file_hash TEXT, file_format TEXT, byte_offset INTEGER,
+                  rows_committed INTEGER, timestamp DATETIME, PRIMARY KEY (connection_id, table_name, file_hash))''')
                  
     conn.commit()
     conn.close()
@@ -162,6 +174,8 @@ def delete_connection(conn_id: str):
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute("DELETE FROM connections WHERE id = ?", (conn_id,))
+    c.execute("DELETE FROM schema_snapshots WHERE connection_id = ?", (conn_id,))
+    c.execute("DELETE FROM import_checkpoints WHERE connection_id = ?", (conn_id,))
     conn.commit()
     conn.close()
 
@@ -169,6 +183,107 @@ def delete_all_connections():
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute("DELETE FROM connections")
+    c.execute("DELETE FROM schema_snapshots")
+    c.execute("DELETE FROM import_checkpoints")
+    conn.commit()
+    conn.close()
+
+# --- Schema Snapshots ---
+#
+# Reflected schemas are persisted per connection so the first schema request
+# after a backend restart can be answered from disk instead of re-reflecting
+# the whole database (see main.py's /connections/{id}/schema). A new version
+# is only written when the schema actually changed; older versions beyond
+# SCHEMA_SNAPSHOTS_KEPT are pruned.
+
+# Bump when TableSchema changes shape incompatibly - snapshots written in an
+# older format are then ignored instead of being served half-parsed.
+SCHEMA_SNAPSHOT_FORMAT = 1
+SCHEMA_SNAPSHOTS_KEPT = 5
+
+def save_schema_snapshot(connection_id: str, schemas: List[Dict[str, Any]]) -> int:
+    """Stores `schemas` (TableSchema.model_dump() dicts) and returns the
+    snapshot version. If it's identical to the latest snapshot, only that
+    snapshot's timestamp is bumped and its version returned."""
+    raw = json.dumps(schemas, sort_keys=True, default=str)
+    fingerprint = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT version, format, fingerprint FROM schema_snapshots WHERE connection_id = ? ORDER BY version DESC LIMIT 1", (connection_id,))
+    latest = c.fetchone()
+    if latest and latest[1] == SCHEMA_SNAPSHOT_FORMAT and latest[2] == fingerprint:
+        c.execute("UPDATE schema_snapshots SET timestamp = ? WHERE connection_id = ? AND version = ?",
+                  (datetime.now(), connection_id, latest[0]))
+        version = latest[0]
+    else:
+        version = (latest[0] + 1) if latest else 1
+        c.execute("INSERT INTO schema_snapshots (connection_id, version, format, fingerprint, payload, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                  (connection_id, version, SCHEMA_SNAPSHOT_FORMAT, fingerprint, zlib.compress(raw.encode("utf-8")), datetime.now()))
+        c.execute("DELETE FROM schema_snapshots WHERE connection_id = ? AND version <= ?",
+                  (connection_id, version - SCHEMA_SNAPSHOTS_KEPT))
+    conn.commit()
+    conn.close()
+    return version
+
+def get_schema_snapshot(connection_id: str, version: int = None) -> Dict[str, Any] | None:
+    """Returns {"version", "timestamp", "schemas"} for the latest (or the
+    given) snapshot of a connection, or None if there isn't a usable one."""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    if version is None:
+        c.execute("SELECT version, format, payload, timestamp FROM schema_snapshots WHERE connection_id = ? ORDER BY version DESC LIMIT 1", (connection_id,))
+    else:
+        c.execute("SELECT version, format, payload, timestamp FROM schema_snapshots WHERE connection_id = ? AND version = ?", (connection_id, version))
+    r = c.fetchone()
+    conn.close()
+    if not r or r[1] != SCHEMA_SNAPSHOT_FORMAT:
+        return None
+    return {
+        "version": r[0],
+        "timestamp": r[3],
+        "schemas": json.loads(zlib.decompress(r[2]).decode("utf-8"))
+    }
+
+def delete_schema_snapshots(connection_id: str):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("DELETE FROM schema_snapshots WHERE connection_id = ?", (connection_id,))
+    conn.commit()
+    conn.close()
+
+# --- Import Checkpoints ---
+#
+# A resumable import commits in chunks and records after each one how far
+# into the file it got. The file is identified by its content hash, so
+# re-uploading the same file after a failure picks up where the last
+# committed chunk ended; a different file starts from scratch.
+
+def save_import_checkpoint(connection_id: str, table_name: str, file_hash: str, file_format: str,
+                           byte_offset: int | None, rows_committed: int):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("INSERT OR REPLACE INTO import_checkpoints (connection_id, table_name, file_hash, file_format, byte_offset, rows_committed, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)",
+              (connection_id, table_name, file_hash, file_format, byte_offset, rows_committed, datetime.now()))
+    conn.commit()
+    conn.close()
+
+def get_import_checkpoint(connection_id: str, table_name: str, file_hash: str) -> Dict[str, Any] | None:
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT file_format, byte_offset, rows_committed, timestamp FROM import_checkpoints WHERE connection_id = ? AND table_name = ? AND file_hash = ?",
+              (connection_id, table_name, file_hash))
+    r = c.fetchone()
+    conn.close()
+    if not r:
+        return None
+    return {"file_format": r[0], "byte_offset": r[1], "rows_committed": r[2], "timestamp": r[3]}
+
+def delete_import_checkpoint(connection_id: str, table_name: str, file_hash: str):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("DELETE FROM import_checkpoints WHERE connection_id = ? AND table_name = ? AND file_hash = ?",
+              (connection_id, table_name, file_hash))
     conn.commit()
     conn.close()
 
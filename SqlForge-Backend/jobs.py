@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+# --- BACKGROUND JOBS ---
+#
+# Large imports and exports used to run inside the HTTP request, with no
+# progress and no way to stop them. They can now be submitted as jobs: the
+# submit call returns a job id straight away, the work runs on a small
+# bounded pool (JOB_MAX_WORKERS) so a few big transfers can't tie up the
+# threads interactive requests need, and progress can be polled or streamed
+# (see the /jobs endpoints in main.py).
+#
+# Cancellation is cooperative: the import/export code reports progress
+# between batches through a callback, and that callback raises JobCancelled
+# once a cancel was requested.
+
+JOB_MAX_WORKERS = 2
+JOBS_KEPT = 50  # finished jobs kept around for polling/downloads
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, description: str, total_bytes: int = None, total_rows: int = None):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.description = description
+        self.status = "queued"  # queued, running, completed, failed, cancelled
+        self.rows = 0
+        self.bytes = 0
+        self.total_bytes = total_bytes
+        self.total_rows = total_rows
+        self.result: Dict[str, Any] | None = None
+        self.error: str | None = None
+        self.created_at = datetime.now()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        # Files owned by the job (spooled upload, export output), removed
+        # when the job is pruned.
+        self.files: List[str] = []
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def update(self, rows: int = None, bytes: int = None):
+        with self._lock:
+            if rows is not None:
+                self.rows = rows
+            if bytes is not None:
+                self.bytes = bytes
+
+    def raise_if_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled("Job was cancelled")
+
+    def progress(self, rows: int = None, bytes: int = None):
+        """Progress callback handed to import/export code: records progress
+        and stops the job if it was cancelled meanwhile."""
+        self.update(rows=rows, bytes=bytes)
+        self.raise_if_cancelled()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            rows, nbytes = self.rows, self.bytes
+        end = self.finished_at or time.monotonic()
+        elapsed = (end - self.started_at) if self.started_at else 0.0
+        rows_per_second = rows / elapsed if elapsed > 0 else None
+        bytes_per_second = nbytes / elapsed if elapsed > 0 else None
+
+        # ETA from whichever total is known, bytes first (an upload's size
+        # is exact, a table's row count usually an estimate).
+        eta = None
+        if self.status == "running":
+            if self.total_bytes and bytes_per_second:
+                eta = max(self.total_bytes - nbytes, 0) / bytes_per_second
+            elif self.total_rows and rows_per_second:
+                eta = max(self.total_rows - rows, 0) / rows_per_second
+
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "description": self.description,
+            "status": self.status,
+            "rows": rows,
+            "bytes": nbytes,
+            "total_rows": self.total_rows,
+            "total_bytes": self.total_bytes,
+            "rows_per_second": rows_per_second,
+            "bytes_per_second": bytes_per_second,
+            "eta_seconds": eta,
+            "elapsed_seconds": elapsed,
+            "created_at": self.created_at.isoformat(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers: int = JOB_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sqlforge-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, description: str, work: Callable[[Job], Dict[str, Any]],
+               total_bytes: int = None, total_rows: int = None, files: List[str] = None) -> Job:
+        """Queues `work(job)`, which returns the usual {"success": ...}
+        result dict and calls job.progress() between batches."""
+        job = Job(kind, description, total_bytes=total_bytes, total_rows=total_rows)
+        job.files = list(files or [])
+        with self._lock:
+            self._jobs[job.id] = job
+        self._prune()
+        self._executor.submit(self._run, job, work)
+        return job
+
+    def _run(self, job: Job, work: Callable[[Job], Dict[str, Any]]):
+        if job.cancel_requested:
+            # Cancelled while still queued: the work never runs, so nothing
+            # else will clean up the files it was handed.
+            job.status = "cancelled"
+            job.finished_at = time.monotonic()
+            _remove_files(job)
+            return
+        job.status = "running"
+        job.started_at = time.monotonic()
+        try:
+            result = work(job)
+            job.result = result
+            if job.cancel_requested:
+                # The work caught JobCancelled itself and returned an error
+                job.status = "cancelled"
+            elif isinstance(result, dict) and result.get("success") is False:
+                job.status = "failed"
+                job.error = result.get("error")
+            else:
+                job.status = "completed"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.monotonic()
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+        job._cancel.set()
+        return True
+
+    def _prune(self):
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.created_at)
+            stale = finished[:max(len(finished) - JOBS_KEPT, 0)]
+            for job in stale:
+                del self._jobs[job.id]
+        for job in stale:
+            _remove_files(job)
+
+
+def _remove_files(job: Job):
+    for path in job.files:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # already gone, e.g. an import's upload removed by the work itself
+
+
+manager = JobManager()
@@ -1,15 +1,23 @@
 import sys
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import uuid
-from typing import List, Dict, Any
+import json
+import re
+import os
+import shutil
+import tempfile
+import asyncio
+from typing import List, Dict, Any, Optional
 import time
 
 # Import from local modules
-from models import ConnectionConfig, QueryRequest, QueryResult, TableInfo, AIRequest, SyncRequest, TableSchema, AlterTableRequest, CancelQueryRequest, TranslateQueryRequest, TranslateQueryResult, FederatedQueryRequest, FederatedQueryResult
+from models import ConnectionConfig, QueryRequest, QueryResult, TableInfo, AIRequest, SyncRequest, TableSchema, AlterTableRequest, CancelQueryRequest, TranslateQueryRequest, TranslateQueryResult, FederatedQueryRequest, FederatedQueryResult, ColumnMappingRule, MongoExportOptions, QueryExportRequest
 import database
 import internal_db
+import jobs
 from google import genai
 from pro import sync as pro_sync
 from pro import transfer as pro_transfer
@@ -107,20 +115,25 @@ def save_connection(config: ConnectionConfig):
         
     internal_db.save_connection(config)
     # Drop any cached engine for this id - if this was an edit (new host,
-    # password, etc.) the old pooled connection is now stale.
+    # password, etc.) the old pooled connection is now stale, and so is any
+    # schema snapshot taken through it.
     database.dispose_engine(config.id)
+    internal_db.delete_schema_snapshots(config.id)
+    _live_schema_conn_ids.discard(config.id)
     return config
 
 @app.delete("/connections/{conn_id}")
 def delete_connection_endpoint(conn_id: str):
     internal_db.delete_connection(conn_id)
     database.dispose_engine(conn_id)
+    _live_schema_conn_ids.discard(conn_id)
     return {"status": "deleted"}
 
 @app.delete("/connections")
 def delete_all_connections_endpoint():
     internal_db.delete_all_connections()
     database.dispose_all_engines()
+    _live_schema_conn_ids.clear()
     return {"status": "all deleted"}
 
 @app.get("/connections/discover")
@@ -180,22 +193,49 @@ def connections_health():
     return health_status
 
 @app.get("/connections/{conn_id}/tables", response_model=List[TableInfo])
-def get_tables_endpoint(conn_id: str):
+def get_tables_endpoint(conn_id: str, schemas: List[str] = Query(None)):
+    # ?schemas=sales&schemas=hr (or ?schemas=*) overrides the connection's
+    # configured schema list for this request.
     config = internal_db.get_connection(conn_id)
     if not config:
         raise HTTPException(status_code=404, detail="Connection not found")
     try:
-        return database.get_tables(config)
+        return database.get_tables(config, schemas=schemas)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Connections whose schema requests go straight to live reflection: their
+# stored snapshot has already been refreshed once since this process started
+# (or was invalidated by a schema change made through us). Every other
+# connection is answered from its snapshot, if one exists, while a background
+# task re-reflects and updates it - so the first sidebar expansion after a
+# restart is instant without leaving the schema stale for the whole session.
+_live_schema_conn_ids: set = set()
+
+def _refresh_schema_snapshot(config: ConnectionConfig) -> List[TableSchema]:
+    schemas = database.get_schema_details(config)
+    # An empty result is what the NoSQL branches return when the server is
+    # unreachable, so it never overwrites a snapshot that has content.
+    if schemas or internal_db.get_schema_snapshot(config.id) is None:
+        internal_db.save_schema_snapshot(config.id, [s.model_dump() for s in schemas])
+    _live_schema_conn_ids.add(config.id)
+    return schemas
+
 @app.get("/connections/{conn_id}/schema", response_model=List[TableSchema])
-def get_schema_details_endpoint(conn_id: str):
+def get_schema_details_endpoint(conn_id: str, background_tasks: BackgroundTasks, refresh: bool = False, schemas: List[str] = Query(None)):
     config = internal_db.get_connection(conn_id)
     if not config:
         raise HTTPException(status_code=404, detail="Connection not found")
     try:
-        return database.get_schema_details(config)
+        if schemas is not None:
+            # Snapshots cover the connection's configured schemas only.
+            return database.get_schema_details(config, schemas=schemas)
+        if not refresh and conn_id not in _live_schema_conn_ids:
+            snapshot = internal_db.get_schema_snapshot(conn_id)
+            if snapshot is not None:
+                background_tasks.add_task(_refresh_schema_snapshot, config)
+                return snapshot["schemas"]
+        return _refresh_schema_snapshot(config)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -211,6 +251,8 @@ def alter_table_endpoint(conn_id: str, request: AlterTableRequest):
     result = database.alter_table(config, request)
     if not result["success"]:
         raise HTTPException(status_code=500, detail=result["error"])
+    # The stored snapshot no longer matches; reflect live from now on.
+    _live_schema_conn_ids.add(conn_id)
     return result
 
 @app.post("/query", response_model=QueryResult)
@@ -581,7 +623,10 @@ def schema_diff(request: SyncRequest):
     if request.mode in ['transfer', 'data']:
         return {"sql": f"-- DATA TRANSFER PLAN\n-- Source: {source.name}\n-- Target: {target.name}\n-- Action: Transfer all rows for all matching tables.\n-- Note: This will append data to existing tables."}
     
-    result = pro_sync.diff_schemas(source, target)
+    if request.use_source_snapshot:
+        result = pro_sync.diff_snapshot_to_db(source, target)
+    else:
+        result = pro_sync.diff_schemas(source, target)
     return {"sql": result["sql_text"]}
 
 @app.post("/pro/sync/execute")
@@ -597,7 +642,7 @@ def schema_sync(request: SyncRequest):
             return {"status": "success", "message": "Dry run completed for data transfer."}
         return pro_transfer.transfer_all_tables(source, target)
     
-    result = pro_sync.sync_schemas(source, target, dry_run=request.dry_run)
+    result = pro_sync.sync_schemas(source, target, dry_run=request.dry_run, use_source_snapshot=request.use_source_snapshot)
     return result
 
 @app.post("/connections/{conn_id}/drop")
@@ -610,55 +655,312 @@ def drop_db_object(conn_id: str, request: Dict[str, str]):
     result = database.drop_object(config, request.get("name", ""), request.get("type", "table"))
     if not result["success"]:
         raise HTTPException(status_code=500, detail=result["error"])
+    _live_schema_conn_ids.add(conn_id)
     return result
 
+def _parse_column_mapping(mapping: Optional[str]) -> Optional[Dict[str, ColumnMappingRule]]:
+    try:
+        return {name: ColumnMappingRule(**rule) for name, rule in json.loads(mapping).items()} if mapping else None
+    except (ValueError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid column mapping: {e}")
+
+def _check_import_options(config, resumable: bool, parallelism: Optional[int], defer_indexes: bool):
+    if config.type in ('redis', 'mongodb'):
+        return  # resumable only applies to SQL targets
+    try:
+        database.check_resumable_import_options(resumable, parallelism, defer_indexes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/connections/{conn_id}/import/{table_name}")
 async def import_table_data(
     conn_id: str, 
     table_name: str,
     file: UploadFile = File(...),
-    mode: str = Form("append"), # 'append' or 'truncate'
-    format: str = Form("csv")   # 'csv' or 'json'
+    mode: str = Form("append"), # 'append', 'truncate' or 'upsert' (by primary key)
+    format: str = Form("csv"),  # 'csv', 'json'/'jsonl', 'xml', 'excel', 'dbf', 'parquet', 'arrow'
+    parallelism: Optional[int] = Form(None),  # concurrent loaders/writers (default: 1 for SQL, 4 for Mongo/Redis)
+    batch_size: Optional[int] = Form(None),  # documents/keys per write for Mongo/Redis
+    redis_hashes: bool = Form(False),  # store multi-field rows as Redis hashes
+    defer_indexes: bool = Form(False),
+    mapping: Optional[str] = Form(None),  # JSON {source column: {"rename", "skip", "cast"}}
+    resumable: bool = Form(False),  # commit in chunks and resume a retried upload of the same file
+    commit_every: int = Form(database.IMPORT_CHECKPOINT_ROWS)
 ):
     config = internal_db.get_connection(conn_id)
     if not config:
         raise HTTPException(status_code=404, detail="Connection not found")
     
-    content = await file.read()
+    _check_import_options(config, resumable, parallelism, defer_indexes)
     
-    result = database.import_data(config, table_name, content, format, mode)
+    # The upload is handed over as its spooled temp file and parsed
+    # incrementally rather than read into memory, and the (blocking) import
+    # runs on a worker thread so it doesn't stall the event loop.
+    column_rules = _parse_column_mapping(mapping)
+
+    result = await run_in_threadpool(
+        database.import_data, config, table_name, file.file, format, mode, parallelism, defer_indexes, column_rules,
+        resumable, commit_every, batch_size=batch_size, redis_hashes=redis_hashes
+    )
     if not result["success"]:
         raise HTTPException(status_code=500, detail=result["error"])
         
     return result
 
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "txt": "text/plain",
+    "json": "application/json",
+    "xml": "application/xml",
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "dbf": "application/x-dbf",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+def _check_export_options(format: str, codec: str, row_group_size: Optional[int], compression: Optional[str] = None):
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    if format == "parquet" and codec not in database.PARQUET_EXPORT_CODECS:
+        raise HTTPException(status_code=400, detail=f"Unsupported Parquet codec: {codec}")
+    if row_group_size is not None and row_group_size < 1:
+        raise HTTPException(status_code=400, detail="row_group_size must be positive")
+    if compression and compression not in database.EXPORT_COMPRESSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported compression: {compression}")
+
+def _parse_mongo_export_options(mongo_filter: Optional[str], projection: Optional[str], sort: Optional[str],
+                                batch_size: Optional[int]) -> Optional[MongoExportOptions]:
+    """filter/projection/sort arrive as JSON objects in query parameters."""
+    if not any([mongo_filter, projection, sort, batch_size]):
+        return None
+    try:
+        return MongoExportOptions(
+            filter=json.loads(mongo_filter) if mongo_filter else None,
+            projection=json.loads(projection) if projection else None,
+            sort=json.loads(sort) if sort else None,
+            batch_size=batch_size,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid MongoDB export options: {e}")
+
+def _export_file(name: str, format: str, compression: Optional[str]):
+    """(download filename, media type) for an export, e.g. orders.csv.gz as
+    application/gzip when compressed."""
+    filename = f"{name}.{format}"
+    if compression:
+        suffix, media_type = database.EXPORT_COMPRESSIONS[compression]
+        return f"{filename}.{suffix}", media_type
+    return filename, EXPORT_MEDIA_TYPES.get(format, "text/plain")
+
 @app.get("/connections/{conn_id}/export/{table_name}")
-def export_table_data(conn_id: str, table_name: str, format: str = "csv", masked: bool = False):
+def export_table_data(conn_id: str, table_name: str, format: str = "csv", masked: bool = False,
+                      codec: str = "snappy", row_group_size: Optional[int] = None, compression: Optional[str] = None,
+                      mongo_filter: Optional[str] = Query(None, alias="filter"), projection: Optional[str] = None,
+                      sort: Optional[str] = None, batch_size: Optional[int] = None):
     config = internal_db.get_connection(conn_id)
     if not config:
         raise HTTPException(status_code=404, detail="Connection not found")
+    _check_export_options(format, codec, row_group_size, compression)
+    mongo_options = _parse_mongo_export_options(mongo_filter, projection, sort, batch_size)
     
     try:
-        gen = database.stream_export_data(config, table_name, format, mask_pii=masked)
-        
-        media_types = {
-            "csv": "text/csv",
-            "txt": "text/plain",
-            "json": "application/json",
-            "xml": "application/xml",
-            "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            "dbf": "application/x-dbf"
-        }
+        gen = database.stream_export_data(config, table_name, format, mask_pii=masked,
+                                          parquet_codec=codec, row_group_size=row_group_size, compression=compression,
+                                          mongo_options=mongo_options)
+        filename, media_type = _export_file(table_name, format, compression)
         
         return StreamingResponse(
             gen, 
-            media_type=media_types.get(format, "text/plain"),
-            headers={"Content-Disposition": f"attachment; filename={table_name}.{format}"}
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/connections/{conn_id}/export-query")
+def export_query_results(conn_id: str, request: QueryExportRequest):
+    """Streams the full result of a read-only query in any export format,
+    without /query's max_rows cap."""
+    config = internal_db.get_connection(conn_id)
+    if not config:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    _check_export_options(request.format, request.codec, request.row_group_size, request.compression)
+
+    try:
+        gen = database.stream_query_export(config, request.sql, request.format, mask_pii=request.masked,
+                                           parquet_codec=request.codec, row_group_size=request.row_group_size,
+                                           compression=request.compression)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # ASCII only: header values must be latin-1
+    name = re.sub(r"[^\w.-]", "_", request.filename or "query", flags=re.ASCII)
+    filename, media_type = _export_file(name, request.format, request.compression)
+    return StreamingResponse(gen, media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@app.get("/connections/{conn_id}/export/{table_name}/partitioned")
+def export_table_partitioned(conn_id: str, table_name: str, format: str = "csv", masked: bool = False,
+                             parallelism: int = 4, output: str = "archive", codec: str = "snappy",
+                             row_group_size: Optional[int] = None):
+    """Reads the table in `parallelism` concurrent partitions; output is a
+    zip of the parts ("archive") or one merged file ("stream")."""
+    config = internal_db.get_connection(conn_id)
+    if not config:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    _check_export_options(format, codec, row_group_size)
+
+    try:
+        gen = database.stream_partitioned_export(config, table_name, format, parallelism, output, mask_pii=masked,
+                                                 parquet_codec=codec, row_group_size=row_group_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if output == "archive":
+        filename, media_type = f"{table_name}.zip", "application/zip"
+    else:
+        filename, media_type = _export_file(table_name, format, None)
+    return StreamingResponse(gen, media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+# --- Background import/export jobs (see jobs.py) ---
+
+@app.post("/connections/{conn_id}/import/{table_name}/jobs")
+async def submit_import_job(
+    conn_id: str,
+    table_name: str,
+    file: UploadFile = File(...),
+    mode: str = Form("append"),
+    format: str = Form("csv"),
+    parallelism: Optional[int] = Form(None),
+    batch_size: Optional[int] = Form(None),
+    redis_hashes: bool = Form(False),
+    defer_indexes: bool = Form(False),
+    mapping: Optional[str] = Form(None),
+    resumable: bool = Form(False),
+    commit_every: int = Form(database.IMPORT_CHECKPOINT_ROWS)
+):
+    config = internal_db.get_connection(conn_id)
+    if not config:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    _check_import_options(config, resumable, parallelism, defer_indexes)
+    column_rules = _parse_column_mapping(mapping)
+
+    # The upload's own temp file goes away with the request, so it's copied
+    # (in chunks) to one the job owns.
+    def spool_upload():
+        fd, path = tempfile.mkstemp(prefix="sqlforge-import-")
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(file.file, out, database.IMPORT_READ_CHUNK_SIZE)
+        return path
+    path = await run_in_threadpool(spool_upload)
+
+    def work(job: jobs.Job):
+        try:
+            with open(path, "rb") as f:
+                return database.import_data(
+                    config, table_name, f, format, mode, parallelism, defer_indexes, column_rules,
+                    resumable, commit_every, progress=lambda rows: job.progress(rows=rows, bytes=f.tell()),
+                    batch_size=batch_size, redis_hashes=redis_hashes
+                )
+        finally:
+            os.remove(path)
+
+    job = jobs.manager.submit("import", f"Import {file.filename} into {table_name}", work,
+                              total_bytes=os.path.getsize(path), files=[path])
+    return {"job_id": job.id}
+
+@app.post("/connections/{conn_id}/export/{table_name}/jobs")
+def submit_export_job(conn_id: str, table_name: str, format: str = "csv", masked: bool = False,
+                      codec: str = "snappy", row_group_size: Optional[int] = None, compression: Optional[str] = None,
+                      mongo_filter: Optional[str] = Query(None, alias="filter"), projection: Optional[str] = None,
+                      sort: Optional[str] = None, batch_size: Optional[int] = None):
+    config = internal_db.get_connection(conn_id)
+    if not config:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    _check_export_options(format, codec, row_group_size, compression)
+    mongo_options = _parse_mongo_export_options(mongo_filter, projection, sort, batch_size)
+    if config.type not in ('redis', 'mongodb'):
+        # Fail fast on a hostile table name instead of queueing a doomed job
+        try:
+            database.validate_identifier(table_name, "table name")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Suffix from the checked format/compression, never the raw parameter
+    filename, media_type = _export_file(table_name, format, compression)
+    fd, path = tempfile.mkstemp(prefix="sqlforge-export-", suffix=filename[len(table_name):])
+    os.close(fd)
+
+    def work(job: jobs.Job):
+        job.total_rows = database.estimate_row_count(config, table_name)
+        written = 0
+        with open(path, "wb") as out:
+            chunks = database.stream_export_data(config, table_name, format, mask_pii=masked,
+                                                 progress=lambda rows: job.progress(rows=rows, bytes=written),
+                                                 parquet_codec=codec, row_group_size=row_group_size,
+                                                 compression=compression, mongo_options=mongo_options)
+            for chunk in chunks:
+                data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                out.write(data)
+                written += len(data)
+        job.update(bytes=written)
+        return {"success": True, "filename": filename, "media_type": media_type, "bytes": written}
+
+    job = jobs.manager.submit("export", f"Export {table_name} as {format}", work, files=[path])
+    return {"job_id": job.id}
+
+def _get_job(job_id: str) -> jobs.Job:
+    job = jobs.manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs")
+def list_jobs():
+    return [job.snapshot() for job in jobs.manager.list()]
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    return _get_job(job_id).snapshot()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, interval: float = 0.5):
+    """Server-sent events: one progress snapshot per `interval` seconds
+    until the job finishes."""
+    job = _get_job(job_id)
+    interval = min(max(interval, 0.1), 10.0)
+
+    async def events():
+        while True:
+            snapshot = job.snapshot()
+            yield f"data: {json.dumps(snapshot, default=str)}\n\n"
+            if job.finished:
+                return
+            await asyncio.sleep(interval)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = _get_job(job_id)
+    if not jobs.manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+    return {"status": "cancelling"}
+
+@app.get("/jobs/{job_id}/download")
+def download_job_output(job_id: str):
+    job = _get_job(job_id)
+    if job.kind != "export":
+        raise HTTPException(status_code=400, detail="Only export jobs have output to download")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return FileResponse(job.files[0], media_type=job.result["media_type"], filename=job.result["filename"])
+
 if __name__ == "__main__":
     import uvicorn
     # Check if we are running in a PyInstaller bundle
@@ -22,6 +22,8 @@ class ConnectionConfig(BaseModel):
     ssh: Optional[SSHConfig] = None
     environment: Optional[str] = None  # e.g. 'development', 'staging', 'production' - UI hint only
     read_only: bool = False  # when true, the backend rejects mutating statements on this connection
+    schemas: Optional[List[str]] = None  # SQL schemas to reflect; None = default schema only, ["*"] = every non-system schema
+    allow_local_infile: bool = False  # MySQL: let imports use LOAD DATA LOCAL INFILE (see database.bulk_load_engine)
 
 class QueryRequest(BaseModel):
     connection_id: str
@@ -55,6 +57,7 @@ class ColumnInfo(BaseModel):
     type: str
     nullable: bool
     primary_key: bool
+    presence: Optional[float] = None  # MongoDB only: share of sampled documents that contain the field
 
 class ForeignKeyInfo(BaseModel):
     constrained_column: str
@@ -68,6 +71,7 @@ class IndexInfo(BaseModel):
 
 class TableSchema(BaseModel):
     name: str
+    db_schema: Optional[str] = None
     columns: List[ColumnInfo]
     foreign_keys: List[ForeignKeyInfo]
     indexes: List[IndexInfo] = []
@@ -108,6 +112,7 @@ class SyncRequest(BaseModel):
     target_connection_id: str
     mode: Optional[str] = "structure" # "structure", "data", "transfer"
     dry_run: bool = True
+    use_source_snapshot: bool = False # diff against the source's stored schema snapshot instead of connecting to it
 
 class ColumnDefinition(BaseModel):
     name: str
@@ -123,3 +128,23 @@ class AlterTableRequest(BaseModel):
     column_name: Optional[str] = None # Target column for drop/rename/alter
     new_column_name: Optional[str] = None # For rename
     column_def: Optional[ColumnDefinition] = None # For add/alter
+
+class ColumnMappingRule(BaseModel):
+    rename: Optional[str] = None # Target column name, defaults to the source name
+    skip: bool = False # Leave the source column out of the import
+    cast: Optional[str] = None # 'int', 'float', 'bool', 'date', 'datetime' or 'str'; inferred when omitted
+
+class MongoExportOptions(BaseModel):
+    filter: Optional[Dict[str, Any]] = None # Query document; defaults to the export's where_clause parsed as JSON
+    projection: Optional[Dict[str, Any]] = None # e.g. {"name": 1, "email": 1} or {"payload": 0}
+    sort: Optional[Dict[str, int]] = None # Field -> 1/-1, applied in the given order
+    batch_size: Optional[int] = None # Documents per cursor batch (and per serialized chunk)
+
+class QueryExportRequest(BaseModel):
+    sql: str # A single read-only statement
+    format: str = "csv"
+    masked: bool = False
+    compression: Optional[str] = None # 'gzip' or 'zstd'
+    codec: str = "snappy" # Parquet compression codec
+    row_group_size: Optional[int] = None
+    filename: Optional[str] = None # Download name without extension; defaults to "query"
@@ -5,7 +5,8 @@ import json
 from sqlalchemy import text, inspect
 from google import genai
 from models import ConnectionConfig
-from database import get_engine
+import bulk_load
+from database import get_engine, bulk_load_engine
 from typing import Dict, Any, List
 
 def get_generation_strategy(config: ConnectionConfig, table_name: str, api_key: str, model_name: str) -> Dict[str, Any]:
@@ -182,14 +183,12 @@ def hydrate_table(config: ConnectionConfig, table_name: str, count: int, api_key
     total_inserted = 0
     
     try:
-        with engine.begin() as conn:
+        with bulk_load_engine(config) as bulk_engine, bulk_engine.begin() as conn, bulk_load.tuned_for_bulk_load(conn):
             for i in range(0, len(data_to_insert), batch_size):
                 batch = data_to_insert[i:i+batch_size]
                 cols = list(batch[0].keys())
-                placeholders = ", ".join([f":{c}" for c in cols])
-                stmt = text(f"INSERT INTO {table_name} ({', '.join(cols)}) VALUES ({placeholders})")
-                conn.execute(stmt, batch)
-                total_inserted += len(batch)
+                rows = [tuple(row.get(c) for c in cols) for row in batch]
+                total_inserted += bulk_load.insert_rows(conn, table_name, cols, rows)
                 
         return {"success": True, "count": total_inserted}
     except Exception as e:
@@ -1,9 +1,10 @@
 import sqlglot
 from sqlglot import diff, transpile, parse_one, exp
-from sqlglot.diff import Insert, Remove, Update
+from sqlglot.diff import Insert, Keep, Remove, Update
 from sqlalchemy import inspect
-from database import get_engine
+from database import get_engine, resolve_schemas, reflect_schemas_in_parallel
 from models import ConnectionConfig
+import internal_db
 
 def get_dialect(conn_type: str) -> str:
     mapping = {
@@ -47,16 +48,29 @@ def translate_sql(sql: str, target_type: str, source_type: str = None) -> dict:
             "target_dialect": target_dialect,
         }
 
-def reflect_schema_to_sql(engine, dialect: str) -> str:
+def reflect_schema_to_sql(engine, dialect: str, schemas: list[str] = None) -> str:
     """
     Reflects the database schema and generates a sequence of CREATE TABLE statements.
+    With `schemas` (see database.resolve_schemas), each listed schema is
+    reflected concurrently and its tables are emitted schema-qualified,
+    except those of the default schema: they stay unqualified, so they match
+    the other side of a diff whether or not it lists its schemas.
     """
     inspector = inspect(engine)
+    schema_names = resolve_schemas(inspector, schemas)
+    default_schema = inspector.default_schema_name
+    per_schema = reflect_schemas_in_parallel(
+        engine, inspector, schema_names,
+        lambda schema_inspector, schema: _reflect_schema_ddl(schema_inspector, schema, default_schema),
+    )
+    return "\n\n".join(stmt for statements in per_schema for stmt in statements)
+
+def _reflect_schema_ddl(inspector, schema: str = None, default_schema: str = None) -> list[str]:
     ddl_statements = []
     
-    for table_name in inspector.get_table_names():
-        columns = inspector.get_columns(table_name)
-        pk_constraint = inspector.get_pk_constraint(table_name)
+    for table_name in inspector.get_table_names(schema=schema):
+        columns = inspector.get_columns(table_name, schema=schema)
+        pk_constraint = inspector.get_pk_constraint(table_name, schema=schema)
         pks = pk_constraint.get('constrained_columns', [])
         
         column_defs = []
@@ -78,10 +92,11 @@ def reflect_schema_to_sql(engine, dialect: str) -> str:
             column_defs.append(f"PRIMARY KEY ({', '.join(pks)})")
             
         column_defs_str = ",\n  ".join(column_defs)
-        create_table = f"CREATE TABLE {table_name} (\n  {column_defs_str}\n);"
+        qualified_name = f"{schema}.{table_name}" if schema and schema != default_schema else table_name
+        create_table = f"CREATE TABLE {qualified_name} (\n  {column_defs_str}\n);"
         ddl_statements.append(create_table)
         
-    return "\n\n".join(ddl_statements)
+    return ddl_statements
 
 def generate_alter_statements(table_name: str, target_expr: exp.Create, source_expr: exp.Create, dialect: str) -> list[str]:
     """
@@ -130,9 +145,10 @@ def generate_alter_statements(table_name: str, target_expr: exp.Create, source_e
 from typing import List
 from models import ConnectionConfig, TableSchema
 
-def schema_to_ddl(schemas: List[TableSchema], dialect: str) -> str:
+def schema_to_ddl(schemas: List[TableSchema], dialect: str, default_schema: str = None) -> str:
     """
     Converts a list of TableSchema objects into a sequence of CREATE TABLE statements.
+    Tables in `default_schema` are left unqualified, as in reflect_schema_to_sql().
     """
     ddl_statements = []
     for schema in schemas:
@@ -155,12 +171,13 @@ def schema_to_ddl(schemas: List[TableSchema], dialect: str) -> str:
             column_defs.append(f"PRIMARY KEY ({', '.join(pks)})")
             
         column_defs_str = ",\n  ".join(column_defs)
-        create_table = f"CREATE TABLE {schema.name} (\n  {column_defs_str}\n);"
+        qualified_name = f"{schema.db_schema}.{schema.name}" if schema.db_schema and schema.db_schema != default_schema else schema.name
+        create_table = f"CREATE TABLE {qualified_name} (\n  {column_defs_str}\n);"
         ddl_statements.append(create_table)
         
     return "\n\n".join(ddl_statements)
 
-def diff_provided_schema_to_db(desired_schema: List[TableSchema], target_config: ConnectionConfig) -> dict:
+def diff_provided_schema_to_db(desired_schema: List[TableSchema], target_config: ConnectionConfig, source_name: str = "Visual Model") -> dict:
     """
     Compares a provided schema list (from visual editor) against a target database.
     """
@@ -168,18 +185,25 @@ def diff_provided_schema_to_db(desired_schema: List[TableSchema], target_config:
         target_engine = get_engine(target_config)
         target_dialect = get_dialect(target_config.type)
         
-        # Source is our visual model converted to DDL
-        source_ddl = schema_to_ddl(desired_schema, target_dialect)
+        # Source is our visual model converted to DDL (a snapshot taken with
+        # schemas listed names the default schema; the target's is assumed)
+        source_ddl = schema_to_ddl(desired_schema, target_dialect, inspect(target_engine).default_schema_name)
         # Target is the current DB state
-        target_ddl = reflect_schema_to_sql(target_engine, target_dialect)
+        target_ddl = reflect_schema_to_sql(target_engine, target_dialect, target_config.schemas)
         
         source_dialect = target_dialect # They match since we generated it for target
         
-        return _perform_diff(source_ddl, target_ddl, source_dialect, target_dialect, "Visual Model", target_config.name)
+        return _perform_diff(source_ddl, target_ddl, source_dialect, target_dialect, source_name, target_config.name)
     except Exception as e:
         import traceback
         return {"sql_text": f"-- Error: {str(e)}\n-- {traceback.format_exc()}", "statements": []}
 
+def _qualified_table_name(create_expr: exp.Create) -> str:
+    # Tables are matched by schema-qualified name so same-named tables in
+    # different schemas (multi-schema reflection) don't collide.
+    table = create_expr.this.this if isinstance(create_expr.this, exp.Schema) else create_expr.this
+    return f"{table.db}.{table.name}".lower() if table.db else table.name.lower()
+
 def _perform_diff(source_ddl: str, target_ddl: str, source_dialect: str, target_dialect: str, source_name: str, target_name: str) -> dict:
     header = [
         f"-- Migration from {source_name} to {target_name}",
@@ -201,8 +225,7 @@ def _perform_diff(source_ddl: str, target_ddl: str, source_dialect: str, target_
     target_tables = {}
     for expr in target_exprs:
         if isinstance(expr, exp.Create) and isinstance(expr.this, (exp.Table, exp.Schema)):
-            t_name = expr.this.this.name.lower() if isinstance(expr.this, exp.Schema) else expr.this.name.lower()
-            target_tables[t_name] = expr
+            target_tables[_qualified_table_name(expr)] = expr
     
     final_sql_parts = []
     execution_statements = []
@@ -211,8 +234,7 @@ def _perform_diff(source_ddl: str, target_ddl: str, source_dialect: str, target_
         if not isinstance(s_expr, exp.Create) or not isinstance(s_expr.this, (exp.Table, exp.Schema)):
             continue
             
-        s_table = s_expr.this.this if isinstance(s_expr.this, exp.Schema) else s_expr.this
-        table_name = s_table.name.lower()
+        table_name = _qualified_table_name(s_expr)
         
         if table_name not in target_tables:
             transpiled = transpile(s_expr.sql(), read=source_dialect, write=target_dialect, pretty=True)[0]
@@ -220,7 +242,8 @@ def _perform_diff(source_ddl: str, target_ddl: str, source_dialect: str, target_
             execution_statements.append(transpiled)
         else:
             t_expr = target_tables[table_name]
-            changes = diff(t_expr, s_expr)
+            # diff() also lists the unchanged nodes (Keep)
+            changes = [c for c in diff(t_expr, s_expr) if not isinstance(c, Keep)]
             if changes:
                 alter_stmts = generate_alter_statements(table_name, t_expr, s_expr, target_dialect)
                 if alter_stmts:
@@ -249,8 +272,8 @@ def diff_schemas(source_config: ConnectionConfig, target_config: ConnectionConfi
         source_dialect = get_dialect(source_config.type)
         target_dialect = get_dialect(target_config.type)
         
-        source_ddl = reflect_schema_to_sql(source_engine, source_dialect)
-        target_ddl = reflect_schema_to_sql(target_engine, target_dialect)
+        source_ddl = reflect_schema_to_sql(source_engine, source_dialect, source_config.schemas)
+        target_ddl = reflect_schema_to_sql(target_engine, target_dialect, target_config.schemas)
         
         return _perform_diff(source_ddl, target_ddl, source_dialect, target_dialect, source_config.name, target_config.name)
         
@@ -258,12 +281,27 @@ def diff_schemas(source_config: ConnectionConfig, target_config: ConnectionConfi
         import traceback
         return {"sql_text": f"-- Error: {str(e)}\n-- {traceback.format_exc()}", "statements": []}
 
-def sync_schemas(source_config: ConnectionConfig, target_config: ConnectionConfig, dry_run: bool = True):
+def diff_snapshot_to_db(source_config: ConnectionConfig, target_config: ConnectionConfig) -> dict:
+    """
+    Like diff_schemas(), but the source side is the schema snapshot stored for
+    source_config (see internal_db.save_schema_snapshot) rather than a live
+    reflection, so the source database doesn't have to be reachable.
+    """
+    snapshot = internal_db.get_schema_snapshot(source_config.id)
+    if snapshot is None:
+        return {"sql_text": f"-- Error: No schema snapshot stored for {source_config.name}. Open its schema once to capture one.", "statements": []}
+    desired_schema = [TableSchema(**s) for s in snapshot["schemas"]]
+    return diff_provided_schema_to_db(desired_schema, target_config, f"{source_config.name} (snapshot v{snapshot['version']})")
+
+def sync_schemas(source_config: ConnectionConfig, target_config: ConnectionConfig, dry_run: bool = True, use_source_snapshot: bool = False):
     """
     Execute the sync process.
     """
     from sqlalchemy import text
-    result = diff_schemas(source_config, target_config)
+    if use_source_snapshot:
+        result = diff_snapshot_to_db(source_config, target_config)
+    else:
+        result = diff_schemas(source_config, target_config)
     sql_text = result["sql_text"]
     statements = result["statements"]
     
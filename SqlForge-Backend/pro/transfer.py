@@ -3,7 +3,8 @@ import json
 import redis
 from pymongo import MongoClient
 from sqlalchemy import text, inspect
-from database import get_engine, validate_identifier
+import bulk_load
+from database import get_engine, validate_identifier, bulk_load_engine
 from models import ConnectionConfig
 
 logger = logging.getLogger(__name__)
@@ -77,22 +78,16 @@ def write_data_to_target(config: ConnectionConfig, table_name: str, rows: list[d
 
     # SQL
     validate_identifier(table_name, "table name")
-    engine = get_engine(config)
     columns = list(rows[0].keys())
     # SQL tables don't like MongoDB's _id or Redis specific keys usually
     columns = [c for c in columns if c not in ['_id', '_key']]
     for col in columns:
         validate_identifier(col, "column name")
 
-    placeholders = ", ".join([f":{col}" for col in columns])
-    insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
-    
-    with engine.begin() as conn:
+    with bulk_load_engine(config) as engine, engine.begin() as conn, bulk_load.tuned_for_bulk_load(conn):
         # Filter rows to only contain relevant columns
-        filtered_rows = []
-        for r in rows:
-            filtered_rows.append({col: r.get(col) for col in columns})
-        conn.execute(text(insert_sql), filtered_rows)
+        filtered_rows = [tuple(r.get(col) for col in columns) for r in rows]
+        bulk_load.insert_rows(conn, table_name, columns, filtered_rows)
     return len(rows)
 
 def transfer_data(
@@ -0,0 +1,135 @@
+import sqlite3
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+import bulk_load
+import database
+from database import import_data
+from models import ConnectionConfig
+
+
+def make_conn(dialect, dbapi_conn=None):
+    conn = MagicMock()
+    conn.dialect.name = dialect
+    conn.connection.info = {}
+    conn.connection.dbapi_connection = dbapi_conn or MagicMock()
+    return conn
+
+
+def test_postgres_uses_copy_with_escaped_text_format():
+    conn = make_conn("postgresql")
+    cursor = conn.connection.dbapi_connection.cursor.return_value
+    captured = {}
+    cursor.copy_expert.side_effect = lambda sql, buf: captured.update(sql=sql, data=buf.read())
+
+    rows = [(1, "tab\there", None, True), (2, "back\\slash\nnl", b"\x01\xff", False)]
+    assert bulk_load.insert_rows(conn, "people", ["id", "name", "blob", "active"], rows) == 2
+
+    assert captured["sql"] == "COPY people (id, name, blob, active) FROM STDIN"
+    assert captured["data"] == (
+        "1\ttab\\there\t\\N\tt\n"
+        "2\tback\\\\slash\\nnl\t\\\\x01ff\tf\n"
+    )
+    conn.execute.assert_not_called()
+
+
+def test_mysql_load_data_requires_local_infile_connection():
+    dbapi_conn = MagicMock()
+    dbapi_conn._local_infile = True
+    conn = make_conn("mysql", dbapi_conn)
+    captured = {}
+
+    def fake_execute(sql, params):
+        with open(params[0], encoding="utf-8") as f:
+            captured.update(sql=sql, data=f.read())
+
+    dbapi_conn.cursor.return_value.execute.side_effect = fake_execute
+    assert bulk_load.insert_rows(conn, "people", ["id", "name"], [(1, "Ann"), (2, None)]) == 2
+    assert captured["sql"].startswith("LOAD DATA LOCAL INFILE %s INTO TABLE people")
+    assert captured["data"] == "1\tAnn\n2\t\\N\n"
+
+
+def test_fast_path_unavailable_falls_back_to_executemany_and_is_remembered():
+    dbapi_conn = MagicMock()
+    dbapi_conn._local_infile = False
+    conn = make_conn("mysql", dbapi_conn)
+
+    bulk_load.insert_rows(conn, "people", ["id", "name"], [(1, "Ann")])
+    bulk_load.insert_rows(conn, "people", ["id", "name"], [(2, "Bob")])
+
+    assert conn.connection.info["bulk_load_unavailable"] is True
+    assert conn.execute.call_count == 2
+    assert conn.execute.call_args[0][1] == [{"id": 2, "name": "Bob"}]
+
+
+def test_errors_after_a_fast_path_started_are_not_retried():
+    conn = make_conn("postgresql")
+    conn.connection.dbapi_connection.cursor.return_value.copy_expert.side_effect = Exception("duplicate key")
+    with pytest.raises(Exception, match="duplicate key"):
+        bulk_load.insert_rows(conn, "people", ["id"], [(1,)])
+    conn.execute.assert_not_called()
+
+
+def test_mssql_bulk_copy_maps_columns_to_ordinals():
+    conn = make_conn("mssql")
+    conn.execute.return_value = [("id", 1), ("Name", 2)]
+    bulk_load.insert_rows(conn, "people", ["name", "id"], [("Ann", 1)])
+    conn.connection.dbapi_connection.bulk_copy.assert_called_once_with(
+        "people", [("Ann", 1)], column_ids=[2, 1], batch_size=1
+    )
+
+
+def test_sqlite_pragmas_are_tuned_for_the_load_and_restored(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (a INTEGER, b TEXT)")
+
+    with engine.begin() as conn:
+        before = conn.exec_driver_sql("PRAGMA cache_size").scalar()
+        with bulk_load.tuned_for_bulk_load(conn):
+            assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+            bulk_load.insert_rows(conn, "t", ["a", "b"], [(i, str(i)) for i in range(500)])
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == before
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM t").scalar() == 500
+    engine.dispose()
+
+
+def test_import_data_goes_through_bulk_loader(tmp_path):
+    db_file = str(tmp_path / "bulk_import.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE people (id INTEGER, name TEXT)")
+    conn.commit()
+    conn.close()
+    config = ConnectionConfig(id="bulk-import", name="bulk", type="sqlite", database="bulk.db", filepath=db_file)
+    database.dispose_engine("bulk-import")
+
+    data = "id,name\n" + "".join(f"{i},n{i}\n" for i in range(2500))
+    with patch("bulk_load.insert_rows", wraps=bulk_load.insert_rows) as spy:
+        result = import_data(config, "people", data.encode("utf-8"), "csv")
+    database.dispose_engine("bulk-import")
+
+    assert result["success"], result
+    assert spy.call_count == 3
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT COUNT(*) FROM people").fetchone()[0] == 2500
+    conn.close()
+
+
+def test_mysql_bulk_load_engine_enables_local_infile_only_when_allowed():
+    config = ConnectionConfig(id="bulk-mysql", name="m", type="mysql", host="h", port=3306, username="u",
+                              password="p", database="d")
+    with patch("database.create_engine") as create:
+        with database.bulk_load_engine(config) as engine:
+            assert engine is create.return_value
+        assert create.call_args.kwargs["connect_args"] == {"connect_timeout": 5}
+        engine.dispose.assert_not_called()
+    database.dispose_engine(config.id)
+
+    config.allow_local_infile = True
+    with patch("database.create_engine") as create:
+        with database.bulk_load_engine(config) as engine:
+            assert engine is create.return_value
+        assert create.call_args.kwargs["connect_args"] == {"connect_timeout": 5, "local_infile": True}
+        engine.dispose.assert_called_once()
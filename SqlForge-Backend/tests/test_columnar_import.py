@@ -0,0 +1,107 @@
+import datetime
+import io
+import sqlite3
+import pytest
+from unittest.mock import patch
+import database
+from database import import_data, iter_import_rows
+from models import ColumnMappingRule, ConnectionConfig
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    db_file = str(tmp_path / "columnar.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE events (id INTEGER, name TEXT, score REAL, happened TIMESTAMP)")
+    conn.commit()
+    conn.close()
+    database.dispose_engine("columnar-import")
+    yield ConnectionConfig(id="columnar-import", name="columnar", type="sqlite", database="c.db", filepath=db_file)
+    database.dispose_engine("columnar-import")
+
+
+def make_table(n):
+    return pa.table({
+        "id": pa.array(range(n), pa.int64()),
+        "name": pa.array([f"n{i}" if i % 3 else None for i in range(n)]),
+        "score": pa.array([i / 2 for i in range(n)], pa.float64()),
+        "happened": pa.array([datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=i) for i in range(n)], pa.timestamp("us")),
+    })
+
+
+def parquet_bytes(table, row_group_size):
+    buf = io.BytesIO()
+    pq.write_table(table, buf, row_group_size=row_group_size)
+    return buf.getvalue()
+
+
+def ipc_bytes(table, stream_format=False):
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, table.schema) if stream_format else pa.ipc.new_file(sink, table.schema)
+    writer.write_table(table, max_chunksize=2500)
+    writer.close()
+    return sink.getvalue()
+
+
+def read_events(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT id, typeof(id), name, score, happened FROM events ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+def test_parquet_import_feeds_row_groups_to_the_bulk_loader(sqlite_config):
+    data = parquet_bytes(make_table(2500), row_group_size=1000)
+    with patch("bulk_load.insert_rows", wraps=database.bulk_load.insert_rows) as insert, \
+         patch("database.iter_import_rows", side_effect=AssertionError("per-row dict path used")):
+        result = import_data(sqlite_config, "events", io.BytesIO(data), "parquet")
+
+    assert result["success"], result
+    assert insert.call_count == 3
+    columns, rows = insert.call_args_list[0][0][2], insert.call_args_list[0][0][3]
+    assert columns == ["id", "name", "score", "happened"]
+    assert isinstance(rows[0], tuple)
+
+    rows = read_events(sqlite_config.filepath)
+    assert len(rows) == 2500
+    assert rows[1] == (1, "integer", "n1", 0.5, "2024-01-01 00:01:00")
+    assert rows[0][2] is None
+
+
+@pytest.mark.parametrize("stream_format", [False, True])
+def test_arrow_ipc_file_and_stream_formats(sqlite_config, stream_format):
+    data = ipc_bytes(make_table(5000), stream_format=stream_format)
+    with patch("database.IMPORT_BATCH_SIZE", 1000), \
+         patch("bulk_load.insert_rows", wraps=database.bulk_load.insert_rows) as insert:
+        result = import_data(sqlite_config, "events", data, "arrow")
+
+    assert result["success"], result
+    # 2500-row record batches are sliced into bounded inserts
+    assert max(len(call[0][3]) for call in insert.call_args_list) == 1000
+    assert len(read_events(sqlite_config.filepath)) == 5000
+
+
+def test_mapping_renames_skips_and_casts_with_arrow(sqlite_config):
+    table = pa.table({"event_id": pa.array(["1", "2"]), "junk": pa.array([1, 2]), "score": pa.array([1, 2], pa.int32())})
+    mapping = {
+        "event_id": ColumnMappingRule(rename="id", cast="int"),
+        "junk": ColumnMappingRule(skip=True),
+        "score": ColumnMappingRule(cast="float"),
+    }
+    result = import_data(sqlite_config, "events", parquet_bytes(table, 10), "parquet", mapping=mapping)
+    assert result["success"], result
+    assert read_events(sqlite_config.filepath) == [(1, "integer", None, 1.0, None), (2, "integer", None, 2.0, None)]
+
+    bad = pa.table({"id": pa.array(["x"])})
+    result = import_data(sqlite_config, "events", parquet_bytes(bad, 10), "parquet", mapping={"id": {"cast": "int"}})
+    assert not result["success"]
+    assert "Column 'id': cannot convert" in result["error"]
+
+
+def test_columnar_rows_for_nosql_targets():
+    rows = list(iter_import_rows(parquet_bytes(make_table(3), 2), "parquet"))
+    assert [r["id"] for r in rows] == [0, 1, 2]
+    assert rows[1]["name"] == "n1"
@@ -0,0 +1,62 @@
+import gzip
+import io
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+import database
+import internal_db
+from database import compress_export_stream, stream_export_data
+from main import app
+from models import ConnectionConfig
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    internal_db.init_db()
+    db_file = str(tmp_path / "compressed.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE events (id INTEGER, kind TEXT)")
+    conn.executemany("INSERT INTO events VALUES (?, ?)", [(i, "click" if i % 2 else "view") for i in range(20000)])
+    conn.commit()
+    conn.close()
+    config = ConnectionConfig(id="compressed-export", name="c", type="sqlite", database="c.db", filepath=db_file)
+    internal_db.save_connection(config)
+    database.dispose_engine("compressed-export")
+    yield config
+    database.dispose_engine("compressed-export")
+    internal_db.delete_connection("compressed-export")
+
+
+def test_gzip_stream_round_trips_and_is_smaller(sqlite_config):
+    plain = "".join(stream_export_data(sqlite_config, "events", "csv")).encode("utf-8")
+    chunks = list(stream_export_data(sqlite_config, "events", "csv", compression="gzip"))
+
+    assert all(isinstance(c, bytes) for c in chunks)
+    compressed = b"".join(chunks)
+    assert gzip.decompress(compressed) == plain
+    assert len(compressed) < len(plain) / 3
+
+
+def test_zstd_stream_round_trips():
+    zstandard = pytest.importorskip("zstandard")
+    chunks = ["a,b\n", b"1,2\n", "3,4\n"]
+    data = b"".join(compress_export_stream(iter(chunks), "zstd"))
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(data) == b"a,b\n1,2\n3,4\n"
+
+
+def test_unknown_compression_fails_before_streaming(sqlite_config):
+    with pytest.raises(ValueError):
+        stream_export_data(sqlite_config, "events", "csv", compression="rar")
+
+
+def test_endpoint_sets_compressed_download_headers(sqlite_config):
+    response = client.get("/connections/compressed-export/export/events", params={"format": "json", "compression": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"] == "attachment; filename=events.json.gz"
+    assert gzip.decompress(response.content).startswith(b"[\n")
+
+    response = client.get("/connections/compressed-export/export/events", params={"compression": "rar"})
+    assert response.status_code == 400
@@ -0,0 +1,139 @@
+import datetime
+import decimal
+import io
+import pytest
+from unittest.mock import patch
+from dbfread import DBF
+from sqlalchemy import Boolean, Column, Date, DateTime, Integer, MetaData, Numeric, String, Table, Text, create_engine
+import database
+from database import _dbf_field_names, stream_export_data, stream_query_export
+from models import ConnectionConfig
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    db_file = str(tmp_path / "dbf_export.db")
+    engine = create_engine(f"sqlite:///{db_file}")
+    metadata = MetaData()
+    customers = Table(
+        "customers", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("customer_name", String(12)),
+        Column("customer_notes", Text),
+        Column("balance", Numeric(8, 2)),
+        Column("active", Boolean),
+        Column("joined", Date),
+        Column("last_seen", DateTime),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(customers.insert(), [
+            {"id": i, "customer_name": "Zoë Longname-Smith" if i == 1 else f"c{i}", "customer_notes": "n" * 300,
+             "balance": decimal.Decimal("12.345") + i, "active": i % 2 == 0, "joined": datetime.date(2024, 1, 1),
+             "last_seen": datetime.datetime(2024, 5, 1, 12, 30) if i % 3 else None}
+            for i in range(1, 1201)
+        ])
+    engine.dispose()
+    database.dispose_engine("dbf-export")
+    yield ConnectionConfig(id="dbf-export", name="d", type="sqlite", database="d.db", filepath=db_file)
+    database.dispose_engine("dbf-export")
+
+
+def read_dbf(chunks, tmp_path):
+    path = tmp_path / "out.dbf"
+    path.write_bytes(b"".join(chunks))
+    return DBF(str(path), encoding="utf-8")
+
+
+def test_dbf_export_writes_typed_fields_from_the_reflected_table(sqlite_config, tmp_path):
+    with patch("database.EXPORT_BATCH_SIZE", 500), patch("database.EXPORT_CHUNK_SIZE", 8192):
+        chunks = list(stream_export_data(sqlite_config, "customers", "dbf"))
+    assert len(chunks) > 1
+    table = read_dbf(chunks, tmp_path)
+
+    fields = {f.name: (f.type, f.length, f.decimal_count) for f in table.fields}
+    assert fields == {
+        "ID": ("N", 20, 0),
+        "CUSTOMER_N": ("C", 12, 0),
+        "CUSTOMER_1": ("C", 254, 0),
+        "BALANCE": ("N", 10, 2),
+        "ACTIVE": ("L", 1, 0),
+        "JOINED": ("D", 8, 0),
+        "LAST_SEEN": ("C", 32, 0),
+    }
+    records = list(table)
+    assert len(records) == 1200
+    first = records[0]
+    assert first["ID"] == 1
+    assert first["CUSTOMER_N"] == "Zoë Longnam"  # 12 bytes, cut on a character boundary
+    assert first["CUSTOMER_1"] == "n" * 254
+    assert first["BALANCE"] == pytest.approx(13.35, abs=0.006)
+    assert first["ACTIVE"] is False
+    assert first["JOINED"] == datetime.date(2024, 1, 1)
+    assert first["LAST_SEEN"].startswith("2024-05-01")
+    assert records[2]["LAST_SEEN"] == ""
+
+
+def test_query_export_infers_fields_and_masks(sqlite_config, tmp_path):
+    chunks = stream_query_export(sqlite_config, "SELECT id, customer_name, balance * 2 AS doubled FROM customers",
+                                 "dbf", mask_pii=True)
+    table = read_dbf(chunks, tmp_path)
+    fields = {f.name: f.type for f in table.fields}
+    assert fields == {"ID": "N", "CUSTOMER_N": "C", "DOUBLED": "N"}
+    record = next(iter(table))
+    assert record["CUSTOMER_N"] != "Zoë Longname-Smith" and record["CUSTOMER_N"]
+
+
+def test_query_export_moves_a_column_to_text_rather_than_truncate(sqlite_config, tmp_path):
+    query = "SELECT id, CASE WHEN id > 600 THEN id / 4.0 ELSE id END AS v FROM customers ORDER BY id"
+    with patch("database.EXPORT_BATCH_SIZE", 500):
+        table = read_dbf(stream_query_export(sqlite_config, query, "dbf"), tmp_path)
+    assert [(f.name, f.type, f.decimal_count) for f in table.fields] == [("ID", "N", 0), ("V", "C", 0)]
+    records = list(table)
+    assert len(records) == 1200
+    assert (records[0]["ID"], records[0]["V"]) == (1, "1")
+    assert records[600]["V"] == "150.25"
+
+
+def test_big_integers_and_wide_numerics_fit(tmp_path):
+    db_file = str(tmp_path / "wide.db")
+    engine = create_engine(f"sqlite:///{db_file}")
+    metadata = MetaData()
+    ledger = Table("ledger", metadata, Column("id", Integer, primary_key=True), Column("big", Integer),
+                   Column("amount", Numeric(38, 10)))
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(ledger.insert(), [{"id": 1, "big": 123456789012345678, "amount": decimal.Decimal("12345678901.5")}])
+    engine.dispose()
+    config = ConnectionConfig(id="dbf-wide", name="w", type="sqlite", database="w.db", filepath=db_file)
+    database.dispose_engine("dbf-wide")
+    try:
+        table = read_dbf(stream_query_export(config, "SELECT id, big FROM ledger", "dbf"), tmp_path)
+        # More digits than the dbf library writes exactly: kept as text
+        assert [f.type for f in table.fields] == ["N", "C"]
+        assert next(iter(table))["BIG"] == "123456789012345678"
+
+        (tmp_path / "out.dbf").unlink()
+        table = read_dbf(stream_export_data(config, "ledger", "dbf"), tmp_path)
+        assert {f.name: (f.type, f.length, f.decimal_count) for f in table.fields}["AMOUNT"] == ("C", 40, 0)
+        assert float(next(iter(table))["AMOUNT"]) == 12345678901.5
+    finally:
+        database.dispose_engine("dbf-wide")
+
+
+def test_numeric_fields_keep_their_integer_digits():
+    assert database._dbf_field_spec(Numeric(38, 10), []) == ("N", 20, 0)
+    assert database._dbf_field_spec(Numeric(12, 4), []) == ("N", 14, 4)
+    assert database._dbf_field_spec(None, [1.5, 12345678901234.0]) == ("N", 20, 4)
+    assert database._dbf_value(decimal.Decimal("3.00"), ("N", 20, 0), "n") == 3
+    assert database._dbf_value(123456789012345, ("N", 20, 0), "n") == 123456789012345
+    for value, spec in [(2.5, ("N", 20, 0)), (12345678901234.5, ("N", 20, 6)), (float("nan"), ("N", 20, 6)),
+                        (1234567890123456, ("N", 20, 0))]:
+        with pytest.raises(database._DbfNumberDoesNotFit):
+            database._dbf_value(value, spec, "n")
+
+
+def test_field_names_are_short_unique_and_valid():
+    assert _dbf_field_names(["order total", "order_totals", "order_total_x", "1st", "a"]) == [
+        "ORDER_TOTA", "ORDER_TO_1", "ORDER_TO_2", "F1ST", "A",
+    ]
@@ -0,0 +1,53 @@
+import datetime
+import io
+import sqlite3
+import pytest
+from unittest.mock import patch
+from openpyxl import load_workbook
+import database
+from database import _excel_cell, stream_export_data
+from models import ConnectionConfig
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    db_file = str(tmp_path / "excel_export.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE people (id INTEGER, email TEXT, score REAL)")
+    conn.executemany("INSERT INTO people VALUES (?, ?, ?)", [(i, f"user{i}@example.com", i / 4) for i in range(3000)])
+    conn.commit()
+    conn.close()
+    database.dispose_engine("excel-export")
+    yield ConnectionConfig(id="excel-export", name="x", type="sqlite", database="x.db", filepath=db_file)
+    database.dispose_engine("excel-export")
+
+
+def test_excel_export_is_written_without_pandas_and_streamed_in_chunks(sqlite_config):
+    with patch("database.EXPORT_CHUNK_SIZE", 4096), patch("database.EXPORT_BATCH_SIZE", 500), \
+         patch("pandas.DataFrame", side_effect=AssertionError("pandas used")):
+        chunks = list(stream_export_data(sqlite_config, "people", "xlsx"))
+
+    assert len(chunks) > 1
+    assert all(len(c) <= 4096 for c in chunks)
+    ws = load_workbook(io.BytesIO(b"".join(chunks)), read_only=True).active
+    rows = list(ws.iter_rows(values_only=True))
+    assert rows[0] == ("id", "email", "score")
+    assert rows[1] == (0, "user0@example.com", 0)
+    assert rows[-1] == (2999, "user2999@example.com", 749.75)
+    assert len(rows) == 3001
+
+
+def test_masked_excel_export(sqlite_config):
+    data = b"".join(stream_export_data(sqlite_config, "people", "excel", mask_pii=True))
+    rows = list(load_workbook(io.BytesIO(data), read_only=True).active.iter_rows(values_only=True))
+    assert rows[1][0] == 0
+    assert rows[1][1].endswith("@example.com") and not rows[1][1].startswith("user0")
+
+
+def test_cells_are_coerced_to_types_openpyxl_accepts():
+    aware = datetime.datetime(2024, 1, 1, 12, tzinfo=datetime.timezone(datetime.timedelta(hours=2)))
+    assert _excel_cell(aware) == datetime.datetime(2024, 1, 1, 10)
+    assert _excel_cell({"a": 1}) == '{"a": 1}'
+    assert _excel_cell(b"\x01\xff") == "01ff"
+    assert _excel_cell("bell\x07") == "bell"
+    assert _excel_cell(3) == 3
@@ -0,0 +1,62 @@
+import datetime
+import io
+import sqlite3
+import pytest
+from unittest.mock import patch
+from openpyxl import Workbook
+import database
+from database import import_data, iter_import_rows
+from models import ConnectionConfig
+
+
+def workbook_bytes(rows):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_rows_are_streamed_with_openpyxl_not_pandas():
+    data = workbook_bytes([
+        ["id", "name", None, "joined"],
+        [1, "Ann", "x", datetime.datetime(2024, 5, 1, 9, 30)],
+        [None, None, None, None],
+        [2, "", None],
+    ])
+    with patch("pandas.read_excel", side_effect=AssertionError("pandas used")):
+        rows = list(iter_import_rows(data, "xlsx"))
+
+    assert rows == [
+        {"id": 1, "name": "Ann", "column_3": "x", "joined": datetime.datetime(2024, 5, 1, 9, 30)},
+        {"id": 2, "name": None, "column_3": None, "joined": None},
+    ]
+
+
+def test_rows_are_produced_lazily():
+    data = workbook_bytes([["id"]] + [[i] for i in range(5000)])
+    rows = iter_import_rows(io.BytesIO(data), "excel")
+    assert next(rows) == {"id": 0}
+    assert next(rows) == {"id": 1}
+    rows.close()
+
+
+def test_excel_import_into_sqlite(tmp_path):
+    db_file = str(tmp_path / "excel.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE scores (id INTEGER, player TEXT, score REAL)")
+    conn.commit()
+    conn.close()
+    config = ConnectionConfig(id="excel-import", name="x", type="sqlite", database="x.db", filepath=db_file)
+    database.dispose_engine("excel-import")
+
+    data = workbook_bytes([["id", "player", "score"]] + [[i, f"p{i}", i * 1.5] for i in range(2500)])
+    result = import_data(config, "scores", io.BytesIO(data), "excel")
+    database.dispose_engine("excel-import")
+
+    assert result["success"], result
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT COUNT(*), SUM(id), MAX(score) FROM scores").fetchone() == (2500, sum(range(2500)), 2499 * 1.5)
+    conn.close()
@@ -0,0 +1,142 @@
+import io
+import json
+import sqlite3
+import pytest
+from unittest.mock import patch
+from sqlalchemy import Integer, String
+from fastapi.testclient import TestClient
+import database
+import internal_db
+from column_mapping import ImportPlan, infer_column_type
+from database import import_data
+from main import app
+from models import ColumnMappingRule, ConnectionConfig
+import pandas as pd
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    db_file = str(tmp_path / "typed.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE orders (id INTEGER, zip VARCHAR(10), code TEXT, amount REAL, paid BOOLEAN, placed DATE)")
+    conn.commit()
+    conn.close()
+    database.dispose_engine("typed-import")
+    yield ConnectionConfig(id="typed-import", name="typed", type="sqlite", database="typed.db", filepath=db_file)
+    database.dispose_engine("typed-import")
+
+
+def test_inference_from_sampled_text_values():
+    assert infer_column_type(pd.Series(["1", "-20", None], dtype=object)) == "int"
+    assert infer_column_type(pd.Series(["01234", "99999"], dtype=object)) == "str"
+    assert infer_column_type(pd.Series(["1.5", "2"], dtype=object)) == "float"
+    assert infer_column_type(pd.Series(["true", "False"], dtype=object)) == "bool"
+    assert infer_column_type(pd.Series(["2024-01-02", None], dtype=object)) == "date"
+    assert infer_column_type(pd.Series(["2024-01-02T10:00:00Z"], dtype=object)) == "datetime"
+    assert infer_column_type(pd.Series(["abc", "1"], dtype=object)) == "str"
+    # Already typed (JSON) or empty columns pass through untouched
+    assert infer_column_type(pd.Series([1, None], dtype=object)) is None
+    assert infer_column_type(pd.Series([None, None], dtype=object)) is None
+
+
+def test_plan_renames_skips_casts_and_keeps_text_targets_as_strings():
+    sample = [
+        {"order_id": "1", "zip": "10001", "note": "x", "total": "3"},
+        {"order_id": "2", "zip": "20002", "note": "y", "total": "4.5"},
+    ]
+    plan = ImportPlan.from_sample(
+        sample,
+        {"order_id": ColumnMappingRule(rename="id"), "note": ColumnMappingRule(skip=True),
+         "total": ColumnMappingRule(rename="amount", cast="float")},
+        target_types={"ZIP": String(10)},
+    )
+    assert plan.columns == ["id", "zip", "amount"]
+    assert plan.casts == ["int", None, "float"]
+    assert plan.convert(sample) == [(1, "10001", 3.0), (2, "20002", 4.5)]
+
+
+def test_plan_rejects_unknown_mapping_columns_and_bad_casts():
+    sample = [{"a": "1"}]
+    with pytest.raises(ValueError, match="unknown column"):
+        ImportPlan.from_sample(sample, {"b": ColumnMappingRule(skip=True)})
+    with pytest.raises(ValueError, match="Unsupported cast"):
+        ImportPlan.from_sample(sample, {"a": ColumnMappingRule(cast="money")})
+    with pytest.raises(ValueError, match="cannot convert 'x' to int"):
+        ImportPlan.from_sample([{"a": "x"}], {"a": ColumnMappingRule(cast="int")})
+
+
+def test_inferred_casts_widen_but_target_and_mapping_casts_are_enforced():
+    plan = ImportPlan.from_sample([{"n": "1"}, {"n": "2"}])
+    assert plan.convert([{"n": "2.5"}]) == [(2.5,)]
+    assert plan.casts == ["float"]
+    assert plan.convert([{"n": "n/a"}, {"n": "3"}]) == [("n/a",), ("3",)]
+    assert plan.casts == [None]
+
+    plan = ImportPlan.from_sample([{"n": "1"}], target_types={"n": Integer()})
+    with pytest.raises(ValueError, match="cannot convert '2.5' to int"):
+        plan.convert([{"n": "2.5"}])
+    plan = ImportPlan.from_sample([{"n": "1"}], {"n": ColumnMappingRule(cast="int")})
+    with pytest.raises(ValueError, match="cannot convert 'x' to int"):
+        plan.convert([{"n": "x"}])
+
+
+def test_columns_missing_from_the_sample_are_rejected():
+    plan = ImportPlan.from_sample([{"a": "1", "b": "x"}], {"b": ColumnMappingRule(skip=True)})
+    assert plan.convert([{"a": "2", "b": "y"}]) == [(2,)]
+    with pytest.raises(ValueError, match="Column\\(s\\) late first appear at row 12"):
+        plan.convert([{"a": "3"}, {"a": "4", "late": "z"}], first_row=11)
+
+
+def test_import_converts_columns_before_insert(sqlite_config):
+    data = b"id,zip,code,amount,paid,placed\n1,01234,007,9.5,true,2024-01-02\n2,55555,,10,false,\n"
+    result = import_data(sqlite_config, "orders", data, "csv")
+    assert result["success"], result
+
+    conn = sqlite3.connect(sqlite_config.filepath)
+    rows = conn.execute("SELECT id, typeof(id), zip, code, amount, paid, placed FROM orders ORDER BY id").fetchall()
+    conn.close()
+    assert rows == [
+        (1, "integer", "01234", "007", 9.5, 1, "2024-01-02"),
+        (2, "integer", "55555", None, 10.0, 0, None),
+    ]
+
+
+def test_bad_value_after_the_sample_fails_fast_and_rolls_back(sqlite_config):
+    data = "id,amount\n" + "".join(f"{i},{i}.5\n" for i in range(30)) + "30,oops\n"
+    with patch("column_mapping.IMPORT_TYPE_SAMPLE_ROWS", 10), patch("database.IMPORT_BATCH_SIZE", 10), \
+         patch("bulk_load.insert_rows", wraps=database.bulk_load.insert_rows) as insert:
+        result = import_data(sqlite_config, "orders", data.encode("utf-8"), "csv")
+
+    assert not result["success"]
+    assert "Column 'amount': cannot convert 'oops' to float (row 31)" in result["error"]
+    assert insert.call_count == 3
+    conn = sqlite3.connect(sqlite_config.filepath)
+    assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 0
+    conn.close()
+
+
+def test_import_endpoint_accepts_mapping_json(sqlite_config):
+    internal_db.init_db()
+    internal_db.save_connection(sqlite_config)
+    try:
+        client = TestClient(app)
+        mapping = {"order": {"rename": "id"}, "junk": {"skip": True}}
+        response = client.post(
+            f"/connections/{sqlite_config.id}/import/orders",
+            files={"file": ("o.csv", io.BytesIO(b"order,junk\n7,zzz\n"), "text/csv")},
+            data={"format": "csv", "mapping": json.dumps(mapping)},
+        )
+        assert response.status_code == 200, response.text
+
+        bad = client.post(
+            f"/connections/{sqlite_config.id}/import/orders",
+            files={"file": ("o.csv", io.BytesIO(b"order\n7\n"), "text/csv")},
+            data={"format": "csv", "mapping": "{not json"},
+        )
+        assert bad.status_code == 400
+    finally:
+        internal_db.delete_connection(sqlite_config.id)
+
+    conn = sqlite3.connect(sqlite_config.filepath)
+    assert conn.execute("SELECT id FROM orders").fetchall() == [(7,)]
+    conn.close()
@@ -0,0 +1,145 @@
+import io
+import json
+import sqlite3
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+import database
+import internal_db
+import jobs
+from main import app
+from models import ConnectionConfig
+
+client = TestClient(app)
+
+
+def wait_for(job, timeout=10):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.finished, job.snapshot()
+    return job
+
+
+def test_pool_is_bounded_and_queued_jobs_can_be_cancelled(tmp_path):
+    manager = jobs.JobManager(max_workers=1)
+    release = threading.Event()
+
+    def blocking(job):
+        release.wait(5)
+        return {"success": True}
+
+    first = manager.submit("import", "first", blocking)
+    upload = tmp_path / "upload.csv"
+    upload.write_text("id\n1\n")
+    second = manager.submit("import", "second", blocking, files=[str(upload)])
+    time.sleep(0.05)
+    assert first.status == "running"
+    assert second.status == "queued"
+
+    assert manager.cancel(second.id)
+    release.set()
+    wait_for(first)
+    wait_for(second)
+    assert first.status == "completed"
+    assert second.status == "cancelled"
+    assert second.finished_at is not None
+    assert not upload.exists()
+    assert not manager.cancel(first.id)
+
+
+def test_running_job_stops_between_batches_on_cancel():
+    manager = jobs.JobManager(max_workers=1)
+    batches = []
+
+    def work(job):
+        for i in range(1, 1000):
+            job.progress(rows=i * 100, bytes=i * 1000)
+            batches.append(i)
+            time.sleep(0.005)
+        return {"success": True}
+
+    job = manager.submit("export", "slow", work, total_rows=99900)
+    while not batches:
+        time.sleep(0.005)
+    snapshot = job.snapshot()
+    assert snapshot["status"] == "running"
+    assert snapshot["rows_per_second"] > 0
+    assert snapshot["eta_seconds"] is not None
+
+    manager.cancel(job.id)
+    wait_for(job)
+    assert job.status == "cancelled"
+    assert len(batches) < 999
+
+
+def test_failed_result_marks_job_failed():
+    manager = jobs.JobManager(max_workers=1)
+    job = wait_for(manager.submit("import", "bad", lambda job: {"success": False, "error": "boom"}))
+    assert job.status == "failed"
+    assert job.snapshot()["error"] == "boom"
+
+
+@pytest.fixture
+def sqlite_conn(tmp_path):
+    internal_db.init_db()
+    db_file = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE people (id INTEGER, name TEXT)")
+    conn.executemany("INSERT INTO people VALUES (?, ?)", [(i, f"p{i}") for i in range(50)])
+    conn.commit()
+    conn.close()
+    config = ConnectionConfig(id="jobs-conn", name="jobs", type="sqlite", database="jobs.db", filepath=db_file)
+    internal_db.save_connection(config)
+    database.dispose_engine("jobs-conn")
+    yield config
+    database.dispose_engine("jobs-conn")
+    internal_db.delete_connection("jobs-conn")
+
+
+def test_import_job_endpoint_reports_progress(sqlite_conn):
+    data = "id,name\n" + "".join(f"{i},n{i}\n" for i in range(100, 130))
+    response = client.post(
+        "/connections/jobs-conn/import/people/jobs",
+        files={"file": ("people.csv", io.BytesIO(data.encode("utf-8")), "text/csv")},
+        data={"format": "csv"},
+    )
+    assert response.status_code == 200, response.text
+    job = wait_for(jobs.manager.get(response.json()["job_id"]))
+
+    snapshot = client.get(f"/jobs/{job.id}").json()
+    assert snapshot["status"] == "completed", snapshot
+    assert snapshot["rows"] == 30
+    assert snapshot["bytes"] == snapshot["total_bytes"] == len(data)
+    assert job.id in [j["id"] for j in client.get("/jobs").json()]
+
+    conn = sqlite3.connect(sqlite_conn.filepath)
+    assert conn.execute("SELECT COUNT(*) FROM people").fetchone()[0] == 80
+    conn.close()
+
+
+def test_export_job_streams_events_and_serves_download(sqlite_conn):
+    response = client.post("/connections/jobs-conn/export/people/jobs", params={"format": "csv"})
+    assert response.status_code == 200, response.text
+    job_id = response.json()["job_id"]
+
+    with client.stream("GET", f"/jobs/{job_id}/events", params={"interval": 0.1}) as events:
+        payloads = [json.loads(line[len("data: "):]) for line in events.iter_lines() if line.startswith("data: ")]
+    assert payloads[-1]["status"] == "completed"
+    assert payloads[-1]["rows"] == 50
+    assert payloads[-1]["total_rows"] == 50
+
+    download = client.get(f"/jobs/{job_id}/download")
+    assert download.status_code == 200
+    assert download.text.splitlines()[0] == "id,name"
+    assert len(download.text.splitlines()) == 51
+    assert client.post(f"/jobs/{job_id}/cancel").status_code == 409
+
+
+def test_export_job_rejects_hostile_table_name(sqlite_conn):
+    response = client.post("/connections/jobs-conn/export/people;DROP TABLE people/jobs")
+    assert response.status_code == 400
+
+    response = client.post("/connections/jobs-conn/export/people/jobs", params={"format": "csv/../../x"})
+    assert response.status_code == 400
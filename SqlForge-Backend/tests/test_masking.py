@@ -36,3 +36,31 @@ def test_mask_default():
     masked = mask_value(val, 'token')
     assert val != masked
     assert len(masked) == 10 # MD5[:10]
+
+def test_compiled_policy_matches_mask_value():
+    from pro.masking import compile_masking_policy
+    columns = ["id", "email", "mobile", "api_token", "first_name", "note"]
+    rows = [
+        (1, "jane@example.com", "+1 (555) 123-4567", "abc", "Jane", "x"),
+        (2, "not-an-email", "12", 42, None, "y"),
+        (3, None, None, None, "Bo", "z"),
+    ]
+    policy = compile_masking_policy(columns)
+    assert policy.masked_columns == ["email", "mobile", "api_token", "first_name"]
+
+    masked = policy.apply(rows)
+    for original, result in zip(rows, masked):
+        assert result[0] == original[0] and result[5] == original[5]
+        for i in (1, 2, 3):
+            assert result[i] == mask_value(original[i], columns[i])
+        # names are scrambled randomly, so only their shape is comparable
+        if original[4] is None:
+            assert result[4] is None
+        else:
+            assert len(result[4]) == len(original[4]) and result[4].isupper()
+
+def test_policy_without_pii_columns_returns_batch_untouched():
+    from pro.masking import compile_masking_policy
+    rows = [(1, "a")]
+    assert compile_masking_policy(["id", "status"]).apply(rows) is rows
+    assert compile_masking_policy(["key", "value"], mask_all=True).masked_columns == ["key", "value"]
@@ -0,0 +1,88 @@
+import csv
+import datetime
+import io
+import json
+import pytest
+from unittest.mock import patch
+from bson import ObjectId
+from fastapi.testclient import TestClient
+import internal_db
+from database import stream_export_data
+from main import app
+from models import ConnectionConfig, MongoExportOptions
+
+client = TestClient(app)
+
+DOCS = [
+    {"_id": ObjectId("65a000000000000000000001"), "name": "Ann", "created": datetime.datetime(2024, 1, 2, 3, 4)},
+    {"_id": ObjectId("65a000000000000000000002"), "name": "Bob", "tags": ["x", "y"]},
+    {"_id": ObjectId("65a000000000000000000003"), "email": "cy@example.com", "address": {"city": "Oslo"}},
+]
+
+
+@pytest.fixture
+def mongo_config():
+    return ConnectionConfig(id="mongo-export", name="m", type="mongodb", host="localhost", port=27017, database="db")
+
+
+@pytest.fixture
+def collection():
+    with patch("database.MongoClient") as mock_client:
+        coll = mock_client.return_value.__getitem__.return_value.__getitem__.return_value
+        coll.find.return_value = list(DOCS)
+        coll.aggregate.return_value = list(DOCS)
+        yield coll
+
+
+def test_csv_header_is_merged_from_a_sample(mongo_config, collection):
+    rows = list(csv.reader(io.StringIO("".join(stream_export_data(mongo_config, "people", "csv")))))
+
+    assert rows[0] == ["_id", "name", "created", "tags", "email", "address"]
+    assert rows[1] == ["65a000000000000000000001", "Ann", "2024-01-02T03:04:00", "", "", ""]
+    assert rows[2][3] == '["x","y"]'
+    assert rows[3][5] == '{"city":"Oslo"}'
+    pipeline = collection.aggregate.call_args[0][0]
+    assert pipeline == [{"$sample": {"size": 1000}}]
+    collection.find_one.assert_not_called()
+
+
+def test_options_are_passed_to_the_cursor_and_sample(mongo_config, collection):
+    options = MongoExportOptions(filter={"age": {"$gt": 30}}, projection={"name": 1},
+                                 sort={"name": 1, "age": -1}, batch_size=2)
+    chunks = list(stream_export_data(mongo_config, "people", "csv", mongo_options=options))
+
+    collection.find.assert_called_once_with({"age": {"$gt": 30}}, {"name": 1}, batch_size=2, sort=[("name", 1), ("age", -1)])
+    assert collection.aggregate.call_args[0][0] == [
+        {"$match": {"age": {"$gt": 30}}}, {"$sample": {"size": 1000}}, {"$project": {"name": 1}},
+    ]
+    # header rides on the first batch; three documents in batches of two
+    assert len(chunks) == 2
+
+
+def test_json_is_serialized_per_batch_with_masking(mongo_config, collection):
+    options = MongoExportOptions(batch_size=2)
+    chunks = list(stream_export_data(mongo_config, "people", "json", mask_pii=True, mongo_options=options))
+    docs = json.loads("".join(chunks))
+
+    assert len(chunks) == 5  # "[", batch, ",", batch, "]"
+    assert docs[0]["_id"] == "65a000000000000000000001"
+    assert docs[0]["created"] == "2024-01-02T03:04:00"
+    assert docs[0]["name"] != "Ann" and len(docs[0]["name"]) == 3
+    assert docs[2]["email"].endswith("@example.com") and docs[2]["email"] != "cy@example.com"
+    assert docs[1]["tags"] == ["x", "y"]
+
+
+def test_export_endpoint_parses_mongo_options(mongo_config, collection):
+    internal_db.init_db()
+    internal_db.save_connection(mongo_config)
+    try:
+        response = client.get("/connections/mongo-export/export/people",
+                              params={"format": "json", "filter": '{"name": "Ann"}', "sort": '{"name": -1}'})
+        assert response.status_code == 200
+        assert collection.find.call_args[0][0] == {"name": "Ann"}
+        assert collection.find.call_args[1]["sort"] == [("name", -1)]
+
+        response = client.get("/connections/mongo-export/export/people", params={"projection": "{not json"})
+        assert response.status_code == 400
+    finally:
+        internal_db.delete_connection("mongo-export")
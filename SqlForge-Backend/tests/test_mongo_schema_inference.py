@@ -0,0 +1,86 @@
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+import database
+from database import get_schema_details, infer_mongo_collection_schema, infer_mongo_schemas
+from models import ConnectionConfig
+
+
+@pytest.fixture(autouse=True)
+def clean_metadata_cache():
+    database.invalidate_metadata_cache()
+    yield
+    database.invalidate_metadata_cache()
+
+
+def _mongo_config():
+    return ConnectionConfig(id="mongo-infer", name="Mongo", type="mongodb", host="localhost", port=27017, database="shop")
+
+
+def _collection(docs):
+    col = MagicMock()
+    col.aggregate.return_value = docs
+    return col
+
+
+def test_infer_merges_fields_across_heterogeneous_documents():
+    col = _collection([
+        {"_id": 1, "name": "Ann", "address": {"city": "Oslo"}},
+        {"_id": 2, "name": "Bob", "age": 31},
+        {"_id": 3, "name": None, "age": "unknown"},
+        {"_id": 4, "age": 40},
+    ])
+
+    fields = {f["name"]: f for f in infer_mongo_collection_schema(col, sample_size=4)}
+
+    pipeline = col.aggregate.call_args[0][0]
+    assert pipeline == [{"$sample": {"size": 4}}]
+    assert fields["_id"]["presence"] == 1.0
+    assert fields["name"]["presence"] == 0.75
+    assert fields["name"]["types"] == {"str": 2, "NoneType": 1}
+    assert fields["age"]["types"] == {"int": 2, "str": 1}
+    assert fields["address.city"]["presence"] == 0.25
+
+
+def test_infer_mongo_schemas_reports_incomplete_when_budget_runs_out():
+    fast = _collection([{"_id": 1}])
+    slow = MagicMock()
+    slow.aggregate.side_effect = lambda *a, **k: time.sleep(1) or [{"_id": 1}]
+    db = {"fast": fast, "slow": slow}
+
+    results, complete = infer_mongo_schemas(db, ["fast", "slow"], time_budget=0.2)
+
+    assert complete is False
+    assert results["fast"][0]["name"] == "_id"
+    assert results["slow"] == []
+
+
+@patch("database.MongoClient")
+def test_get_schema_details_mongo_is_sampled_and_cached(mock_client):
+    mock_db = MagicMock()
+    mock_client.return_value.__getitem__.return_value = mock_db
+    mock_db.list_collection_names.return_value = ["users"]
+    mock_db.__getitem__.return_value = _collection([{"_id": "a", "email": "x@y"}, {"_id": "b"}])
+
+    first = get_schema_details(_mongo_config())
+    second = get_schema_details(_mongo_config())
+
+    columns = {c.name: c for c in first[0].columns}
+    assert columns["_id"].primary_key and not columns["_id"].nullable
+    assert columns["email"].nullable and columns["email"].presence == 0.5
+    assert [t.model_dump() for t in second] == [t.model_dump() for t in first]
+    assert mock_db.__getitem__.return_value.aggregate.call_count == 1
+
+
+@patch("database.MongoClient")
+def test_dispose_engine_drops_cached_mongo_schema(mock_client):
+    mock_db = MagicMock()
+    mock_client.return_value.__getitem__.return_value = mock_db
+    mock_db.list_collection_names.return_value = ["users"]
+    mock_db.__getitem__.return_value = _collection([{"_id": "a"}])
+
+    get_schema_details(_mongo_config())
+    database.dispose_engine("mongo-infer")
+    get_schema_details(_mongo_config())
+
+    assert mock_db.__getitem__.return_value.aggregate.call_count == 2
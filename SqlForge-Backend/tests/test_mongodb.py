@@ -4,6 +4,13 @@ import json
 import io
 from database import execute_query, import_data, stream_export_data, drop_object, execute_batch_mutations, get_schema_context
 from models import ConnectionConfig
+import database
+
+@pytest.fixture(autouse=True)
+def clean_metadata_cache():
+    database.invalidate_metadata_cache()
+    yield
+    database.invalidate_metadata_cache()
 
 @pytest.fixture
 def mongo_config():
@@ -21,11 +28,11 @@ def test_get_schema_context_mongo(mock_client, mongo_config):
     mock_db = MagicMock()
     mock_client.return_value.__getitem__.return_value = mock_db
     mock_db.list_collection_names.return_value = ["users"]
-    mock_db["users"].find_one.return_value = {"_id": "1", "name": "John"}
+    mock_db["users"].aggregate.return_value = [{"_id": "1", "name": "John"}, {"_id": "2"}]
     
     context = get_schema_context(mongo_config)
     assert "MongoDB Database" in context
-    assert "users (Fields: _id, name)" in context
+    assert "users (Fields: _id (str), name (str, 50%))" in context
 
 @patch("database.MongoClient")
 def test_import_data_mongo(mock_client, mongo_config):
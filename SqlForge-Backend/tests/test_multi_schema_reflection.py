@@ -0,0 +1,98 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, event, text
+import database
+from database import get_tables, get_schema_details, resolve_schemas, reflect_schemas_in_parallel
+from models import ConnectionConfig
+from pro.sync import reflect_schema_to_sql
+
+
+@pytest.fixture
+def attached_engine(tmp_path):
+    """A SQLite engine whose every pooled connection has a second database
+    attached as schema `aux`, standing in for a multi-schema server."""
+    main_file = str(tmp_path / "main.db")
+    aux_file = str(tmp_path / "aux.db")
+    engine = create_engine(f"sqlite:///{main_file}")
+
+    @event.listens_for(engine, "connect")
+    def attach(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{aux_file}' AS aux")
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("CREATE TABLE aux.invoices (id INTEGER PRIMARY KEY, total REAL)"))
+    yield engine
+    engine.dispose()
+
+
+def _config(schemas=None):
+    return ConnectionConfig(id="multi-schema", name="multi", type="sqlite", filepath="unused", schemas=schemas)
+
+
+def test_resolve_schemas_defaults_and_wildcard(attached_engine):
+    from sqlalchemy import inspect
+    inspector = inspect(attached_engine)
+    assert resolve_schemas(inspector, None) == [None]
+    assert resolve_schemas(inspector, ["aux", "aux", "main"]) == ["aux", "main"]
+    assert set(resolve_schemas(inspector, ["*"])) == {"main", "aux"}
+
+
+def test_get_tables_fills_db_schema_for_every_schema(attached_engine):
+    with patch("database.get_engine", return_value=attached_engine):
+        default_only = get_tables(_config())
+        everything = get_tables(_config(), schemas=["*"])
+
+    assert [(t.name, t.db_schema) for t in default_only if t.type == "table"] == [("users", None)]
+    assert {(t.name, t.db_schema) for t in everything if t.type == "table"} == {("users", "main"), ("invoices", "aux")}
+
+
+def test_get_schema_details_uses_configured_schemas(attached_engine):
+    with patch("database.get_engine", return_value=attached_engine):
+        schemas = get_schema_details(_config(schemas=["aux"]))
+
+    assert [(s.name, s.db_schema) for s in schemas] == [("invoices", "aux")]
+    assert any(c.name == "id" and c.primary_key for c in schemas[0].columns)
+
+
+def test_reflect_schema_to_sql_qualifies_non_default_schemas(attached_engine):
+    ddl = reflect_schema_to_sql(attached_engine, "sqlite", ["aux"])
+    assert "CREATE TABLE aux.invoices" in ddl
+    assert "users" not in ddl
+
+
+def test_schemas_are_reflected_concurrently_with_a_cap(attached_engine):
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_reflect(inspector, schema):
+        with lock:
+            active.append(schema)
+            peak.append(len(active))
+        time.sleep(0.2)
+        with lock:
+            active.remove(schema)
+        return schema
+
+    names = [f"s{i}" for i in range(6)]
+    with patch.object(database, "MAX_REFLECTION_WORKERS", 3):
+        start = time.time()
+        results = reflect_schemas_in_parallel(attached_engine, None, names, slow_reflect)
+        elapsed = time.time() - start
+
+    assert results == names
+    assert max(peak) == 3
+    assert elapsed < 1.0
+
+
+def test_diff_matches_default_schema_tables_when_only_one_side_lists_schemas(attached_engine):
+    from pro.sync import diff_schemas
+    with patch("pro.sync.get_engine", return_value=attached_engine):
+        result = diff_schemas(_config(schemas=["*"]), _config())
+
+    assert "main.users" not in result["sql_text"]
+    assert "users" not in " ".join(result["statements"])
+    assert result["statements"] and all("aux.invoices" in s for s in result["statements"])
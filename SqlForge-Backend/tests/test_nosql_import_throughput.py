@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from pymongo.errors import BulkWriteError
+from database import import_data
+from models import ConnectionConfig
+
+
+@pytest.fixture
+def redis_config():
+    return ConnectionConfig(name="r", type="redis", host="localhost", port=6379)
+
+
+@pytest.fixture
+def mongo_config():
+    return ConnectionConfig(name="m", type="mongodb", host="localhost", port=27017, database="testdb")
+
+
+def csv_rows(n):
+    return ("name,age\n" + "".join(f"user{i},{i}\n" for i in range(n))).encode("utf-8")
+
+
+@patch("database.MongoClient")
+def test_mongo_writes_unordered_batches_on_concurrent_workers(mock_client, mongo_config):
+    collection = mock_client.return_value.__getitem__.return_value.__getitem__.return_value
+    threads = set()
+    sizes = []
+
+    def insert_many(docs, ordered=True):
+        assert ordered is False
+        threads.add(threading.get_ident())
+        sizes.append(len(docs))
+        time.sleep(0.01)
+
+    collection.insert_many.side_effect = insert_many
+    result = import_data(mongo_config, "people", csv_rows(1000), "csv", batch_size=100, parallelism=4)
+
+    assert result["success"], result
+    assert "Imported 1000 documents" in result["message"]
+    assert sizes == [100] * 10
+    assert len(threads) > 1
+
+
+@patch("database.MongoClient")
+def test_mongo_reports_rejected_documents_without_aborting(mock_client, mongo_config):
+    collection = mock_client.return_value.__getitem__.return_value.__getitem__.return_value
+
+    def insert_many(docs, ordered=True):
+        if docs[0]["name"] == "user0":
+            raise BulkWriteError({"nInserted": len(docs) - 1, "writeErrors": [{"errmsg": "E11000 duplicate key"}]})
+
+    collection.insert_many.side_effect = insert_many
+    result = import_data(mongo_config, "people", csv_rows(30), "csv", batch_size=10)
+
+    assert not result["success"]
+    assert "Imported 29 documents" in result["error"]
+    assert "1 were rejected" in result["error"]
+    assert "E11000" in result["error"]
+
+
+@patch("redis.Redis")
+def test_redis_batches_strings_into_mset(mock_redis, redis_config):
+    r = mock_redis.return_value
+    data = "key,value\n" + "".join(f"k{i},v{i}\n" for i in range(250))
+    result = import_data(redis_config, "ignored", data.encode("utf-8"), "csv", batch_size=100)
+
+    assert result["success"], result
+    assert "Imported 250 keys" in result["message"]
+    assert r.mset.call_count == 3
+    merged = {}
+    for call in r.mset.call_args_list:
+        merged.update(call[0][0])
+    assert merged == {f"k{i}": f"v{i}" for i in range(250)}
+    r.set.assert_not_called()
+    r.pipeline.assert_not_called()
+
+
+@patch("redis.Redis")
+def test_redis_hash_rows_are_pipelined_as_hset(mock_redis, redis_config):
+    r = mock_redis.return_value
+    pipe = r.pipeline.return_value
+    rows = [{"id": "user:1", "name": "Ann", "age": 30, "tags": ["a"], "active": True, "note": None}, {"key": "k", "value": "v"}]
+    result = import_data(redis_config, "ignored", json.dumps(rows).encode("utf-8"), "json", redis_hashes=True)
+
+    assert result["success"], result
+    r.pipeline.assert_called_once_with(transaction=False)
+    pipe.mset.assert_called_once_with({"k": "v"})
+    pipe.hset.assert_called_once_with(
+        "user:1", mapping={"id": "user:1", "name": "Ann", "age": 30, "tags": '["a"]', "active": "True"}
+    )
+    pipe.execute.assert_called_once()
+
+
+@patch("redis.Redis")
+def test_redis_failure_stops_the_import(mock_redis, redis_config):
+    r = mock_redis.return_value
+    r.mset.side_effect = [None, Exception("OOM command not allowed")] + [None] * 10
+    data = "key,value\n" + "".join(f"k{i},v{i}\n" for i in range(1000))
+    result = import_data(redis_config, "ignored", data.encode("utf-8"), "csv", batch_size=10, parallelism=1)
+
+    assert not result["success"]
+    assert "OOM command not allowed" in result["error"]
+    assert r.mset.call_count < 100
@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, inspect
+import database
+from database import import_data
+from models import ConnectionConfig
+
+
+@pytest.fixture
+def sqlite_file(tmp_path):
+    db_file = str(tmp_path / "parallel.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT, city TEXT)")
+    conn.execute("CREATE INDEX idx_people_city ON people (city)")
+    conn.execute("CREATE UNIQUE INDEX idx_people_name ON people (name)")
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def csv_bytes(n, start=0):
+    return ("id,name,city\n" + "".join(f"{i},n{i},c{i % 7}\n" for i in range(start, start + n))).encode("utf-8")
+
+
+def test_parallel_import_loads_chunks_concurrently_and_reports(sqlite_file):
+    # Exercise the multi-connection path against a file-backed SQLite engine
+    # by presenting the connection as a server database.
+    engine = create_engine(f"sqlite:///{sqlite_file}", connect_args={"timeout": 30})
+    config = ConnectionConfig(name="pg", type="postgresql", host="h", port=5432, database="d")
+    threads = set()
+    real_load = database._load_chunk
+
+    def tracking_load(*args):
+        threads.add(threading.get_ident())
+        return real_load(*args)
+
+    with patch("database.get_engine", return_value=engine), \
+         patch("database.IMPORT_BATCH_SIZE", 100), \
+         patch("database._load_chunk", side_effect=tracking_load):
+        result = import_data(config, "people", csv_bytes(1000), "csv", parallelism=4, defer_indexes=True)
+
+    assert result["success"], result
+    report = result["report"]
+    assert report["parallelism"] == 4
+    assert report["chunks"] == 10 and report["chunks_failed"] == 0
+    assert report["rows_parsed"] == report["rows_loaded"] == 1000
+    assert report["rows_before"] == 0 and report["rows_after"] == 1000
+    assert report["deferred_indexes"] == ["idx_people_city"]
+    assert report["consistent"] is True
+    assert len(threads) > 1
+
+    # The deferred index is rebuilt, the unique one was never touched.
+    names = {idx["name"] for idx in inspect(engine).get_indexes("people")}
+    assert names == {"idx_people_city", "idx_people_name"}
+    engine.dispose()
+
+
+def test_failed_chunk_is_reported_and_indexes_are_restored(sqlite_file):
+    engine = create_engine(f"sqlite:///{sqlite_file}", connect_args={"timeout": 30})
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO people VALUES (150, 'taken', 'x')")
+    config = ConnectionConfig(name="pg", type="postgresql", host="h", port=5432, database="d")
+
+    with patch("database.get_engine", return_value=engine), patch("database.IMPORT_BATCH_SIZE", 100):
+        result = import_data(config, "people", csv_bytes(1000), "csv", parallelism=2, defer_indexes=True)
+
+    assert not result["success"]
+    assert "rows were committed before the failure" in result["error"]
+    report = result["report"]
+    assert report["chunks_failed"] >= 1
+    assert report["consistent"] is False
+    assert report["rows_after"] - report["rows_before"] == report["rows_loaded"]
+    assert report["rows_loaded"] < 1000
+    names = {idx["name"] for idx in inspect(engine).get_indexes("people")}
+    assert "idx_people_city" in names
+    engine.dispose()
+
+
+def test_sqlite_targets_are_clamped_to_one_loader(sqlite_file):
+    config = ConnectionConfig(id="parallel-sqlite", name="s", type="sqlite", database="p.db", filepath=sqlite_file)
+    database.dispose_engine("parallel-sqlite")
+    with patch("database.ThreadPoolExecutor", wraps=database.ThreadPoolExecutor) as pool:
+        result = import_data(config, "people", csv_bytes(250), "csv", parallelism=6, defer_indexes=True)
+    database.dispose_engine("parallel-sqlite")
+
+    assert result["success"], result
+    assert result["report"]["parallelism"] == 1
+    assert result["report"]["rows_after"] == 250
+    assert pool.call_args.kwargs["max_workers"] == 1
+
+
+def test_deferred_indexes_are_rebuilt_from_their_original_ddl(sqlite_file):
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    definitions = [
+        "CREATE INDEX idx_people_city_partial ON people (city DESC) WHERE city IS NOT NULL",
+        "CREATE INDEX idx_people_lower_name ON people (lower(name))",
+    ]
+    with engine.begin() as conn:
+        for ddl in definitions:
+            conn.exec_driver_sql(ddl)
+
+    with database.deferred_secondary_indexes(engine, "people") as deferred:
+        # SQLAlchemy doesn't reflect SQLite expression indexes, so that one stays
+        assert set(deferred) == {"idx_people_city", "idx_people_city_partial"}
+        assert not {idx["name"] for idx in inspect(engine).get_indexes("people")} & set(deferred)
+
+    with engine.connect() as conn:
+        rebuilt = {row[0] for row in conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'index'")}
+    assert set(definitions) <= rebuilt
+    engine.dispose()
+
+
+def test_indexes_without_a_faithful_rebuild_are_left_in_place():
+    plain = {"name": "ix_a", "column_names": ["a"], "dialect_options": {}}
+    assert database._index_ddl(None, "mysql", "t", plain) == "CREATE INDEX ix_a ON t (a)"
+    assert database._index_ddl(None, "mysql", "t", {**plain, "dialect_options": {"mysql_length": {"a": 10}}}) is None
+    assert database._index_ddl(None, "mssql", "t", {**plain, "include_columns": ["b"]}) is None
+    assert database._index_ddl(None, "oracle", "t", {"name": "ix_f", "column_names": [None], "expressions": ["upper(a)"]}) is None
@@ -0,0 +1,86 @@
+import datetime
+import decimal
+import io
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Date, DateTime, Integer, MetaData, Numeric, String, Table, create_engine
+import database
+import internal_db
+from database import stream_export_data
+from main import app
+from models import ConnectionConfig
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    internal_db.init_db()
+    db_file = str(tmp_path / "parquet_export.db")
+    engine = create_engine(f"sqlite:///{db_file}")
+    metadata = MetaData()
+    orders = Table(
+        "orders", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("customer_name", String(50)),
+        Column("amount", Numeric(10, 2)),
+        Column("placed", DateTime),
+        Column("due", Date),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(orders.insert(), [
+            {"id": i, "customer_name": None if i % 4 == 0 else f"c{i}", "amount": decimal.Decimal(i) / 4,
+             "placed": datetime.datetime(2024, 1, 1) + datetime.timedelta(hours=i), "due": datetime.date(2024, 2, 1)}
+            for i in range(1, 2501)
+        ])
+    engine.dispose()
+    config = ConnectionConfig(id="parquet-export", name="p", type="sqlite", database="p.db", filepath=db_file)
+    internal_db.save_connection(config)
+    database.dispose_engine("parquet-export")
+    yield config
+    database.dispose_engine("parquet-export")
+    internal_db.delete_connection("parquet-export")
+
+
+def read_parquet(chunks):
+    return pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+
+
+def test_row_groups_codec_and_types(sqlite_config):
+    parquet = read_parquet(stream_export_data(sqlite_config, "orders", "parquet", parquet_codec="zstd", row_group_size=1000))
+
+    assert parquet.metadata.num_rows == 2500
+    assert [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)] == [1000, 1000, 500]
+    assert parquet.metadata.row_group(0).column(0).compression == "ZSTD"
+
+    schema = parquet.schema_arrow
+    assert schema.field("id").type == pa.int64()
+    assert schema.field("amount").type == pa.decimal128(10, 2)
+    assert schema.field("placed").type == pa.timestamp("us")
+    assert schema.field("due").type == pa.date32()
+
+    table = parquet.read()
+    assert table.column("amount")[1].as_py() == decimal.Decimal("0.50")
+    assert table.column("placed")[0].as_py() == datetime.datetime(2024, 1, 1, 1)
+    assert table.column("customer_name")[3].as_py() is None
+
+
+def test_masked_columns_are_exported_as_text(sqlite_config):
+    table = read_parquet(stream_export_data(sqlite_config, "orders", "parquet", mask_pii=True)).read()
+    assert table.schema.field("customer_name").type == pa.string()
+    assert table.column("customer_name")[0].as_py() != "c1"
+    assert table.column("id")[0].as_py() == 1
+
+
+def test_parquet_export_endpoint(sqlite_config):
+    response = client.get("/connections/parquet-export/export/orders", params={"format": "parquet", "codec": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    assert pq.ParquetFile(io.BytesIO(response.content)).metadata.num_rows == 2500
+
+    response = client.get("/connections/parquet-export/export/orders", params={"format": "parquet", "codec": "rar"})
+    assert response.status_code == 400
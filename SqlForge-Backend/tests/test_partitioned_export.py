@@ -0,0 +1,116 @@
+import io
+import json
+import sqlite3
+import threading
+import zipfile
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+import database
+import internal_db
+from database import export_partitions, stream_partitioned_export
+from main import app
+from models import ConnectionConfig
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    internal_db.init_db()
+    db_file = str(tmp_path / "partitioned.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, item TEXT)")
+    conn.execute("CREATE TABLE notes (body TEXT)")
+    conn.executemany("INSERT INTO orders VALUES (?, ?)", [(i, f"item {i}") for i in range(1, 1001)])
+    conn.executemany("INSERT INTO notes VALUES (?)", [(f"note {i}",) for i in range(10)])
+    conn.commit()
+    conn.close()
+    config = ConnectionConfig(id="partitioned-export", name="p", type="sqlite", database="p.db", filepath=db_file)
+    internal_db.save_connection(config)
+    database.dispose_engine("partitioned-export")
+    yield config
+    database.dispose_engine("partitioned-export")
+    internal_db.delete_connection("partitioned-export")
+
+
+def test_partitions_split_on_integer_key_or_rowid(sqlite_config):
+    engine = database.get_engine(sqlite_config)
+    assert export_partitions(engine, sqlite_config, "orders", 4) == [
+        "id < 251", "id >= 251 AND id < 501", "id >= 501 AND id < 751", "id >= 751",
+    ]
+    assert export_partitions(engine, sqlite_config, "notes", 2) == ["rowid < 6", "rowid >= 6"]
+    assert export_partitions(engine, sqlite_config, "orders", 1) == [None]
+
+
+def test_partitions_are_read_concurrently_and_zipped(sqlite_config):
+    threads = set()
+    real = database.stream_export_data
+
+    def tracking(*args, **kwargs):
+        threads.add(threading.get_ident())
+        return real(*args, **kwargs)
+
+    with patch("database.stream_export_data", side_effect=tracking):
+        data = b"".join(stream_partitioned_export(sqlite_config, "orders", "csv", parallelism=4))
+
+    assert len(threads) > 1
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.namelist() == [f"orders_part{i:03d}.csv" for i in range(1, 5)]
+    lines = [archive.read(name).decode().splitlines() for name in archive.namelist()]
+    assert all(part[0] == "id,item" for part in lines)
+    assert sorted(int(line.split(",")[0]) for part in lines for line in part[1:]) == list(range(1, 1001))
+
+
+@pytest.mark.parametrize("file_format", ["csv", "json"])
+def test_merged_stream_keeps_partition_order_and_one_header(sqlite_config, file_format):
+    rows = []
+    merged = "".join(
+        c.decode() if isinstance(c, bytes) else c
+        for c in stream_partitioned_export(sqlite_config, "orders", file_format, parallelism=3, output="stream",
+                                           progress=rows.append)
+    )
+    if file_format == "csv":
+        lines = merged.splitlines()
+        assert lines[0] == "id,item"
+        ids = [int(line.split(",")[0]) for line in lines[1:]]
+    else:
+        ids = [doc["id"] for doc in json.loads(merged)]
+    assert ids == list(range(1, 1001))
+    assert rows[-1] == 1000
+
+
+def test_merging_binary_formats_is_refused(sqlite_config):
+    with pytest.raises(ValueError):
+        stream_partitioned_export(sqlite_config, "orders", "parquet", output="stream")
+
+
+def test_partitioned_export_endpoint(sqlite_config):
+    response = client.get("/connections/partitioned-export/export/orders/partitioned",
+                          params={"format": "json", "parallelism": 2, "output": "stream"})
+    assert response.status_code == 200
+    assert len(response.json()) == 1000
+
+    response = client.get("/connections/partitioned-export/export/orders/partitioned", params={"format": "xlsx"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert len(zipfile.ZipFile(io.BytesIO(response.content)).namelist()) == 4
+
+    response = client.get("/connections/partitioned-export/export/orders/partitioned",
+                          params={"format": "xlsx", "output": "stream"})
+    assert response.status_code == 400
+
+
+def test_json_parts_are_merged_in_chunks(tmp_path):
+    parts = ['[\n{"id": 1},\n{"id": 2}\n]', "[\n\n]", '[\n{"id": 3}\n]']
+    paths = []
+    for i, body in enumerate(parts):
+        path = tmp_path / f"part{i}.json"
+        path.write_text(body)
+        paths.append((i, str(path)))
+
+    with patch("database.EXPORT_CHUNK_SIZE", 3):
+        chunks = list(database._merge_partition_files(paths, "json"))
+
+    assert max(len(c) for c in chunks) <= 4
+    assert json.loads(b"".join(chunks)) == [{"id": 1}, {"id": 2}, {"id": 3}]
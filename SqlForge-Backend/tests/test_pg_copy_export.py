@@ -0,0 +1,112 @@
+import csv
+import io
+import sqlite3
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+import database
+from database import stream_export_data
+from models import ConnectionConfig
+
+PG_CONFIG = ConnectionConfig(id="pg-copy", name="pg", type="postgresql", host="localhost", port=5432, database="db")
+
+
+def copy_engine(lines):
+    engine = MagicMock()
+    cursor = engine.raw_connection.return_value.cursor.return_value
+
+    def copy_expert(sql, target):
+        copy_expert.sql = sql
+        for line in lines:
+            target.write(line)
+
+    cursor.copy_expert.side_effect = copy_expert
+    return engine, cursor, copy_expert
+
+
+def test_unmasked_csv_uses_copy_to_stdout():
+    lines = ["id,name\n"] + [f"{i},n{i}\n" for i in range(5000)]
+    engine, cursor, copy_expert = copy_engine(lines)
+    progress = []
+    with patch("database.get_engine", return_value=engine), patch("database.COPY_EXPORT_CHUNK_SIZE", 1024):
+        chunks = list(stream_export_data(PG_CONFIG, "people", "csv", where_clause="id > 3", progress=progress.append))
+
+    assert copy_expert.sql == "COPY (\nSELECT * FROM people WHERE id > 3\n) TO STDOUT WITH CSV HEADER"
+    assert b"".join(chunks) == "".join(lines).encode()
+    # rows are gathered into chunks rather than queued one by one
+    assert 1 < len(chunks) < 200
+    assert progress[-1] == 5000
+    engine.connect.assert_not_called()
+    engine.raw_connection.return_value.close.assert_called_once()
+
+
+def test_closing_the_stream_aborts_copy():
+    def endless():
+        i = 0
+        while True:
+            yield f"{i}\n"
+            i += 1
+
+    engine, cursor, copy_expert = copy_engine(endless())
+    errors = []
+
+    def copy_expert_recording(sql, target):
+        try:
+            copy_expert(sql, target)
+        except Exception as e:
+            errors.append(e)
+            raise
+
+    cursor.copy_expert.side_effect = copy_expert_recording
+    with patch("database.get_engine", return_value=engine), patch("database.COPY_EXPORT_CHUNK_SIZE", 64):
+        stream = stream_export_data(PG_CONFIG, "people", "csv")
+        next(stream)
+        stream.close()
+
+    assert isinstance(errors[0], database._CopyExportClosed)
+    engine.raw_connection.return_value.close.assert_called_once()
+
+
+def test_copy_errors_surface_from_the_stream():
+    engine, cursor, _ = copy_engine([])
+    cursor.copy_expert.side_effect = Exception("relation does not exist")
+    with patch("database.get_engine", return_value=engine):
+        with pytest.raises(Exception, match="relation does not exist"):
+            list(stream_export_data(PG_CONFIG, "people", "csv"))
+
+
+def test_masked_export_takes_batched_python_path(tmp_path):
+    db_file = str(tmp_path / "masked.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE people (id INTEGER, email TEXT, note TEXT)")
+    conn.executemany("INSERT INTO people VALUES (?, ?, ?)", [(i, f"u{i}@x.org", "a,\"b\"" if i == 0 else None) for i in range(25)])
+    conn.commit()
+    conn.close()
+    config = ConnectionConfig(id="pg-copy-masked", name="m", type="postgresql", database="m", host="h", port=1)
+    engine = database.create_engine(f"sqlite:///{db_file}")
+
+    with patch("database.get_engine", return_value=engine), patch("database.EXPORT_BATCH_SIZE", 10), \
+         patch("database._pg_copy_csv_export", side_effect=AssertionError("COPY used")):
+        chunks = list(stream_export_data(config, "people", "csv", mask_pii=True))
+
+    assert len(chunks) == 3  # one per batch, the header riding on the first
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == ["id", "email", "note"]
+    assert rows[1][0] == "0" and rows[1][1].endswith("@x.org") and rows[1][1] != "u0@x.org"
+    assert rows[1][2] == 'a,"b"'
+    assert rows[2][2] == ""
+    assert len(rows) == 26
+
+
+def test_dropped_connection_during_copy_ends_the_stream():
+    engine, cursor, _ = copy_engine([])
+    raw = engine.raw_connection.return_value
+    cursor.copy_expert.side_effect = Exception("server closed the connection unexpectedly")
+    raw.rollback.side_effect = Exception("connection already closed")
+
+    started = time.monotonic()
+    with patch("database.get_engine", return_value=engine):
+        with pytest.raises(Exception, match="server closed the connection"):
+            list(stream_export_data(PG_CONFIG, "people", "csv"))
+    assert time.monotonic() - started < 5
+    raw.close.assert_called_once()
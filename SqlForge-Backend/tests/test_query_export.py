@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+import sqlite3
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+import database
+import internal_db
+from database import stream_query_export
+from main import app
+from models import ConnectionConfig
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    internal_db.init_db()
+    db_file = str(tmp_path / "query_export.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, total REAL)")
+    conn.executemany("INSERT INTO customers VALUES (?, ?)", [(1, "Ann"), (2, "Bob")])
+    conn.executemany("INSERT INTO orders VALUES (?, ?, ?)", [(i, 1 + i % 2, i * 1.0) for i in range(1, 3001)])
+    conn.commit()
+    conn.close()
+    config = ConnectionConfig(id="query-export", name="q", type="sqlite", database="q.db", filepath=db_file)
+    internal_db.save_connection(config)
+    database.dispose_engine("query-export")
+    yield config
+    database.dispose_engine("query-export")
+    internal_db.delete_connection("query-export")
+
+
+JOIN = """
+    SELECT c.name, COUNT(*) AS orders, SUM(o.total) AS spent
+    FROM orders o JOIN customers c ON c.id = o.customer_id
+    GROUP BY c.name ORDER BY c.name;
+"""
+
+
+def test_join_aggregate_is_exported(sqlite_config):
+    rows = list(csv.reader(io.StringIO("".join(stream_query_export(sqlite_config, JOIN, "csv")))))
+    assert rows == [["name", "orders", "spent"], ["Ann", "1500", str(sum(range(2, 3001, 2)) * 1.0)],
+                    ["Bob", "1500", str(sum(range(1, 3001, 2)) * 1.0)]]
+
+
+def test_results_beyond_the_query_row_cap_are_streamed(sqlite_config):
+    with patch("database.EXPORT_BATCH_SIZE", 1000):
+        chunks = list(stream_query_export(sqlite_config, "SELECT * FROM orders", "json"))
+    assert len(json.loads("".join(chunks))) == 3000
+    assert len(chunks) == 7  # "[", three batches, two separators, "]"
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM orders",
+    "-- looks harmless\nDROP TABLE orders",
+    "SELECT 1; DROP TABLE orders",
+    "   ",
+])
+def test_anything_but_one_read_only_statement_is_refused(sqlite_config, sql):
+    with pytest.raises(ValueError):
+        stream_query_export(sqlite_config, sql, "csv")
+
+
+def test_postgres_query_runs_read_only():
+    config = ConnectionConfig(id="pg-q", name="pg", type="postgresql", host="h", port=5432, database="d")
+    with patch("database.get_engine") as get_engine:
+        cursor = get_engine.return_value.raw_connection.return_value.cursor.return_value
+        list(stream_query_export(config, "SELECT 1", "csv"))
+    cursor.execute.assert_called_once_with("SET TRANSACTION READ ONLY")
+    assert cursor.copy_expert.call_args[0][0] == "COPY (\nSELECT 1\n) TO STDOUT WITH CSV HEADER"
+
+
+def test_postgres_copy_gets_a_reparsed_query():
+    config = ConnectionConfig(id="pg-q", name="pg", type="postgresql", host="h", port=5432, database="d")
+    with patch("database.get_engine") as get_engine:
+        engine = get_engine.return_value
+        cursor = engine.raw_connection.return_value.cursor.return_value
+        list(stream_query_export(config, "SELECT * FROM orders -- last month", "csv"))
+        sql = cursor.copy_expert.call_args[0][0]
+        assert sql.startswith("COPY (\nSELECT * FROM orders")
+        assert sql.endswith("\n) TO STDOUT WITH CSV HEADER")
+        assert "--" not in sql
+
+        cursor.copy_expert.reset_mock()
+        list(stream_query_export(config, "SELECT 1) TO PROGRAM 'touch /tmp/x' --", "csv"))
+    # Not a single SELECT: never wrapped in COPY, run as a plain read-only query
+    cursor.copy_expert.assert_not_called()
+    executed = engine.connect.return_value.__enter__.return_value.execution_options.return_value.execute
+    assert str(executed.call_args[0][0]) == "SELECT 1) TO PROGRAM 'touch /tmp/x' --"
+
+
+def test_export_query_endpoint(sqlite_config):
+    response = client.post("/connections/query-export/export-query",
+                           json={"sql": JOIN, "format": "json", "filename": "spend report"})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=spend_report.json"
+    assert [r["name"] for r in response.json()] == ["Ann", "Bob"]
+
+    response = client.post("/connections/query-export/export-query",
+                           json={"sql": "SELECT 1 AS n", "format": "csv", "filename": "報告 q1"})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=___q1.csv"
+
+    response = client.post("/connections/query-export/export-query", json={"sql": "UPDATE orders SET total = 0"})
+    assert response.status_code == 400
+    assert "read-only" in response.json()["detail"]
@@ -42,32 +42,33 @@ def test_execute_query_redis_select_intercept(mock_redis, redis_config):
 def test_get_schema_context_redis(mock_redis, redis_config):
     mock_r = MagicMock()
     mock_redis.return_value = mock_r
-    mock_r.keys.return_value = ["user:1", "user:2"]
-    mock_r.type.return_value = "string"
+    mock_r.info.return_value = {"db0": {"keys": 2, "expires": 0}}
+    mock_r.scan.return_value = (0, ["user:1", "user:2"])
+    mock_r.pipeline.return_value.execute.return_value = ["string", "string"]
     context = get_schema_context(redis_config)
     assert "Redis Database" in context
-    assert "user:1 (string)" in context
+    assert "user:* (~2 keys, string)" in context
+    mock_r.keys.assert_not_called()
 
 @patch("redis.Redis")
 def test_import_data_redis(mock_redis, redis_config):
     mock_r = MagicMock()
     mock_redis.return_value = mock_r
-    pipe = mock_r.pipeline.return_value
     
     csv_content = b"key,value\nname,Alice\nage,30"
     result = import_data(redis_config, "ignored", csv_content, "csv")
     
     assert result["success"] is True
     assert "Imported 2 keys" in result["message"]
-    pipe.set.assert_any_call("name", "Alice")
-    pipe.set.assert_any_call("age", "30")
+    mock_r.mset.assert_called_once_with({"name": "Alice", "age": "30"})
 
 @patch("redis.Redis")
 def test_stream_export_data_redis(mock_redis, redis_config):
     mock_r = MagicMock()
     mock_redis.return_value = mock_r
     mock_r.scan_iter.return_value = ["key1", "key2"]
-    mock_r.get.side_effect = ["val1", "val2"]
+    # TYPE for the batch, then one MGET for its string keys
+    mock_r.pipeline.return_value.execute.side_effect = [["string", "string"], [["val1", "val2"]]]
     
     gen = stream_export_data(redis_config, "ignored", "json")
     content = "".join(list(gen))
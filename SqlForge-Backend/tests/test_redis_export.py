@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import pytest
+from unittest.mock import patch
+from database import stream_export_data
+from models import ConnectionConfig
+
+
+class FakePipeline:
+    def __init__(self, server):
+        self.server = server
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return queue
+
+    def execute(self):
+        self.server.round_trips += 1
+        return [getattr(self.server, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeRedis:
+    """Just enough of a Redis server, typed, to serve an export."""
+
+    def __init__(self, data):
+        self.data = data
+        self.round_trips = 0
+
+    def scan_iter(self, match="*", count=None):
+        return iter(list(self.data))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def type(self, key):
+        return self.data[key][0] if key in self.data else "none"
+
+    def mget(self, keys):
+        return [self.data[k][1] for k in keys]
+
+    def hgetall(self, key):
+        return dict(self.data[key][1])
+
+    def lrange(self, key, start, end):
+        return list(self.data[key][1])
+
+    def smembers(self, key):
+        return set(self.data[key][1])
+
+    def zrange(self, key, start, end, withscores=False):
+        return list(self.data[key][1])
+
+    def xrange(self, key):
+        return list(self.data[key][1])
+
+    def get(self, key):
+        raise AssertionError("one GET per key")
+
+
+@pytest.fixture
+def redis_config():
+    return ConnectionConfig(id="redis-export", name="r", type="redis", host="localhost", port=6379, database="0")
+
+
+DATA = {
+    "greeting": ("string", "hello"),
+    "user:1": ("hash", {"name": "Ann", "email": "ann@example.com"}),
+    "queue": ("list", ["a", "b"]),
+    "tags": ("set", ["y", "x"]),
+    "scores": ("zset", [("ann", 3.0), ("bob", 1.5)]),
+    "events": ("stream", [("1-0", {"k": "v"})]),
+    "doc": ("ReJSON-RL", None),
+}
+
+
+def test_every_type_is_exported_with_two_round_trips_per_batch(redis_config):
+    server = FakeRedis(DATA)
+    with patch("redis.Redis", return_value=server):
+        exported = json.loads("".join(stream_export_data(redis_config, "ignored", "json")))
+
+    assert server.round_trips == 2
+    assert {d["key"]: (d["type"], d["value"]) for d in exported} == {
+        "greeting": ("string", "hello"),
+        "user:1": ("hash", {"name": "Ann", "email": "ann@example.com"}),
+        "queue": ("list", ["a", "b"]),
+        "tags": ("set", ["x", "y"]),
+        "scores": ("zset", [["ann", 3.0], ["bob", 1.5]]),
+        "events": ("stream", [{"id": "1-0", "fields": {"k": "v"}}]),
+        "doc": ("ReJSON-RL", None),
+    }
+
+
+def test_keys_are_batched(redis_config):
+    server = FakeRedis({f"k{i}": ("string", str(i)) for i in range(25)})
+    with patch("redis.Redis", return_value=server), patch("database.REDIS_EXPORT_BATCH_SIZE", 10):
+        exported = json.loads("".join(stream_export_data(redis_config, "ignored", "json")))
+    assert [d["value"] for d in exported] == [str(i) for i in range(25)]
+    assert server.round_trips == 6
+
+
+def test_batch_of_expired_keys_keeps_the_json_valid(redis_config):
+    server = FakeRedis({"a": ("string", "1"), "b": ("string", "2")})
+    server.scan_iter = lambda match="*", count=None: iter(["a", "gone1", "gone2", "b"])
+    with patch("redis.Redis", return_value=server), patch("database.REDIS_EXPORT_BATCH_SIZE", 1):
+        exported = json.loads("".join(stream_export_data(redis_config, "ignored", "json")))
+    assert [d["key"] for d in exported] == ["a", "b"]
+
+
+def test_csv_encodes_structured_values_and_masks(redis_config):
+    with patch("redis.Redis", return_value=FakeRedis(DATA)):
+        rows = list(csv.reader(io.StringIO("".join(stream_export_data(redis_config, "ignored", "csv")))))
+    assert rows[0] == ["key", "type", "value"]
+    assert ["queue", "list", '["a", "b"]'] in rows
+
+    with patch("redis.Redis", return_value=FakeRedis(DATA)):
+        masked = list(csv.reader(io.StringIO("".join(stream_export_data(redis_config, "ignored", "csv", mask_pii=True)))))
+    assert masked[1][0] != "greeting" and masked[1][1] == "string" and masked[1][2] != "hello"
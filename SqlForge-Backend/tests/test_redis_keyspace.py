@@ -0,0 +1,59 @@
+from unittest.mock import patch, MagicMock
+from database import get_tables, get_redis_keyspace, redis_key_pattern, summarize_redis_keys
+from models import ConnectionConfig
+
+
+def _redis_config():
+    return ConnectionConfig(id="redis-ks", name="Redis", type="redis", host="localhost", port=6379, database="0")
+
+
+def test_redis_key_pattern_collapses_id_segments():
+    assert redis_key_pattern("user:42") == "user:*"
+    assert redis_key_pattern("user:42:profile") == "user:*:profile"
+    assert redis_key_pattern("session:abc") == "session:*"
+    assert redis_key_pattern("order:9f8e7d6c5b4a") == "order:*"
+    assert redis_key_pattern("standalone") == "standalone"
+
+
+def test_get_redis_keyspace_parses_info_output():
+    r = MagicMock()
+    r.info.return_value = {"db0": {"keys": 5, "expires": 1}, "db3": {"keys": 120000, "expires": 0}}
+    assert get_redis_keyspace(r) == {0: 5, 3: 120000}
+    r.info.assert_called_once_with("keyspace")
+
+
+@patch("redis.Redis")
+def test_get_tables_redis_uses_a_single_info_call(mock_redis):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.info.return_value = {"db2": {"keys": 7}, "db5": {"keys": 1}}
+
+    items = get_tables(_redis_config())
+
+    assert [i.name for i in items] == ["DB0", "DB2", "DB5"]
+    assert mock_redis.call_count == 1
+    mock_r.dbsize.assert_not_called()
+
+
+def test_summarize_redis_keys_extrapolates_pattern_counts():
+    r = MagicMock()
+    r.scan.side_effect = [(17, ["user:1", "user:2", "user:3"]), (0, ["cart:9"])]
+    r.pipeline.return_value.execute.return_value = ["hash", "hash", "hash", "list"]
+
+    summary = summarize_redis_keys(r, total_keys=400)
+
+    assert summary[0] == {"pattern": "user:*", "estimated_keys": 300, "sampled": 3, "types": ["hash"]}
+    assert summary[1]["pattern"] == "cart:*"
+    assert summary[1]["estimated_keys"] == 100
+
+
+def test_summarize_redis_keys_respects_the_sample_budget():
+    r = MagicMock()
+    r.scan.return_value = (5, [f"k:{i}" for i in range(10)])
+    r.pipeline.return_value.execute.side_effect = lambda: ["string"] * 25
+
+    summary = summarize_redis_keys(r, total_keys=1_000_000, sample_budget=25)
+
+    assert r.scan.call_count == 3
+    assert summary[0]["sampled"] == 25
+    assert summary[0]["estimated_keys"] == 1_000_000
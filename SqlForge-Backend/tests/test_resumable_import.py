@@ -0,0 +1,129 @@
+import hashlib
+import io
+import json
+import sqlite3
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+import bulk_load
+import database
+import internal_db
+from database import import_data, iter_csv_rows
+from main import app
+from models import ConnectionConfig
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    internal_db.init_db()
+    db_file = str(tmp_path / "resume.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, label TEXT)")
+    conn.commit()
+    conn.close()
+    database.dispose_engine("resume-import")
+    yield ConnectionConfig(id="resume-import", name="resume", type="sqlite", database="r.db", filepath=db_file)
+    database.dispose_engine("resume-import")
+    internal_db.delete_connection("resume-import")
+
+
+def table_ids(path):
+    conn = sqlite3.connect(path)
+    ids = [r[0] for r in conn.execute("SELECT id FROM items ORDER BY id")]
+    conn.close()
+    return ids
+
+
+def failing_on_call(n):
+    """insert_rows that fails once, on its n-th call."""
+    calls = {"count": 0}
+    real = bulk_load.insert_rows
+
+    def insert(*args):
+        calls["count"] += 1
+        if calls["count"] == n:
+            raise Exception("connection reset")
+        return real(*args)
+    return insert
+
+
+def test_csv_offsets_point_past_each_record_including_multiline_fields():
+    data = b'id,label\n1,"a\nb"\n2,c\n'
+    stream = io.BytesIO(data)
+    pairs = list(iter_csv_rows(stream))
+    assert pairs[0] == ({"id": "1", "label": "a\nb"}, data.index(b"2,c"))
+    assert pairs[1][1] == len(data)
+
+    resumed = list(iter_csv_rows(io.BytesIO(data), pairs[0][1]))
+    assert resumed == [({"id": "2", "label": "c"}, len(data))]
+
+
+def test_failed_csv_import_resumes_from_checkpoint(sqlite_config):
+    data = ("id,label\n" + "".join(f"{i},item {i}\n" for i in range(1, 26))).encode("utf-8")
+    file_hash = hashlib.sha256(data).hexdigest()
+
+    with patch("database.IMPORT_BATCH_SIZE", 5), patch("bulk_load.insert_rows", side_effect=failing_on_call(3)):
+        result = import_data(sqlite_config, "items", io.BytesIO(data), "csv", resumable=True, commit_every=10)
+
+    assert not result["success"]
+    assert "10 rows are committed" in result["error"]
+    assert table_ids(sqlite_config.filepath) == list(range(1, 11))
+    checkpoint = internal_db.get_import_checkpoint("resume-import", "items", file_hash)
+    assert checkpoint["rows_committed"] == 10
+    assert checkpoint["byte_offset"] == data.index(b"11,item 11")
+
+    # The retry starts at the stored offset: the first ten rows are never
+    # parsed again, let alone re-inserted.
+    with patch("database.IMPORT_BATCH_SIZE", 5), \
+         patch("database.iter_csv_rows", wraps=database.iter_csv_rows) as reader:
+        result = import_data(sqlite_config, "items", io.BytesIO(data), "csv", resumable=True, commit_every=10)
+
+    assert result["success"], result
+    assert result["resumed_from"] == 10
+    assert "Successfully imported 15 rows" in result["message"]
+    assert reader.call_args[0][1] == checkpoint["byte_offset"]
+    assert table_ids(sqlite_config.filepath) == list(range(1, 26))
+    assert internal_db.get_import_checkpoint("resume-import", "items", file_hash) is None
+
+
+def test_json_import_resumes_by_skipping_committed_rows(sqlite_config):
+    data = json.dumps([{"id": i, "label": f"x{i}"} for i in range(1, 13)]).encode("utf-8")
+
+    with patch("database.IMPORT_BATCH_SIZE", 4), patch("bulk_load.insert_rows", side_effect=failing_on_call(3)):
+        result = import_data(sqlite_config, "items", data, "json", resumable=True, commit_every=4, mode="truncate")
+    assert not result["success"]
+    assert table_ids(sqlite_config.filepath) == [1, 2, 3, 4, 5, 6, 7, 8]
+
+    # truncate only applies to a fresh start, never to a resumed one
+    result = import_data(sqlite_config, "items", data, "json", resumable=True, commit_every=4, mode="truncate")
+    assert result["success"], result
+    assert result["resumed_from"] == 8
+    assert table_ids(sqlite_config.filepath) == list(range(1, 13))
+
+
+def test_a_different_file_starts_from_scratch(sqlite_config):
+    first = b"id,label\n1,a\n2,b\n"
+    with patch("bulk_load.insert_rows", side_effect=failing_on_call(2)), patch("database.IMPORT_BATCH_SIZE", 1):
+        import_data(sqlite_config, "items", first, "csv", resumable=True, commit_every=1)
+
+    result = import_data(sqlite_config, "items", b"id,label\n3,c\n", "csv", resumable=True)
+    assert result["success"], result
+    assert result["resumed_from"] == 0
+    assert table_ids(sqlite_config.filepath) == [1, 3]
+
+
+@pytest.mark.parametrize("options", [{"parallelism": 4}, {"defer_indexes": True}])
+def test_resumable_refuses_parallel_or_deferred_index_loads(sqlite_config, options):
+    result = import_data(sqlite_config, "items", b"id,label\n1,a\n", "csv", resumable=True, **options)
+    assert not result["success"]
+    assert "can't be combined" in result["error"]
+    assert table_ids(sqlite_config.filepath) == []
+
+    internal_db.save_connection(sqlite_config)
+    response = TestClient(app).post(
+        f"/connections/{sqlite_config.id}/import/items",
+        files={"file": ("i.csv", io.BytesIO(b"id,label\n1,a\n"), "text/csv")},
+        data={"format": "csv", "resumable": "true", **{k: str(v).lower() for k, v in options.items()}},
+    )
+    assert response.status_code == 400
+    assert table_ids(sqlite_config.filepath) == []
@@ -0,0 +1,86 @@
+import sqlite3
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+import internal_db
+import main
+from main import app
+from models import ConnectionConfig
+from pro.sync import diff_snapshot_to_db
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def snapshot_conn(tmp_path):
+    internal_db.init_db()
+    db_file = str(tmp_path / "snap.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+    r = client.post("/connections", json={"name": "Snapshot Test", "type": "sqlite", "database": "snap.db", "filepath": db_file})
+    conn_id = r.json()["id"]
+    yield conn_id, db_file
+    client.delete(f"/connections/{conn_id}")
+
+
+def test_save_schema_snapshot_only_versions_real_changes():
+    conn_id = "snapshot-versioning"
+    internal_db.init_db()
+    internal_db.delete_schema_snapshots(conn_id)
+    schemas = [{"name": "t", "columns": [], "foreign_keys": [], "indexes": []}]
+
+    assert internal_db.save_schema_snapshot(conn_id, schemas) == 1
+    assert internal_db.save_schema_snapshot(conn_id, schemas) == 1
+    assert internal_db.save_schema_snapshot(conn_id, schemas + [{"name": "u", "columns": [], "foreign_keys": [], "indexes": []}]) == 2
+
+    assert len(internal_db.get_schema_snapshot(conn_id)["schemas"]) == 2
+    assert internal_db.get_schema_snapshot(conn_id, version=1)["schemas"] == schemas
+    internal_db.delete_schema_snapshots(conn_id)
+    assert internal_db.get_schema_snapshot(conn_id) is None
+
+
+def test_schema_endpoint_serves_snapshot_after_restart(snapshot_conn):
+    conn_id, _ = snapshot_conn
+    # First request reflects live and stores a snapshot.
+    first = client.get(f"/connections/{conn_id}/schema").json()
+    assert internal_db.get_schema_snapshot(conn_id)["schemas"] == first
+
+    # Simulate a backend restart: nothing has been checked live yet.
+    main._live_schema_conn_ids.clear()
+    with patch("main.database.get_schema_details", wraps=main.database.get_schema_details) as reflect:
+        served = client.get(f"/connections/{conn_id}/schema").json()
+    assert served == first
+    # Served from the snapshot, then refreshed once in the background.
+    assert reflect.call_count == 1
+    assert conn_id in main._live_schema_conn_ids
+
+
+def test_schema_endpoint_refresh_bypasses_snapshot(snapshot_conn):
+    conn_id, db_file = snapshot_conn
+    client.get(f"/connections/{conn_id}/schema")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY)")
+    conn.commit()
+    conn.close()
+
+    main._live_schema_conn_ids.clear()
+    names = [t["name"] for t in client.get(f"/connections/{conn_id}/schema?refresh=true").json()]
+    assert "orders" in names
+    assert internal_db.get_schema_snapshot(conn_id)["version"] == 2
+
+
+def test_diff_snapshot_to_db_does_not_touch_the_source(snapshot_conn, tmp_path):
+    conn_id, _ = snapshot_conn
+    client.get(f"/connections/{conn_id}/schema")
+    source = internal_db.get_connection(conn_id)
+    target_file = str(tmp_path / "target.db")
+    sqlite3.connect(target_file).close()
+    target = ConnectionConfig(id="snap-target", name="Target", type="sqlite", database="target.db", filepath=target_file)
+
+    with patch("pro.sync.get_engine", wraps=__import__("database").get_engine) as get_engine:
+        result = diff_snapshot_to_db(source, target)
+
+    assert "CREATE TABLE users" in result["sql_text"]
+    assert all(call.args[0].id == "snap-target" for call in get_engine.call_args_list)
@@ -0,0 +1,94 @@
+import io
+import json
+import sqlite3
+import pytest
+from unittest.mock import patch
+import database
+from database import import_data, iter_import_rows
+from models import ConnectionConfig
+
+
+class ChunkOnlyStream(io.BytesIO):
+    """A binary stream that refuses unbounded reads, so a test fails if the
+    importer ever tries to slurp the whole upload at once."""
+    def read(self, size=-1):
+        assert size is not None and size > 0, "import read the whole stream into memory"
+        return super().read(size)
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    db_file = str(tmp_path / "stream.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT, note TEXT)")
+    conn.commit()
+    conn.close()
+    database.dispose_engine("stream-import")
+    yield ConnectionConfig(id="stream-import", name="stream", type="sqlite", database="stream.db", filepath=db_file)
+    database.dispose_engine("stream-import")
+
+
+def test_csv_rows_are_read_incrementally_including_multiline_fields():
+    data = '﻿id,name,note\n1,Ann,"two\nlines"\n2,Bob,\n'.encode("utf-8")
+    rows = list(iter_import_rows(ChunkOnlyStream(data), "csv"))
+    assert rows == [
+        {"id": "1", "name": "Ann", "note": "two\nlines"},
+        {"id": "2", "name": "Bob", "note": None},
+    ]
+
+
+def test_json_array_elements_are_parsed_across_chunk_boundaries():
+    docs = [{"id": i, "name": f"ünïcødé {i}", "score": 12345 + i} for i in range(50)]
+    data = json.dumps(docs).encode("utf-8")
+    with patch.object(database, "IMPORT_READ_CHUNK_SIZE", 7):
+        rows = list(iter_import_rows(ChunkOnlyStream(data), "json"))
+    assert rows == docs
+
+
+def test_json_lines_and_single_objects_are_supported():
+    lines = b'{"id": 1}\n{"id": 2}\n\n{"id": 3}\n'
+    assert [r["id"] for r in iter_import_rows(ChunkOnlyStream(lines), "jsonl")] == [1, 2, 3]
+    assert list(iter_import_rows(b'{"id": 9}', "json")) == [{"id": 9}]
+
+
+def test_truncated_json_raises():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_import_rows(b'[{"id": 1}, {"id": ', "json"))
+
+
+def test_large_json_values_are_read_in_growing_chunks():
+    data = json.dumps([{"id": 1, "blob": "x" * 100_000}, {"id": 2}]).encode("utf-8")
+    stream = ChunkOnlyStream(data)
+    with patch.object(database, "IMPORT_READ_CHUNK_SIZE", 100), \
+         patch.object(stream, "read", wraps=stream.read) as read:
+        rows = list(iter_import_rows(stream, "json"))
+    assert [r["id"] for r in rows] == [1, 2]
+    assert read.call_count < 20
+
+
+def test_malformed_json_stops_at_the_value_size_cap():
+    data = b'[{"id": 1}, {"id": x' + b" " * 10_000 + b"}]"
+    stream = ChunkOnlyStream(data)
+    with patch.object(database, "IMPORT_READ_CHUNK_SIZE", 16), \
+         patch.object(database, "IMPORT_JSON_MAX_VALUE_CHARS", 1000):
+        with pytest.raises(ValueError, match="runs past 1000 characters"):
+            list(iter_import_rows(stream, "json"))
+        assert stream.tell() < 5000
+
+
+def test_import_data_consumes_a_stream_in_batches(sqlite_config):
+    body = "id,name,note\n" + "".join(f"{i},n{i},x\n" for i in range(2500))
+    with patch.object(database, "IMPORT_BATCH_SIZE", 1000):
+        result = import_data(sqlite_config, "people", ChunkOnlyStream(body.encode()), "csv")
+
+    assert result["success"] is True, result
+    assert "2500 rows" in result["message"]
+    conn = sqlite3.connect(sqlite_config.filepath)
+    assert conn.execute("SELECT COUNT(*) FROM people").fetchone()[0] == 2500
+    conn.close()
+
+
+def test_import_data_rejects_non_object_json_for_sql(sqlite_config):
+    result = import_data(sqlite_config, "people", b"[1, 2, 3]", "json")
+    assert result["success"] is False
+    assert "Expected list of objects" in result["error"]
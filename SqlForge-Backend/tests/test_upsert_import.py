@@ -0,0 +1,141 @@
+import json
+import sqlite3
+import pytest
+from unittest.mock import MagicMock, patch
+from pymongo import InsertOne, ReplaceOne
+import bulk_load
+import database
+import internal_db
+from database import import_data
+from models import ConnectionConfig
+
+
+def make_conn(dialect, dbapi_conn=None):
+    conn = MagicMock()
+    conn.dialect.name = dialect
+    conn.connection.info = {}
+    conn.connection.dbapi_connection = dbapi_conn or MagicMock()
+    return conn
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    internal_db.init_db()
+    db_file = str(tmp_path / "upsert.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE products (sku TEXT PRIMARY KEY, name TEXT, price REAL)")
+    conn.execute("CREATE TABLE log (line TEXT)")
+    conn.executemany("INSERT INTO products VALUES (?, ?, ?)", [("a", "Apple", 1.0), ("b", "Banana", 2.0)])
+    conn.commit()
+    conn.close()
+    database.dispose_engine("upsert-import")
+    yield ConnectionConfig(id="upsert-import", name="upsert", type="sqlite", database="u.db", filepath=db_file)
+    database.dispose_engine("upsert-import")
+    internal_db.delete_connection("upsert-import")
+
+
+def products(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT sku, name, price FROM products ORDER BY sku").fetchall()
+    conn.close()
+    return rows
+
+
+def test_upsert_updates_existing_keys_and_inserts_new_ones(sqlite_config):
+    data = b"sku,name,price\nb,Blueberry,2.5\nc,Cherry,3.0\n"
+    result = import_data(sqlite_config, "products", data, "csv", mode="upsert")
+    assert result["success"], result
+    assert products(sqlite_config.filepath) == [("a", "Apple", 1.0), ("b", "Blueberry", 2.5), ("c", "Cherry", 3.0)]
+
+
+def test_upsert_through_parallel_and_resumable_paths(sqlite_config):
+    data = json.dumps([{"sku": "a", "name": "Apricot", "price": 4}, {"sku": "d", "name": "Date", "price": 5}]).encode()
+    result = import_data(sqlite_config, "products", data, "json", mode="upsert", defer_indexes=True)
+    assert result["success"], result
+    assert result["report"]["rows_loaded"] == 2
+    assert result["report"]["rows_after"] - result["report"]["rows_before"] == 1
+    assert result["report"]["consistent"]
+
+    result = import_data(sqlite_config, "products", b"sku,price\nd,6\n", "csv", mode="upsert", resumable=True)
+    assert result["success"], result
+    assert products(sqlite_config.filepath)[-1] == ("d", "Date", 6.0)
+
+
+def test_upsert_requires_a_primary_key_in_the_data(sqlite_config):
+    result = import_data(sqlite_config, "log", b"line\nhello\n", "csv", mode="upsert")
+    assert not result["success"]
+    assert "needs a primary key" in result["error"]
+
+    result = import_data(sqlite_config, "products", b"name\nNo key\n", "csv", mode="upsert")
+    assert not result["success"]
+    assert "sku" in result["error"]
+    assert len(products(sqlite_config.filepath)) == 2
+
+
+def test_postgres_stages_batch_with_copy_and_merges_once():
+    conn = make_conn("postgresql")
+    cursor = conn.connection.dbapi_connection.cursor.return_value
+    copied = {}
+    cursor.copy_expert.side_effect = lambda sql, buf: copied.update(sql=sql)
+
+    assert bulk_load.upsert_rows(conn, "products", ["sku", "name"], [("a", "A"), ("a", "A2")], ["sku"]) == 2
+
+    statements = [call[0][0] for call in conn.exec_driver_sql.call_args_list]
+    assert statements[0].startswith("CREATE TEMP TABLE IF NOT EXISTS _sqlforge_upsert_stage (LIKE products")
+    assert copied["sql"] == "COPY _sqlforge_upsert_stage (sku, name) FROM STDIN"
+    assert statements[-1] == (
+        "INSERT INTO products (sku, name) SELECT DISTINCT ON (sku) sku, name FROM _sqlforge_upsert_stage "
+        "ORDER BY sku, ctid DESC ON CONFLICT (sku) DO UPDATE SET name = EXCLUDED.name"
+    )
+
+
+def test_mysql_and_oracle_statements():
+    mysql = bulk_load._upsert_statement("mysql", "t", ["id", "v"], ["id"], [":id", ":v"])
+    assert mysql == "INSERT INTO t (id, v) VALUES (:id, :v) ON DUPLICATE KEY UPDATE v = VALUES(v)"
+    assert bulk_load._upsert_statement("mysql", "t", ["id"], ["id"], [":id"]).startswith("INSERT IGNORE")
+
+    oracle = bulk_load._upsert_statement("oracle", "t", ["id", "v"], ["id"], [":id", ":v"])
+    assert oracle == (
+        "MERGE INTO t t USING (SELECT :id AS id, :v AS v FROM dual) s ON (t.id = s.id) "
+        "WHEN MATCHED THEN UPDATE SET t.v = s.v WHEN NOT MATCHED THEN INSERT (id, v) VALUES (s.id, s.v)"
+    )
+
+
+def test_mssql_merges_multi_row_batches_within_the_parameter_limit():
+    conn = make_conn("mssql")
+    rows = [(i, f"v{i}") for i in range(1500)]
+    with patch("bulk_load._MSSQL_MAX_PARAMS", 2000):
+        bulk_load.upsert_rows(conn, "t", ["id", "v"], rows, ["id"])
+
+    assert conn.execute.call_count == 2
+    sql = str(conn.execute.call_args_list[0][0][0])
+    assert sql.startswith("MERGE INTO t AS t USING (VALUES (:p0_0, :p0_1), (:p1_0, :p1_1)")
+    assert "WHEN MATCHED THEN UPDATE SET t.v = s.v" in sql
+    assert len(conn.execute.call_args_list[0][0][1]) == 2000
+    assert len(conn.execute.call_args_list[1][0][1]) == 1000
+
+
+def test_mssql_collapses_duplicate_keys_to_the_last_occurrence():
+    conn = make_conn("mssql")
+    rows = [(1, "a"), (2, "b"), (1, "a2"), (3, "c"), (2, "b2")]
+
+    assert bulk_load.upsert_rows(conn, "t", ["id", "v"], rows, ["id"]) == 5
+
+    assert conn.execute.call_count == 1
+    params = conn.execute.call_args[0][1]
+    assert len(params) == 6
+    assert [(params[f"p{i}_0"], params[f"p{i}_1"]) for i in range(3)] == [(1, "a2"), (2, "b2"), (3, "c")]
+
+
+@patch("database.MongoClient")
+def test_mongo_upsert_replaces_documents_by_id(mock_client):
+    collection = mock_client.return_value.__getitem__.return_value.__getitem__.return_value
+    config = ConnectionConfig(id="m", name="m", type="mongodb", host="localhost", port=27017, database="db")
+    data = json.dumps([{"_id": 1, "name": "a"}, {"name": "b"}]).encode()
+
+    result = import_data(config, "people", data, "json", mode="upsert")
+
+    assert result["success"], result
+    requests = collection.bulk_write.call_args[0][0]
+    assert requests == [ReplaceOne({"_id": 1}, {"_id": 1, "name": "a"}, upsert=True), InsertOne({"name": "b"})]
+    collection.insert_many.assert_not_called()
@@ -0,0 +1,47 @@
+import datetime
+import sqlite3
+import xml.etree.ElementTree as ET
+import pytest
+from unittest.mock import patch
+import database
+from database import stream_export_data
+from models import ConnectionConfig
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    db_file = str(tmp_path / "xml_export.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE contacts (id INTEGER, email TEXT, note TEXT, \"2nd line\" TEXT)")
+    conn.executemany("INSERT INTO contacts VALUES (?, ?, ?, ?)",
+                     [(i, f"u{i}@example.com", None if i % 2 else "a < b & \"c\"\x01", "x") for i in range(1200)])
+    conn.commit()
+    conn.close()
+    database.dispose_engine("xml-export")
+    yield ConnectionConfig(id="xml-export", name="x", type="sqlite", database="x.db", filepath=db_file)
+    database.dispose_engine("xml-export")
+
+
+def test_xml_is_streamed_one_batch_of_elements_at_a_time(sqlite_config):
+    with patch("database.EXPORT_BATCH_SIZE", 500), patch("pandas.DataFrame", side_effect=AssertionError("pandas used")):
+        chunks = list(stream_export_data(sqlite_config, "contacts", "xml"))
+
+    # prolog, three batches, closing tag
+    assert len(chunks) == 5
+    root = ET.fromstring("".join(chunks).encode("utf-8"))
+    rows = root.findall("row")
+    assert len(rows) == 1200
+    assert [child.tag for child in rows[0]] == ["id", "email", "note", "_2nd_line"]
+    assert rows[0].find("note").text == 'a < b & "c"'
+    assert rows[1].find("note").text is None
+
+
+def test_xml_masking_is_applied(sqlite_config):
+    root = ET.fromstring("".join(stream_export_data(sqlite_config, "contacts", "xml", mask_pii=True)).encode("utf-8"))
+    email = root.find("row").find("email").text
+    assert email.endswith("@example.com") and email != "u0@example.com"
+
+
+def test_xml_text_formats_values():
+    assert database._xml_text(datetime.date(2024, 1, 2)) == "2024-01-02"
+    assert database._xml_text({"a": 1}) == '{"a": 1}'